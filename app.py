@@ -1,6 +1,5 @@
 import streamlit as st
 import pandas as pd
-from newsapi import NewsApiClient
 import google.generativeai as genai
 from datetime import datetime, timedelta
 import os
@@ -14,11 +13,25 @@ from streamlit_extras.app_logo import add_logo
 from streamlit_extras.tags import tagger_component
 from streamlit_extras.chart_container import chart_container
 from streamlit_extras.grid import grid
-import requests
+import http_client
+from extraction_rules import rule_stats
 import time
-from upsc_notes_generator import generate_upsc_notes, generate_quiz
-import re
-from bs4 import BeautifulSoup
+from upsc_notes_generator import generate_upsc_notes, generate_upsc_notes_stream, generate_quiz, NOTES_MODES, NOTES_MODE, stream_stats
+from quiz_parser import is_correct, parse_quiz
+from llm_cache import cache_stats
+from llm_backends import create_model
+from html_cache import html_cache_stats
+from rate_limiter import limiter_stats
+from news_cache import UPSC_SOURCES, news_cache_stats
+from news_fetcher import fetch_articles, is_valid_article, iter_articles
+from article_extractor import fetch_article_content
+from batch_notes import BATCH_CONCURRENCY, generate_notes_batch, unique_articles
+from dedup import DEDUP_ENABLED, choose_representative, cluster_articles, dedup_stats
+from notes_store import article_id_for, get_notes, link_alias, save_notes, list_notes, count_notes, notes_available, get_quiz, save_quiz
+from job_queue import USE_JOB_QUEUE, JOB_POLL_INTERVAL, JOB_RERUN_INTERVAL, JOB_WAIT_TIMEOUT, FINISHED_STATUSES, enqueue_job, get_jobs, queue_stats, wait_for_job
+from profiling import checkpoint, finish_rerun, start_rerun, timed_iter
+from pagination import page_controls, page_range, paginate, reset_page
+from urllib.parse import quote
 
 # Set page config (must be the first Streamlit command)
 st.set_page_config(
@@ -28,6 +41,9 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Opt-in rerun profiling (PROFILE_RERUNS=1 or ?profile=1): time spent in each section below
+start_rerun('app.py')
+
 # Custom CSS for better styling
 st.markdown("""
 <style>
@@ -235,6 +251,7 @@ st.markdown("""
     }
 </style>
 """, unsafe_allow_html=True)
+checkpoint('css')
 
 # Load environment variables
 load_dotenv()
@@ -259,23 +276,21 @@ if not GOOGLE_API_KEY:
 
 # Configure Gemini
 genai.configure(api_key=GOOGLE_API_KEY)
-model = genai.GenerativeModel('gemini-2.5-flash')
-
-# Configure News API
-NEWS_API_URL = "https://newsapi.org/v2/everything"
-newsapi = NewsApiClient(api_key=NEWS_API_KEY)
+model = create_model()
 
-# Initialize session state
-if 'notes' not in st.session_state:
-    st.session_state.notes = {}
-if 'saved_notes' not in st.session_state:
-    st.session_state.saved_notes = {}
+# Initialize session state (generated notes live in the persistent notes store)
 if 'articles' not in st.session_state:
     st.session_state.articles = []
 if 'quiz' not in st.session_state:
     st.session_state.quiz = {}
-if 'quiz_answers' not in st.session_state:
-    st.session_state.quiz_answers = {}
+# Queued jobs this session is following, keyed by the button that started them
+if 'queued_jobs' not in st.session_state:
+    st.session_state.queued_jobs = {}
+# The batch of notes jobs this session is following (job queue only)
+if 'batch_jobs' not in st.session_state:
+    st.session_state.batch_jobs = None
+
+checkpoint('config')
 
 # Title and description
 st.title("📚 UPSC News Analyzer & Note Maker")
@@ -304,6 +319,189 @@ st.sidebar.markdown("""
    - Regular updates
 """)
 
+# Notes generation mode: chained (4 requests) or structured (single JSON request)
+notes_mode = st.sidebar.radio(
+    "Notes Generation Mode",
+    NOTES_MODES,
+    index=NOTES_MODES.index(NOTES_MODE) if NOTES_MODE in NOTES_MODES else 0,
+    format_func=lambda mode: "Chained (4 steps)" if mode == "chained" else "Structured (single pass)",
+    key="notes_mode"
+)
+stream_notes = st.sidebar.checkbox("Stream notes as they are generated", value=True, key="stream_notes")
+
+def show_notes(placeholder, text, html_container=None):
+    """
+    Render notes markdown into a placeholder, optionally inside a styled container
+    """
+    if html_container:
+        placeholder.markdown(f'<div class="{html_container}">\n\n{text}\n\n</div>', unsafe_allow_html=True)
+    else:
+        placeholder.markdown(text)
+
+def show_stored_notes(article_id, has_notes, key, html_container=None):
+    """
+    Offer an article's stored notes behind a toggle; the notes body is only
+    read from the store and rendered once the reader opens it
+    """
+    if has_notes and st.toggle("📖 Show generated notes", key=key):
+        stored_notes = get_notes(article_id)
+        if stored_notes:
+            show_notes(st.container(), stored_notes, html_container)
+
+def job_button(label, key):
+    """
+    st.button that stays pressed on the reruns that follow the queued job it
+    started, so the code under it keeps showing the job until it finishes
+    """
+    following = key in st.session_state.queued_jobs
+    return st.button(label, key=key, disabled=following) or following
+
+def render_upsc_notes(article, article_content=None, html_container=None, job_key=None):
+    """
+    Show the stored notes for an article, or generate, render and store them,
+    streaming the final stage when enabled. When article_content is None the
+    full article is fetched, but only if no stored notes exist.
+    job_key is the job_button that asked for the notes (job queue only).
+    Returns the notes text, or None if the article content could not be fetched.
+    """
+    article_id = article_id_for(article)
+    placeholder = st.empty()
+
+    # Lookup before generate: notes from any session are served from the store
+    # (a job this session follows finishes through run_queued_job, which stops following it)
+    notes = get_notes(article_id)
+    if notes and job_key not in st.session_state.queued_jobs:
+        show_notes(placeholder, notes, html_container)
+        st.caption("Loaded from the notes archive")
+        return notes
+
+    if USE_JOB_QUEUE:
+        # Generation (including the article fetch) happens in the worker pool
+        error = run_queued_job(
+            'notes', article, article_content,
+            on_progress=lambda partial: show_notes(placeholder, partial + "▌", html_container),
+            job_key=job_key
+        )
+        notes = f"Error generating notes: {error}" if error else get_notes(article_id)
+        show_notes(placeholder, notes, html_container)
+        return notes
+
+    if article_content is None:
+        article_content = fetch_article_content(article['url'])
+        if not article_content:
+            return None
+
+    if not stream_notes:
+        notes = generate_upsc_notes(article['title'], article_content, mode=notes_mode)
+        if notes:
+            show_notes(placeholder, notes, html_container)
+    else:
+        notes = ""
+        timing = {}
+        for chunk in generate_upsc_notes_stream(article['title'], article_content, mode=notes_mode, timing=timing):
+            notes += chunk
+            show_notes(placeholder, notes + "▌", html_container)
+        if timing['error']:
+            # A stream that fails part-way leaves a truncated note: show the error in its place and keep it out of the store
+            notes = timing['error']
+        show_notes(placeholder, notes, html_container)
+        if timing.get('first_token_seconds') is not None:
+            st.caption(f"First token after {timing['first_token_seconds']:.1f}s, complete after {timing['total_seconds']:.1f}s")
+
+    # Failures are reported in the notes text and are not worth persisting
+    if notes and not notes.startswith("Error generating notes:"):
+        save_notes(article, notes, mode=notes_mode, article_id=article_id)
+    return notes
+
+def run_queued_job(kind, article, article_content=None, on_progress=None, job_key=None):
+    """
+    Enqueue a notes or quiz job for the worker pool and follow it.
+    Each rerun waits at most JOB_RERUN_INTERVAL seconds and then reruns the
+    script, so widget interactions are never held up; job_key (the job_button
+    that started the job) keeps that button pressed until the job finishes.
+    Returns an error message, or None once the result is in the notes store.
+    """
+    job_key = job_key or f"{kind}_{article_id_for(article)}"
+    queued = st.session_state.queued_jobs.get(job_key)
+    if queued is None:
+        queued = {'id': enqueue_job(kind, article, mode=notes_mode, content=article_content), 'since': time.time()}
+        st.session_state.queued_jobs[job_key] = queued
+
+    job = wait_for_job(queued['id'], timeout=JOB_RERUN_INTERVAL, on_progress=on_progress)
+    if job and job['status'] not in FINISHED_STATUSES and time.time() - queued['since'] < JOB_WAIT_TIMEOUT:
+        st.rerun()
+    del st.session_state.queued_jobs[job_key]
+
+    if not job:
+        return "Job disappeared from the queue"
+    if job['status'] == 'failed':
+        return job['error'] or "Job failed"
+    if job['status'] != 'done':
+        return "Still waiting for a worker - is `python job_queue.py` running?"
+    return None
+
+def load_or_generate_quiz(article, job_key=None):
+    """
+    Return the stored quiz for an article, generating and storing it when there is none
+    """
+    # Quizzes precomputed by the scheduler are served from the notes store
+    quiz_id = article_id_for(article)
+    quiz = get_quiz(quiz_id)
+    if USE_JOB_QUEUE and (not quiz or job_key in st.session_state.queued_jobs):
+        quiz_error = run_queued_job('quiz', article, job_key=job_key)
+        if quiz_error:
+            st.error(f"Error generating quiz: {quiz_error}")
+        quiz = get_quiz(quiz_id)
+    elif not quiz:
+        quiz = generate_quiz(article['title'], article['description'])
+        if quiz:
+            save_quiz(article, quiz, article_id=quiz_id)
+    return quiz
+
+# LLM response cache counters (shared by all sessions of this process)
+with st.sidebar.expander("LLM Cache"):
+    llm_stats = cache_stats()
+    st.write(f"Hits: {llm_stats['hits']} | Misses: {llm_stats['misses']} | Hit rate: {llm_stats['hit_rate']:.0%}")
+    st.write(f"Writes: {llm_stats['writes']} | Evictions: {llm_stats['evictions']}")
+    notes_stream_stats = stream_stats()
+    if notes_stream_stats['runs']:
+        st.write(f"Streamed runs: {notes_stream_stats['runs']} | Avg first token: {notes_stream_stats['avg_first_token_seconds']:.1f}s | Avg total: {notes_stream_stats['avg_total_seconds']:.1f}s")
+
+with st.sidebar.expander("News Cache"):
+    news_stats = news_cache_stats()
+    st.write(f"Hits: {news_stats['hits']} | Stale: {news_stats['stale_hits']} | Misses: {news_stats['misses']}")
+    st.write(f"Background refreshes: {news_stats['refreshes']} | Entries: {news_stats['entries']}")
+
+with st.sidebar.expander("HTML Cache"):
+    page_stats = html_cache_stats()
+    st.write(f"Hits: {page_stats['hits']} | Revalidated (304): {page_stats['revalidated']} | Downloads: {page_stats['misses']}")
+    st.write(f"Saved: {page_stats['bytes_saved'] / 1024:.0f} KB | Downloaded: {page_stats['bytes_downloaded'] / 1024:.0f} KB")
+
+with st.sidebar.expander("Rate Limits"):
+    for limiter_name, limits in sorted(limiter_stats().items()):
+        st.write(f"**{limiter_name}**: {limits['in_flight']}/{limits['limit']} slots in use (max {limits['max_concurrency']}), {limits['waiting']} queued")
+        st.write(f"Calls: {limits['calls']} | 429s: {limits['throttled']} | Avg wait: {limits['avg_wait']:.1f}s | Utilisation: {limits['average_utilisation']:.0%}")
+
+with st.sidebar.expander("HTTP Connections"):
+    for host, host_stats in sorted(http_client.connection_stats().items()):
+        st.write(f"{host}: {host_stats['requests']} requests on {host_stats['connections']} connections ({host_stats['reused']} reused)")
+
+if USE_JOB_QUEUE:
+    with st.sidebar.expander("Job Queue"):
+        job_stats = queue_stats()
+        st.write(f"Queued: {job_stats['queued']} | Running: {job_stats['running']}")
+        st.write(f"Done: {job_stats['done']} | Failed: {job_stats['failed']}")
+
+with st.sidebar.expander("Deduplication"):
+    duplicate_stats = dedup_stats()
+    st.write(f"Articles: {duplicate_stats['articles']} | Clusters: {duplicate_stats['clusters']}")
+    st.write(f"Near-duplicates sharing notes: {duplicate_stats['duplicates']} ({duplicate_stats['duplicate_rate']:.0%})")
+
+with st.sidebar.expander("Extraction Rules"):
+    for rule, stats in sorted(rule_stats().items()):
+        st.write(f"{rule}: {stats['hits']}/{stats['lookups']} hits ({stats['hit_rate']:.0%})")
+checkpoint('sidebar')
+
 # Main content area
 col1, col2 = st.columns([2, 1])
 
@@ -323,18 +521,13 @@ with col1:
         max_value=today
     )
     
-    # Update session state with new date range
+    # Update session state with new date range (a new range starts at its first page)
+    if date_range != st.session_state.date_range:
+        reset_page('current_affairs')
     st.session_state.date_range = date_range
 
     # Define UPSC-relevant sources and domains
-    upsc_sources = [
-        'the-hindu',
-        'the-times-of-india',
-        'the-indian-express',
-        'the-wire',
-        'scroll-in',
-        'the-quint'
-    ]
+    upsc_sources = UPSC_SOURCES
     
     # Fetch news
     try:
@@ -344,128 +537,146 @@ with col1:
             
             st.write(f"Fetching news from {from_date} to {to_date}")
             
-            # First try using the newsapi client
-            try:
-                news = newsapi.get_everything(
-                    sources=','.join(upsc_sources),
-                    from_param=from_date,
-                    to=to_date,
-                    language='en',
-                    sort_by='publishedAt',
-                    page_size=10
-                )
-            except Exception as e:
-                st.warning(f"Error with newsapi client: {str(e)}")
-                # Fall back to using fetch_news function with requests
-                articles = fetch_news("UPSC", from_date, to_date)
-                if articles:
-                    news = {"status": "ok", "totalResults": len(articles), "articles": articles}
-                else:
-                    news = {"status": "error", "totalResults": 0, "articles": []}
+            # Every source is paged through concurrently and merged newest first
+            # (pages are served from the shared news cache on reruns); articles
+            # render as soon as the first page of each source has arrived
+            fetch_errors = []
+            news_articles = iter_articles(
+                [{'sources': source} for source in upsc_sources],
+                from_date, to_date, NEWS_API_KEY, errors=fetch_errors
+            )
 
             # Display news articles
             st.header("Current Affairs")
             
-            if news['status'] == 'ok' and news['totalResults'] > 0:
-                for article in news['articles']:
-                    # Create a container for each article
-                    article_container = st.container()
+            # Only the current page is rendered; earlier articles are skipped
+            # and one article past the page tells whether there is a next one
+            page_start, page_end = page_range('current_affairs')
+            position = 0
+            shown = 0
+            has_next = False
+            for article in timed_iter(news_articles, 'current_affairs_fetch'):
+                if not is_valid_article(article):
+                    continue
+                position += 1
+                if position <= page_start:
+                    continue
+                if position > page_end:
+                    has_next = True
+                    break
+                shown += 1
+                # Create a container for each article
+                article_container = st.container()
+                
+                with article_container:
+                    # Article header with title and link
+                    st.markdown(f"""
+                    <div style="display: flex; align-items: center; gap: 10px; margin-bottom: 10px;">
+                        <h3>{article['title']}</h3>
+                        <a href="{article['url']}" target="_blank" style="text-decoration: none;">
+                            <span style="font-size: 20px;">🔗</span>
+                        </a>
+                    </div>
+                    """, unsafe_allow_html=True)
                     
-                    with article_container:
-                        # Article header with title and link
-                        st.markdown(f"""
-                        <div style="display: flex; align-items: center; gap: 10px; margin-bottom: 10px;">
-                            <h3>{article['title']}</h3>
-                            <a href="{article['url']}" target="_blank" style="text-decoration: none;">
-                                <span style="font-size: 20px;">🔗</span>
-                            </a>
-                        </div>
-                        """, unsafe_allow_html=True)
+                    # Article content in an expander
+                    with st.expander("View Article Details"):
+                        # Article content
+                        st.write(article['description'])
+                        st.write(f"Source: {article['source']['name']}")
+                        st.write(f"Published: {article['publishedAt']}")
                         
-                        # Article content in an expander
-                        with st.expander("View Article Details"):
-                            # Article content
-                            st.write(article['description'])
-                            st.write(f"Source: {article['source']['name']}")
-                            st.write(f"Published: {article['publishedAt']}")
-                            
-                            # Note taking and Quiz section
-                            st.subheader("UPSC Notes & Quiz")
-                            
-                            # Create two columns for buttons
-                            button_col1, button_col2 = st.columns(2)
-                            
-                            with button_col1:
-                                if st.button("Generate UPSC Notes", key=f"generate_{article['title']}"):
-                                    with st.spinner("Generating UPSC notes..."):
-                                        try:
-                                            notes = generate_upsc_notes(article['title'], article['description'])
-                                            if notes:
-                                                st.session_state.notes[article['title']] = notes
-                                                st.success("Notes generated successfully!")
-                                                
-                                                # Display the generated notes
-                                                st.markdown(notes)
-                                                
-                                                # Add a divider between articles
-                                                st.markdown("---")
-                                        except Exception as e:
-                                            st.error(f"Error generating notes: {str(e)}")
-                                            st.info("Please check your Gemini API key configuration")
-                            
-                            with button_col2:
-                                if st.button("Generate Quiz", key=f"quiz_{article['title']}"):
-                                    with st.spinner("Generating quiz..."):
-                                        try:
-                                            quiz = generate_quiz(article)
-                                            if quiz:
-                                                st.session_state.quiz = quiz
-                                                st.session_state.quiz_title = article['title']
-                                                st.session_state.quiz_description = article['description']
-                                                st.success("Quiz generated successfully!")
-                                                
-                                                # Add a link to view the quiz
-                                                st.markdown(f"""
-                                                <div style="text-align: center; margin: 10px 0;">
-                                                    <a href="/quiz" target="_blank" style="
-                                                        display: inline-block;
-                                                        padding: 10px 20px;
-                                                        background-color: #4CAF50;
-                                                        color: white;
-                                                        text-decoration: none;
-                                                        border-radius: 5px;
-                                                        font-weight: bold;
-                                                    ">
-                                                        Take the Quiz 📝
-                                                    </a>
-                                                </div>
-                                                """, unsafe_allow_html=True)
-                                            else:
-                                                st.error("Failed to generate quiz. Please try again.")
-                                        except Exception as e:
-                                            st.error(f"Error generating quiz: {str(e)}")
-                                            st.info("Please check your Gemini API key configuration")
+                        # Note taking and Quiz section
+                        st.subheader("UPSC Notes & Quiz")
                         
-                        # Add a divider between articles
-                        st.markdown("---")
-            else:
+                        # Create two columns for buttons
+                        button_col1, button_col2 = st.columns(2)
+                        
+                        with button_col1:
+                            if job_button("Generate UPSC Notes", f"generate_{article_id_for(article)}"):
+                                with st.spinner("Generating UPSC notes..."):
+                                    try:
+                                        # Generate (or load) and display the notes from the full article, fetched only when nothing is stored
+                                        notes = render_upsc_notes(article, job_key=f"generate_{article_id_for(article)}")
+                                        if notes:
+                                            st.success("Notes generated successfully!")
+                                            
+                                            # Add a divider between articles
+                                            st.markdown("---")
+                                        else:
+                                            st.error("Failed to fetch article content. Please try again.")
+                                    except Exception as e:
+                                        st.error(f"Error generating notes: {str(e)}")
+                                        st.info("Please check your Gemini API key configuration")
+                        
+                        with button_col2:
+                            if job_button("Generate Quiz", f"quiz_{article_id_for(article)}"):
+                                with st.spinner("Generating quiz..."):
+                                    try:
+                                        quiz = load_or_generate_quiz(article, job_key=f"quiz_{article_id_for(article)}")
+                                        if quiz:
+                                            st.session_state.quiz[article['title']] = quiz
+                                            st.session_state.quiz_title = article['title']
+                                            st.session_state.quiz_description = article['description']
+                                            st.session_state.quiz_article_id = article_id_for(article)
+                                            st.success("Quiz generated successfully!")
+                                            
+                                            # Add a link to view the quiz
+                                            st.markdown(f"""
+                                            <div style="text-align: center; margin: 10px 0;">
+                                                <a href="/quiz?article={quote(st.session_state.quiz_article_id)}" target="_blank" style="
+                                                    display: inline-block;
+                                                    padding: 10px 20px;
+                                                    background-color: #4CAF50;
+                                                    color: white;
+                                                    text-decoration: none;
+                                                    border-radius: 5px;
+                                                    font-weight: bold;
+                                                ">
+                                                    Take the Quiz 📝
+                                                </a>
+                                            </div>
+                                            """, unsafe_allow_html=True)
+                                        else:
+                                            st.error("Failed to generate quiz. Please try again.")
+                                    except Exception as e:
+                                        st.error(f"Error generating quiz: {str(e)}")
+                                        st.info("Please check your Gemini API key configuration")
+                    
+                    # Add a divider between articles
+                    st.markdown("---")
+            news_articles.close()
+
+            for error in fetch_errors:
+                st.warning(f"Some news pages could not be fetched: {error}")
+            if not position:
                 st.info("No articles found for the selected criteria. Try adjusting the date range or search terms.")
+            elif not shown:
+                # The list got shorter than the page we were on
+                reset_page('current_affairs')
+                st.rerun()
+            page_controls('current_affairs', has_next=has_next)
         else:
             st.error("Please select both start and end dates")
 
     except Exception as e:
         st.error(f"Error fetching news: {str(e)}")
         st.info("Please check your News API key configuration")
+checkpoint('current_affairs')
 
 with col2:
     # Saved Notes Section
     st.markdown('<h2 class="section-header">📝 Saved Notes</h2>', unsafe_allow_html=True)
-    if st.session_state.saved_notes:
-        for title, notes in st.session_state.saved_notes.items():
-            with st.expander(title):
-                st.text_area("", notes, height=200, key=f"saved_{title}")
+    saved_total = count_notes(saved=True)
+    if saved_total:
+        saved_start, saved_end = page_range('saved_notes', total=saved_total)
+        for note in list_notes(saved=True, limit=saved_end - saved_start, offset=saved_start):
+            with st.expander(note['title']):
+                st.text_area("", note['content'], height=200, key=f"saved_{note['article_id']}")
+        page_controls('saved_notes', total=saved_total)
     else:
         st.info("📚 No saved notes yet. Generate notes from news articles to save them here!")
+checkpoint('saved_notes')
 
 # Footer
 st.markdown("""
@@ -482,66 +693,20 @@ def fetch_news(query, from_date, to_date):
             st.error("NEWS_API_KEY is missing or empty")
             return []
             
-        params = {
-            'q': query,
-            'from': from_date,
-            'to': to_date,
-            'sortBy': 'relevancy',
-            'language': 'en',
-            'apiKey': NEWS_API_KEY
-        }
-        
+        # Pages of results are fetched concurrently instead of only the first one
         st.write("Sending request to News API...")
-        response = requests.get(NEWS_API_URL, params=params)
+        fetch_errors = []
+        articles = fetch_articles([{'q': query}], from_date, to_date, NEWS_API_KEY, errors=fetch_errors)
+        for error in fetch_errors:
+            st.error(f"API request failed: {error}")
         
-        if response.status_code != 200:
-            st.error(f"API returned status code {response.status_code}: {response.text}")
-            return []
-            
-        st.write("Parsing JSON response...")
-        try:
-            data = response.json()
-        except Exception as json_err:
-            st.error(f"Failed to parse JSON response: {str(json_err)}")
-            st.write(f"Response text: {response.text[:200]}...")  # Show beginning of response
-            return []
-        
-        if not data:
-            st.error("API returned empty response")
-            return []
-            
-        if 'status' not in data:
-            st.error("API response missing 'status' field")
-            st.write(f"Response keys: {list(data.keys())}")
-            return []
-            
-        if data['status'] != 'ok':
-            st.error(f"API returned error status: {data.get('status')} - {data.get('message', 'No message')}")
-            return []
-            
-        if 'articles' not in data:
-            st.error("API response missing 'articles' field")
-            st.write(f"Response keys: {list(data.keys())}")
-            return []
-        
-        if not data['articles']:
+        if not articles:
             st.warning("API returned empty articles list")
             return []
         
         # Filter out articles with None values in critical fields
-        valid_articles = []
-        invalid_count = 0
-        
-        for article in data['articles']:
-            if (article.get('title') and 
-                article.get('description') and 
-                article.get('source') and 
-                isinstance(article.get('source'), dict) and
-                article.get('source', {}).get('name') and
-                article.get('publishedAt')):
-                valid_articles.append(article)
-            else:
-                invalid_count += 1
+        valid_articles = [article for article in articles if is_valid_article(article)]
+        invalid_count = len(articles) - len(valid_articles)
         
         if invalid_count > 0:
             st.warning(f"Filtered out {invalid_count} invalid articles with missing fields")
@@ -553,163 +718,12 @@ def fetch_news(query, from_date, to_date):
             st.error("No valid articles found (missing critical data in responses)")
             return []
             
-    except requests.exceptions.RequestException as e:
-        st.error(f"Request error fetching news: {str(e)}")
-        return []
-    except json.JSONDecodeError as je:
-        st.error(f"JSON parsing error: {str(je)}")
-        return []
     except Exception as e:
         st.error(f"Unexpected error fetching news: {str(e)}")
         import traceback
         st.code(traceback.format_exc())
         return []
 
-def parse_quiz_content(quiz_text):
-    if not quiz_text:
-        st.error("No quiz content to parse")
-        return []
-        
-    questions = []
-    current_question = None
-    current_options = []
-    
-    try:
-        lines = quiz_text.split('\n')
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-                
-            if line.startswith('## Question'):
-                if current_question:
-                    questions.append({
-                        'question': current_question,
-                        'options': current_options
-                    })
-                current_question = line.replace('## Question', '').strip()
-                current_options = []
-            elif line.startswith(('A)', 'B)', 'C)', 'D)')):
-                current_options.append(line.strip())
-        
-        if current_question:
-            questions.append({
-                'question': current_question,
-                'options': current_options
-            })
-        
-        return questions
-    except Exception as e:
-        st.error(f"Error parsing quiz content: {str(e)}")
-        return []
-
-def extract_answer(quiz_text):
-    if not quiz_text:
-        st.error("No quiz content to extract answers from")
-        return {}
-        
-    answers = {}
-    current_question = None
-    
-    try:
-        lines = quiz_text.split('\n')
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-                
-            if line.startswith('## Question'):
-                current_question = line.replace('## Question', '').strip()
-            elif line.startswith('**Answer:**'):
-                if current_question:
-                    answers[current_question] = line.replace('**Answer:**', '').strip()
-        
-        return answers
-    except Exception as e:
-        st.error(f"Error extracting answers: {str(e)}")
-        return {}
-
-def fetch_article_content(url):
-    """
-    Fetch the full content of an article from a URL.
-    
-    Args:
-        url (str): The URL of the article
-        
-    Returns:
-        str: The full content of the article
-    """
-    try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Extract article content
-        article_content = ""
-        
-        # Try multiple approaches to extract content
-        content_found = False
-        
-        # Approach 1: Look for common article content containers
-        article_containers = soup.find_all(['article', 'div', 'section'], class_=re.compile(r'article|content|story|main|body|text'))
-        for container in article_containers:
-            # Get all text elements
-            paragraphs = container.find_all(['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
-            if paragraphs:
-                for p in paragraphs:
-                    text = p.get_text().strip()
-                    if text and len(text) > 20:  # Only include substantial paragraphs
-                        article_content += text + "\n\n"
-                content_found = True
-        
-        # Approach 2: If no content found, try getting all paragraphs
-        if not content_found:
-            paragraphs = soup.find_all('p')
-            for p in paragraphs:
-                text = p.get_text().strip()
-                if text and len(text) > 20:  # Only include substantial paragraphs
-                    article_content += text + "\n\n"
-            content_found = bool(article_content)
-        
-        # Approach 3: If still no content, try getting the main content area
-        if not content_found:
-            main_content = soup.find('main') or soup.find('div', role='main')
-            if main_content:
-                article_content = main_content.get_text(separator='\n\n', strip=True)
-                content_found = True
-        
-        # Approach 4: Last resort - get all text but clean it up
-        if not content_found:
-            # Remove script and style elements
-            for script in soup(['script', 'style', 'nav', 'header', 'footer']):
-                script.decompose()
-            
-            # Get text and clean it up
-            article_content = soup.get_text(separator='\n\n', strip=True)
-            
-            # Remove excessive whitespace and empty lines
-            article_content = re.sub(r'\n\s*\n', '\n\n', article_content)
-            article_content = re.sub(r'\s+', ' ', article_content)
-            
-            # Split into paragraphs and filter out short ones
-            paragraphs = [p.strip() for p in article_content.split('\n\n') if len(p.strip()) > 20]
-            article_content = '\n\n'.join(paragraphs)
-        
-        # Clean up the content
-        article_content = re.sub(r'\n\s*\n', '\n\n', article_content)  # Remove excessive newlines
-        article_content = re.sub(r'\s+', ' ', article_content)  # Normalize whitespace
-        article_content = article_content.strip()
-        
-        return article_content
-        
-    except Exception as e:
-        st.error(f"Error fetching article content: {str(e)}")
-        return None
-
 # Add a section for manual article input
 st.sidebar.markdown("---")
 st.sidebar.subheader("Manual Article Input")
@@ -733,15 +747,10 @@ if st.sidebar.button("Fetch Article"):
             
             # Add Generate Notes button
             if st.button("Generate UPSC Notes"):
-                with st.spinner("Fetching article content..."):
-                    article_content = fetch_article_content(article_url)
-                    if article_content:
-                        with st.spinner("Generating UPSC notes..."):
-                            notes = generate_upsc_notes("Article from URL", article_content)
-                            if notes:
-                                st.session_state.notes[article_url] = notes
-                                st.success("Notes generated successfully!")
-                                st.markdown(notes)
+                with st.spinner("Generating UPSC notes..."):
+                    notes = render_upsc_notes({'title': "Article from URL", 'url': article_url})
+                    if notes:
+                        st.success("Notes generated successfully!")
                     else:
                         st.error("Failed to fetch article content. Please try again or enter the content manually.")
         else:
@@ -770,11 +779,11 @@ if st.sidebar.button("Use Manual Input"):
     # Add Generate Notes button
     if st.button("Generate UPSC Notes"):
         with st.spinner("Generating UPSC notes..."):
-            notes = generate_upsc_notes(manual_title, manual_content)
+            notes = render_upsc_notes(st.session_state.manual_article, manual_content)
             if notes:
-                st.session_state.notes[manual_title] = notes
                 st.success("Notes generated successfully!")
-                st.markdown(notes)
+
+checkpoint('manual_input')
 
 # Title
 st.markdown('<h1 class="main-title">📰 UPSC News Analyzer</h1>', unsafe_allow_html=True)
@@ -801,15 +810,128 @@ with st.sidebar:
             articles = fetch_news(query, from_date.strftime('%Y-%m-%d'), to_date.strftime('%Y-%m-%d'))
             if articles:
                 st.session_state.articles = articles
+                reset_page('search_results')
                 st.success(f"✨ Found {len(articles)} articles!")
             else:
                 st.warning("❌ No articles found. Try different search criteria.")
 
+# Batch notes generation for every listed article
+with st.sidebar:
+    st.markdown("---")
+    st.subheader("Batch Notes")
+    batch_articles = unique_articles(st.session_state.articles, st.session_state.get('news_articles'))
+    batch_running = st.session_state.batch_jobs is not None
+    if batch_running:
+        # Keep reporting on the batch that was queued, even if the listed articles changed since
+        batch_articles = st.session_state.batch_jobs['articles']
+    batch_concurrency = st.slider("Articles processed in parallel", 1, 16, BATCH_CONCURRENCY, key="batch_concurrency")
+    run_batch = st.button(
+        f"📚 Generate notes for all listed articles ({len(batch_articles)})",
+        disabled=not batch_articles or batch_running
+    ) or batch_running
+
+def wait_for_batch_jobs(articles):
+    """
+    Queue a notes job per cluster of near-duplicate articles and yield
+    (index, article, None, error) for each article whose job has finished.
+    Clusters that already have notes count as done and active jobs are
+    reused; the other members of a cluster are linked to its notes once they
+    exist. Like run_queued_job, each rerun waits at most JOB_RERUN_INTERVAL
+    seconds and then reruns the script; the job ids stay in
+    st.session_state.batch_jobs until every job finishes or JOB_WAIT_TIMEOUT passes.
+    """
+    batch = st.session_state.batch_jobs
+    if batch is None:
+        article_ids = [article_id_for(article) for article in articles]
+        with_notes = notes_available(article_ids)
+        stored = {index for index, article_id in enumerate(article_ids) if article_id in with_notes}
+        # Clustered on the NewsAPI title + description: fetching the article text is left to the workers
+        clusters = cluster_articles(articles) if DEDUP_ENABLED else [[index] for index in range(len(articles))]
+        batch = {'articles': articles, 'clusters': {}, 'jobs': {}, 'linked': set(), 'since': time.time()}
+        for members in clusters:
+            representative = choose_representative(members, stored)
+            batch['clusters'][representative] = members
+            if representative not in stored:
+                batch['jobs'][enqueue_job('notes', articles[representative], mode=notes_mode)] = representative
+        st.session_state.batch_jobs = batch
+
+    articles = batch['articles']
+    job_ids = batch['jobs']
+    deadline = time.monotonic() + JOB_RERUN_INTERVAL
+    while True:
+        jobs = get_jobs(list(job_ids))
+        pending = [job_id for job_id in job_ids if job_id in jobs and jobs[job_id]['status'] not in FINISHED_STATUSES]
+        if not pending or time.monotonic() >= deadline:
+            break
+        time.sleep(JOB_POLL_INTERVAL)
+
+    timed_out = time.time() - batch['since'] >= JOB_WAIT_TIMEOUT
+    errors = {}
+    waiting = set()
+    for job_id, representative in job_ids.items():
+        job = jobs.get(job_id)
+        if not job:
+            errors[representative] = "Job disappeared from the queue"
+        elif job['status'] == 'failed':
+            errors[representative] = job['error'] or "Job failed"
+        elif job['status'] != 'done':
+            if timed_out:
+                errors[representative] = "Still waiting for a worker - is `python job_queue.py` running?"
+            else:
+                waiting.add(representative)
+
+    for representative, members in batch['clusters'].items():
+        if representative in waiting:
+            continue
+        if representative in errors:
+            for index in members:
+                yield index, articles[index], None, errors[representative]
+            continue
+        if representative not in batch['linked']:
+            for index in members:
+                if index != representative:
+                    link_alias(article_id_for(articles[index]), article_id_for(articles[representative]))
+            batch['linked'].add(representative)
+        for index in members:
+            yield index, articles[index], None, None
+
+    if pending and not timed_out:
+        st.rerun()
+    st.session_state.batch_jobs = None
+
+if run_batch:
+    st.markdown('<h2 class="section-header">📚 Batch Notes Generation</h2>', unsafe_allow_html=True)
+    batch_progress = st.progress(0.0)
+    batch_status = st.empty()
+    completed = 0
+    failed = 0
+    if USE_JOB_QUEUE:
+        batch_results = wait_for_batch_jobs(batch_articles)
+    else:
+        batch_results = generate_notes_batch(batch_articles, max_workers=batch_concurrency, mode=notes_mode)
+    for index, article, notes, error in batch_results:
+        completed += 1
+        if error:
+            failed += 1
+            st.write(f"❌ {article['title']}: {error}")
+        else:
+            st.write(f"✅ {article['title']}")
+        batch_progress.progress(completed / len(batch_articles))
+        batch_status.write(f"Processed {completed}/{len(batch_articles)} articles ({failed} failed)")
+    st.success(f"Batch complete: {completed - failed} of {len(batch_articles)} articles have notes.")
+checkpoint('search_and_batch')
+
 # Main content area
 if st.session_state.articles:
     st.markdown('<h2 class="section-header">📰 Latest News Articles</h2>', unsafe_allow_html=True)
-    
-    for i, article in enumerate(st.session_state.articles):
+
+    # Widgets are only built for the visible page; notes bodies load when opened
+    page_start, page_articles = paginate(st.session_state.articles, 'search_results')
+    st.caption(f"Articles {page_start + 1}-{page_start + len(page_articles)} of {len(st.session_state.articles)}")
+    with_notes = notes_available(article_id_for(article) for article in page_articles)
+
+    for i, article in enumerate(page_articles, page_start):
+        article_id = article_id_for(article)
         with st.container():
             st.markdown(f"""
             <div class="article-container">
@@ -821,103 +943,71 @@ if st.session_state.articles:
             </div>
             """, unsafe_allow_html=True)
             
-            # Generate notes button with icon
-            if st.button(f"📝 Generate UPSC Notes", key=f"notes_{i}"):
+            # Generate notes button with icon (the article is only fetched when no stored notes exist)
+            if job_button(f"📝 Generate UPSC Notes", f"search_notes_{article_id}"):
                 with st.spinner("📚 Generating notes..."):
-                    article_content = fetch_article_content(article['url'])
-                    if article_content:
-                        with st.spinner("✨ Creating UPSC notes..."):
-                            notes = generate_upsc_notes(article['title'], article_content)
-                            if notes:
-                                st.session_state.notes[article['title']] = notes
-                                st.success("✅ Notes generated successfully!")
-                                st.markdown(f"""
-                                <div class="notes-container">
-                                    {notes}
-                                </div>
-                                """, unsafe_allow_html=True)
+                    notes = render_upsc_notes(article, html_container="notes-container", job_key=f"search_notes_{article_id}")
+                    if notes:
+                        st.success("✅ Notes generated successfully!")
                     else:
                         st.error("❌ Failed to fetch article content. Please try again.")
-            
-            # Display notes if available
-            if i in st.session_state.notes:
-                st.markdown(f"""
-                <div class="notes-container">
-                    {st.session_state.notes[i]}
-                </div>
-                """, unsafe_allow_html=True)
+            else:
+                show_stored_notes(article_id, article_id in with_notes, f"search_show_notes_{article_id}", "notes-container")
             
             # Generate quiz button with icon
-            if st.button(f"❓ Generate Quiz", key=f"quiz_{i}"):
+            if job_button(f"❓ Generate Quiz", f"search_quiz_{article_id}"):
                 with st.spinner("🎯 Generating quiz..."):
-                    quiz = generate_quiz(article['title'], article['description'])
+                    quiz = load_or_generate_quiz(article, job_key=f"search_quiz_{article_id}")
                     if quiz:
                         st.session_state.quiz[article['title']] = quiz
                         st.success("✅ Quiz generated successfully!")
-                        
-                        # Parse quiz content
-                        questions = []
-                        answers = {}
-                        current_question = None
-                        
-                        for line in quiz.split('\n'):
-                            line = line.strip()
-                            if line.startswith('Q'):
-                                current_question = line
-                                questions.append({'question': current_question})
-                            elif line.startswith(('a)', 'b)', 'c)', 'd)')):
-                                if current_question:
-                                    if current_question not in answers:
-                                        answers[current_question] = []
-                                    answers[current_question].append(line)
-                            elif line.startswith('Answer:'):
-                                if current_question:
-                                    answers[current_question] = line.replace('Answer:', '').strip()
-                        
-                        # Display quiz with styling
-                        st.markdown(f"""
-                        <div class="quiz-container">
-                            <h3>📝 Quiz on {article['title']}</h3>
-                        """, unsafe_allow_html=True)
-                        
-                        for j, q in enumerate(questions, 1):
-                            st.markdown(f"**Q{j}:** {q['question']}")
-                            if isinstance(answers.get(q['question']), list):
-                                options = answers[q['question']]
-                                selected = st.radio(
-                                    "Select your answer:",
-                                    options,
-                                    key=f"q_{i}_{j}",
-                                    label_visibility="collapsed"
-                                )
-                        
-                        # Submit button with icon
-                        if st.button("📤 Submit Quiz", key=f"submit_{i}"):
-                            score = 0
-                            total = len(questions)
-                            
-                            for j, q in enumerate(questions, 1):
-                                selected = st.session_state.quiz_answers.get(f"q_{i}_{j}")
-                                correct = answers.get(q['question'])
-                                if selected and correct and selected.startswith(correct):
-                                    score += 1
-                            
-                            st.markdown(f"""
-                            <div class="results-container">
-                                <h2>🎯 Quiz Results</h2>
-                                <h3>Score: {score}/{total}</h3>
-                                <p style="font-size: 1.2em;">Percentage: {(score/total)*100:.1f}%</p>
-                            </div>
-                            """, unsafe_allow_html=True)
-                            
-                            if score == total:
-                                st.balloons()
                     else:
                         st.error("❌ Failed to generate quiz. Please try again.")
+
+            # The quiz stays on screen across reruns so that it can be answered and submitted
+            # (parsing is cached per quiz text)
+            questions = parse_quiz(st.session_state.quiz.get(article['title']))
+            if article['title'] in st.session_state.quiz and not questions:
+                st.warning("No questions could be read from this quiz.")
+            elif questions:
+                # Display quiz with styling
+                st.markdown(f"""
+                <div class="quiz-container">
+                    <h3>📝 Quiz on {article['title']}</h3>
+                """, unsafe_allow_html=True)
+
+                for j, q in enumerate(questions, 1):
+                    st.markdown(f"**Q{j}:** {q['text']}")
+                    st.radio(
+                        "Select your answer:",
+                        q['options'],
+                        index=None,
+                        key=f"q_{i}_{j}",
+                        label_visibility="collapsed"
+                    )
+
+                # Submit button with icon
+                if st.button("📤 Submit Quiz", key=f"submit_{i}"):
+                    score = sum(1 for j, q in enumerate(questions, 1) if is_correct(st.session_state.get(f"q_{i}_{j}"), q))
+                    total = len(questions)
+
+                    st.markdown(f"""
+                    <div class="results-container">
+                        <h2>🎯 Quiz Results</h2>
+                        <h3>Score: {score}/{total}</h3>
+                        <p style="font-size: 1.2em;">Percentage: {(score/total)*100:.1f}%</p>
+                    </div>
+                    """, unsafe_allow_html=True)
+
+                    if score == total:
+                        st.balloons()
             
             st.markdown("---")
+
+    page_controls('search_results', total=len(st.session_state.articles))
 else:
     st.info("👈 Use the sidebar to search for news articles.")
+checkpoint('search_results')
 
 # Add a section for specific news sources and date
 st.sidebar.markdown("---")
@@ -936,16 +1026,18 @@ if st.sidebar.button("🔍 Fetch News"):
         else:  # The Indian Express
             query = "source:indianexpress.com"
         
-        # Fetch news from News API using the same date for both from and to parameters
-        news_url = f"https://newsapi.org/v2/everything?q={query}&from={formatted_date}&to={formatted_date}&sortBy=publishedAt&apiKey={NEWS_API_KEY}&language=en"
-        response = requests.get(news_url)
-        news_data = response.json()
+        # Fetch every page of the day's news using the same date for both from and to parameters
+        fetch_errors = []
+        source_articles = fetch_articles([{'q': query}], formatted_date, formatted_date, NEWS_API_KEY, errors=fetch_errors)
+        for error in fetch_errors:
+            st.warning(f"Some news pages could not be fetched: {error}")
         
-        if news_data["status"] == "ok" and news_data["totalResults"] > 0:
-            st.session_state.news_articles = news_data["articles"]
+        if source_articles:
+            st.session_state.news_articles = source_articles
+            reset_page('news_sources')
             st.session_state.news_date = news_date
             st.session_state.news_source = news_source
-            st.success(f"Found {len(news_data['articles'])} articles from {news_source} for {news_date.strftime('%d %B %Y')}")
+            st.success(f"Found {len(source_articles)} articles from {news_source} for {news_date.strftime('%d %B %Y')}")
         else:
             st.error(f"No articles found from {news_source} for {news_date.strftime('%d %B %Y')}")
 
@@ -953,7 +1045,12 @@ if st.sidebar.button("🔍 Fetch News"):
 if "news_articles" in st.session_state and st.session_state.news_articles:
     st.markdown(f"## {st.session_state.news_source} News for {st.session_state.news_date.strftime('%d %B %Y')}")
     
-    for i, article in enumerate(st.session_state.news_articles):
+    # Only the visible page is rendered (images included); notes bodies load when opened
+    page_start, page_articles = paginate(st.session_state.news_articles, 'news_sources')
+    with_notes = notes_available(article_id_for(article) for article in page_articles)
+
+    for i, article in enumerate(page_articles, page_start):
+        article_id = article_id_for(article)
         with st.expander(f"{i+1}. {article['title']}", expanded=False):
             st.markdown(f"**Source:** {article['source']['name']}")
             st.markdown(f"**Published:** {article['publishedAt']}")
@@ -970,20 +1067,18 @@ if "news_articles" in st.session_state and st.session_state.news_articles:
             st.markdown(f"[Read full article]({article['url']})")
             
             # Generate notes button
-            if st.button(f"Generate UPSC Notes", key=f"notes_{i}"):
-                with st.spinner("Fetching article content..."):
-                    article_content = fetch_article_content(article['url'])
-                    if article_content:
-                        with st.spinner("Generating UPSC notes..."):
-                            notes = generate_upsc_notes(article['title'], article_content)
-                            if notes:
-                                st.session_state.notes[article['title']] = notes
-                                st.success("Notes generated successfully!")
-                                st.markdown(notes)
+            if job_button(f"Generate UPSC Notes", f"source_notes_{article_id}"):
+                with st.spinner("Generating UPSC notes..."):
+                    notes = render_upsc_notes(article, job_key=f"source_notes_{article_id}")
+                    if notes:
+                        st.success("Notes generated successfully!")
                     else:
                         st.error("Failed to fetch article content. Please try again.")
-            
-            # Display notes if available
-            if article['title'] in st.session_state.notes:
-                st.markdown("### Generated UPSC Notes")
-                st.markdown(st.session_state.notes[article['title']], unsafe_allow_html=True) 
\ No newline at end of file
+            else:
+                show_stored_notes(article_id, article_id in with_notes, f"source_show_notes_{article_id}")
+
+    page_controls('news_sources', total=len(st.session_state.news_articles))
+
+checkpoint('news_sources')
+
+finish_rerun()
@@ -0,0 +1,181 @@
+import streamlit as st
+import re
+from html_cache import fetch_html
+from html_parsers import make_soup
+from extraction_rules import select_body_nodes, select_generic_node
+
+# Precompiled patterns shared by every extraction
+CONTAINER_CLASS_RE = re.compile(r'article|content|story|main|body|text')
+# Containers that match CONTAINER_CLASS_RE but hold links to other stories
+RELATED_CLASS_RE = re.compile(r'related|recommend|trending|also-read|more-stories|story-list')
+WHITESPACE_RE = re.compile(r'\s+')
+TEXT_TAGS = ['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6']
+MIN_BLOCK_LENGTH = 20  # Only include substantial paragraphs
+
+def outermost(elements):
+    """
+    Drop elements nested inside another element of the same list
+    """
+    ids = {id(element) for element in elements}
+    return [
+        element for element in elements
+        if not any(id(parent) in ids for parent in element.parents)
+    ]
+
+def in_related_list(element):
+    """
+    True when an element is, or sits inside, a list of links to other stories
+    """
+    for node in [element, *element.parents]:
+        if RELATED_CLASS_RE.search(' '.join(node.get('class') or [])):
+            return True
+    return False
+
+def collect_texts(texts, blocks, seen):
+    """
+    Append the substantial, not yet seen texts to blocks
+    """
+    for text in texts:
+        text = text.strip()
+        if len(text) > MIN_BLOCK_LENGTH and text not in seen:
+            seen.add(text)
+            blocks.append(text)
+
+def collect_blocks(nodes, blocks, seen):
+    """
+    Append the substantial, not yet seen text of each node to blocks
+    """
+    collect_texts((node.get_text() for node in nodes), blocks, seen)
+
+def collect_node_blocks(nodes, blocks, seen):
+    """
+    Collect the paragraphs of each node, or its <br>-separated lines if it has no paragraph tags
+    """
+    for node in nodes:
+        paragraphs = node.find_all(TEXT_TAGS)
+        if paragraphs:
+            collect_blocks(paragraphs, blocks, seen)
+        else:
+            # Bodies written as text with <br> line breaks (Times of India)
+            for br in node.find_all('br'):
+                br.replace_with('\n')
+            collect_texts(node.get_text().split('\n'), blocks, seen)
+
+def extract_article_text(html, parser=None, url=None):
+    """
+    Extract the main article text from an HTML page.
+
+    Each paragraph node is visited once and repeated text blocks are kept
+    only the first time they appear.
+
+    Args:
+        html (str): The raw HTML of the article page
+        parser (str): Optional parser backend name (defaults to HTML_PARSER)
+        url (str): Optional page URL, used to pick a per-domain extraction rule
+
+    Returns:
+        str: The article text with whitespace normalized
+    """
+    soup = make_soup(html, parser)
+
+    blocks = []
+    seen = set()
+
+    # Approach 0: Go straight to the article body for known news sources
+    collect_node_blocks(outermost(select_body_nodes(soup, url)), blocks, seen)
+
+    # Try multiple approaches to extract content
+    content_found = bool(blocks)
+
+    # Approach 1: Look for common article content containers, skipping containers
+    # nested inside another match so their paragraphs are not visited twice
+    article_containers = [] if content_found else outermost([
+        container for container in soup.find_all(['article', 'div', 'section'], class_=CONTAINER_CLASS_RE)
+        if not in_related_list(container)
+    ])
+    for container in article_containers:
+        paragraphs = container.find_all(TEXT_TAGS)
+        if paragraphs:
+            collect_blocks(paragraphs, blocks, seen)
+            content_found = True
+
+    # Approach 2: If no content found, try getting all paragraphs
+    if not content_found:
+        collect_blocks(soup.find_all('p'), blocks, seen)
+        content_found = bool(blocks)
+
+    # Approach 3: If still no content, try getting the main content area
+    if not content_found:
+        main_content = soup.find('main') or soup.find('div', role='main')
+        if main_content:
+            blocks = [main_content.get_text(separator='\n\n', strip=True)]
+            content_found = True
+
+    # Approach 4: Last resort - get all text without page chrome
+    if not content_found:
+        for element in soup(['script', 'style', 'nav', 'header', 'footer']):
+            element.decompose()
+        blocks = [soup.get_text(separator='\n\n', strip=True)]
+
+    # Normalize whitespace once over the joined output
+    article_content = WHITESPACE_RE.sub(' ', '\n\n'.join(blocks)).strip()
+
+    # The last-resort page text is only worth returning if it is substantial
+    if not content_found and len(article_content) <= MIN_BLOCK_LENGTH:
+        return ""
+
+    return article_content
+
+def extract_relevant_text(html, parser=None, url=None):
+    """
+    Extract the main content block of a page for notes generation.
+
+    Uses the per-domain rule for known news sources, then the generic
+    selector cascade, then all substantial paragraphs.
+    """
+    soup = make_soup(html, parser)
+
+    # Remove unwanted elements
+    for element in soup(['script', 'style', 'nav', 'header', 'footer', 'aside', 'iframe', 'noscript']):
+        element.decompose()
+
+    main_content = ""
+
+    nodes = select_body_nodes(soup, url)
+    if nodes:
+        main_content = '\n'.join(node.get_text(separator='\n', strip=True) for node in outermost(nodes))
+
+    if not main_content:
+        content = select_generic_node(soup)
+        if content:
+            main_content = content.get_text(separator='\n', strip=True)
+
+    # If no content found with selectors, try getting all paragraphs
+    if not main_content:
+        paragraphs = (p.get_text().strip() for p in soup.find_all('p'))
+        main_content = '\n'.join(text for text in paragraphs if len(text) > MIN_BLOCK_LENGTH)
+
+    return WHITESPACE_RE.sub(' ', main_content).strip()
+
+def fetch_article_text(url):
+    """
+    Download an article page (through the HTML cache) and extract its text. Raises on network or HTTP errors.
+    """
+    return extract_article_text(fetch_html(url), url=url)
+
+def fetch_article_content(url):
+    """
+    Fetch the full content of an article from a URL.
+
+    Args:
+        url (str): The URL of the article
+
+    Returns:
+        str: The full content of the article
+    """
+    try:
+        return fetch_article_text(url)
+
+    except Exception as e:
+        st.error(f"Error fetching article content: {str(e)}")
+        return None
@@ -0,0 +1,134 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from article_extractor import fetch_article_text
+from upsc_notes_generator import generate_upsc_notes, generate_quiz
+from notes_store import article_id_for, get_notes, save_notes, get_quiz, save_quiz, link_alias, resolve_alias
+from dedup import DEDUP_ENABLED, choose_representative, cluster_articles
+
+
+# Default number of articles processed at the same time
+BATCH_CONCURRENCY = int(os.getenv('BATCH_CONCURRENCY', '4'))
+
+def article_text(article):
+    """
+    Full text of an article's page, or its NewsAPI description when the page cannot be fetched or extracted
+    """
+    content = None
+    if article.get('url', '').startswith('http'):
+        try:
+            content = fetch_article_text(article['url'])
+        except Exception as e:
+            print(f"Error fetching {article['url']}, using the description instead: {str(e)}")
+    if not content:
+        content = article.get('description') or article.get('content')
+    if not content:
+        raise ValueError("No article content available")
+    return content
+
+def generate_article_notes(article, mode=None, content=None):
+    """
+    Fetch the full text of one article (unless content is given) and generate its UPSC notes.
+    Falls back to the NewsAPI description when the page cannot be extracted.
+    Notes already in the notes store are returned without any fetch or LLM call.
+    """
+    article_id = article_id_for(article)
+    stored = get_notes(article_id)
+    if stored:
+        return stored
+
+    content = content or article_text(article)
+    notes = generate_upsc_notes(article['title'], content, mode=mode)
+    # generate_upsc_notes reports failures in its return value
+    if not notes or notes.startswith("Error generating notes:"):
+        raise RuntimeError(notes or "Empty notes returned")
+    save_notes(article, notes, mode=mode, article_id=article_id)
+    return notes
+
+def generate_article_quiz(article):
+    """
+    Return the stored quiz for an article, generating and storing it on a miss
+    """
+    # Near-duplicate articles share the quiz of the article they are an alias of
+    article_id = resolve_alias(article_id_for(article))
+    stored = get_quiz(article_id)
+    if stored:
+        return stored
+
+    # Same inputs as the app's "Generate Quiz" button, so a click there hits the LLM cache too
+    quiz = generate_quiz(article['title'], article.get('description') or '')
+    if not quiz:
+        raise RuntimeError("Quiz generation failed")
+    save_quiz(article, quiz, article_id=article_id)
+    return quiz
+
+def unique_articles(*article_lists):
+    """
+    Merge article lists, keeping the first occurrence of each URL (or title)
+    """
+    seen = set()
+    merged = []
+    for articles in article_lists:
+        for article in articles or []:
+            key = article.get('url') or article.get('title')
+            if key and key not in seen:
+                seen.add(key)
+                merged.append(article)
+    return merged
+
+def generate_notes_batch(articles, max_workers=BATCH_CONCURRENCY, mode=None):
+    """
+    Generate notes for many articles on a bounded thread pool.
+
+    Articles are fetched first and clustered into near-duplicates (the same
+    story from several sources); notes are generated once per cluster and
+    the other members are linked to them in the notes store.
+
+    Yields (index, article, notes, error) as each article finishes, so the
+    caller can report progress from the Streamlit script thread.
+    """
+    max_workers = max(1, min(max_workers, len(articles) or 1))
+    article_ids = [article_id_for(article) for article in articles]
+    stored = {index for index, article_id in enumerate(article_ids) if get_notes(article_id)}
+    contents = {}
+    failed = set()
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="notes-batch") as pool:
+        if DEDUP_ENABLED:
+            # Fetch up front so near-duplicates can be detected from the article text
+            futures = {
+                pool.submit(article_text, article): index
+                for index, article in enumerate(articles) if index not in stored
+            }
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    contents[index] = future.result()
+                except Exception as e:
+                    failed.add(index)
+                    yield index, articles[index], None, str(e)
+            clusters = cluster_articles(articles, contents)
+        else:
+            clusters = [[index] for index in range(len(articles))]
+
+        futures = {}
+        for cluster in clusters:
+            members = [index for index in cluster if index not in failed]
+            if not members:
+                continue
+            representative = choose_representative(members, stored, contents)
+            future = pool.submit(generate_article_notes, articles[representative], mode, contents.get(representative))
+            futures[future] = (representative, members)
+
+        for future in as_completed(futures):
+            representative, members = futures[future]
+            try:
+                notes = future.result()
+            except Exception as e:
+                for index in members:
+                    yield index, articles[index], None, str(e)
+                continue
+            for index in members:
+                if index != representative:
+                    link_alias(article_ids[index], article_ids[representative])
+                yield index, articles[index], notes, None
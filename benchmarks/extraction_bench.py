@@ -0,0 +1,187 @@
+"""
+Offline extraction benchmark.
+
+Runs the parsing half of fetch_article_content (extract_article_text) and
+extract_relevant_content (extract_relevant_text) over the saved pages in
+benchmarks/fixtures and reports speed, peak memory, output size and
+agreement with the golden text in benchmarks/expected.
+
+Usage:
+    python benchmarks/extraction_bench.py [--parser lxml] [--repeat 20] [--min-f1 0.95] [--allow-diff]
+
+The golden files hold the article body text only, so boilerplate that
+leaks into the output lowers F1. The run fails when any output differs
+from its golden text; --allow-diff only fails pages below --min-f1, for
+parser backends that split whitespace differently. --update-golden
+replaces the golden files with the current output instead.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from article_extractor import extract_article_text, extract_relevant_text
+from html_parsers import available_parsers, resolve_parser
+
+FIXTURES_DIR = os.path.join(ROOT, 'benchmarks', 'fixtures')
+EXPECTED_DIR = os.path.join(ROOT, 'benchmarks', 'expected')
+
+EXTRACTORS = {
+    'article': extract_article_text,
+    'relevant': extract_relevant_text
+}
+
+
+def load_corpus():
+    """
+    Load the fixture manifest and the HTML of every page
+    """
+    with open(os.path.join(FIXTURES_DIR, 'manifest.json'), encoding='utf-8') as f:
+        manifest = json.load(f)
+    for page in manifest:
+        with open(os.path.join(FIXTURES_DIR, f"{page['name']}.html"), encoding='utf-8') as f:
+            page['html'] = f.read()
+    return manifest
+
+
+def expected_path(page, extractor):
+    return os.path.join(EXPECTED_DIR, f"{page['name']}.{extractor}.txt")
+
+
+def token_f1(output, expected):
+    """
+    Token-level F1 between extracted and golden text
+    """
+    output_tokens = Counter(output.split())
+    expected_tokens = Counter(expected.split())
+    overlap = sum((output_tokens & expected_tokens).values())
+    if not overlap:
+        return 1.0 if not output_tokens and not expected_tokens else 0.0
+    precision = overlap / sum(output_tokens.values())
+    recall = overlap / sum(expected_tokens.values())
+    return 2 * precision * recall / (precision + recall)
+
+
+def run_extractor(name, corpus, parser, repeat):
+    """
+    Time one extractor over the corpus and compare each page with its golden text
+    """
+    extract = EXTRACTORS[name]
+    rows = []
+
+    start = time.perf_counter()
+    for page in corpus:
+        page_start = time.perf_counter()
+        for _ in range(repeat):
+            output = extract(page['html'], parser=parser, url=page['url'])
+        elapsed = (time.perf_counter() - page_start) / repeat
+        rows.append({'page': page, 'output': output, 'seconds': elapsed})
+    total = time.perf_counter() - start
+
+    # Measure memory in a separate pass so tracing overhead does not skew the timings
+    peak = 0
+    for page in corpus:
+        tracemalloc.start()
+        extract(page['html'], parser=parser, url=page['url'])
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    for row in rows:
+        path = expected_path(row['page'], name)
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                expected = f.read().strip()
+            row['f1'] = token_f1(row['output'], expected)
+            row['exact'] = row['output'] == expected
+        else:
+            row['f1'] = None
+            row['exact'] = None
+
+    return {
+        'rows': rows,
+        'pages_per_sec': len(corpus) * repeat / total if total else 0.0,
+        'peak_memory_kb': peak / 1024
+    }
+
+
+def write_golden(corpus, parser):
+    os.makedirs(EXPECTED_DIR, exist_ok=True)
+    for name, extract in EXTRACTORS.items():
+        for page in corpus:
+            with open(expected_path(page, name), 'w', encoding='utf-8') as f:
+                f.write(extract(page['html'], parser=parser, url=page['url']) + '\n')
+    print(f"Wrote golden text for {len(corpus)} pages to {EXPECTED_DIR}")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Offline article extraction benchmark")
+    arg_parser.add_argument('--parser', default=None, help=f"HTML parser backend (available: {', '.join(available_parsers())})")
+    arg_parser.add_argument('--repeat', type=int, default=20, help="extractions per page for timing")
+    arg_parser.add_argument('--update-golden', action='store_true', help="overwrite the golden text with the current output")
+    arg_parser.add_argument('--min-f1', type=float, default=0.95, help="exit non-zero if any page scores below this F1")
+    arg_parser.add_argument('--allow-diff', action='store_true', help="do not fail pages that differ from their golden text but reach --min-f1")
+    arg_parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = arg_parser.parse_args()
+
+    corpus = load_corpus()
+    parser = resolve_parser(args.parser)
+
+    if args.update_golden:
+        write_golden(corpus, parser)
+        return 0
+
+    results = {name: run_extractor(name, corpus, parser, max(1, args.repeat)) for name in EXTRACTORS}
+
+    if args.json:
+        print(json.dumps({
+            'parser': parser,
+            'extractors': {
+                name: {
+                    'pages_per_sec': result['pages_per_sec'],
+                    'peak_memory_kb': result['peak_memory_kb'],
+                    'pages': [
+                        {
+                            'name': row['page']['name'],
+                            'ms': row['seconds'] * 1000,
+                            'chars': len(row['output']),
+                            'f1': row['f1'],
+                            'exact': row['exact']
+                        }
+                        for row in result['rows']
+                    ]
+                }
+                for name, result in results.items()
+            }
+        }, indent=2))
+        return 0
+
+    below_threshold = 0
+    differing = 0
+    print(f"Parser: {parser}  Pages: {len(corpus)}  Repeat: {args.repeat}")
+    for name, result in results.items():
+        print(f"\n{name} extractor: {result['pages_per_sec']:.1f} pages/sec, peak memory {result['peak_memory_kb']:.0f} KB per page")
+        print(f"  {'page':<18} {'ms/page':>8} {'chars':>7} {'F1':>6}  golden")
+        for row in result['rows']:
+            f1 = '-' if row['f1'] is None else f"{row['f1']:.3f}"
+            golden = 'missing' if row['exact'] is None else ('match' if row['exact'] else 'DIFF')
+            if row['f1'] is not None and row['f1'] < args.min_f1:
+                below_threshold += 1
+            elif row['exact'] is False and not args.allow_diff:
+                differing += 1
+            print(f"  {row['page']['name']:<18} {row['seconds'] * 1000:>8.2f} {len(row['output']):>7} {f1:>6}  {golden}")
+
+    if below_threshold:
+        print(f"\n{below_threshold} page(s) scored below F1 {args.min_f1}")
+    if differing:
+        print(f"\n{differing} page(s) differ from their golden text (rerun with --update-golden if the change is intended)")
+    return 1 if below_threshold or differing else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,190 @@
+"""
+Offline throughput benchmark of the news, notes and quiz pipeline.
+
+Starts the fake NewsAPI server in-process and runs the pipeline against
+the fake Gemini model (or recorded responses with --backend replay), so
+results are repeatable without API keys or network access. Measures:
+
+- news: fetching and merging every page of the UPSC sources
+- notes: fetch + extract + generate_upsc_notes per article
+- quiz: generate_quiz per article
+
+Usage:
+    python benchmarks/pipeline_bench.py [--articles 24] [--concurrency 4] [--llm-latency 0.2]
+        [--news-latency 0.02] [--error-rate 0] [--throttle-rate 0] [--mode chained] [--json]
+
+The response caches are switched off so every run does the full work.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def parse_args():
+    arg_parser = argparse.ArgumentParser(description="Offline pipeline throughput benchmark")
+    arg_parser.add_argument('--articles', type=int, default=24, help="articles run through notes and quiz generation")
+    arg_parser.add_argument('--concurrency', type=int, default=4, help="articles processed in parallel")
+    arg_parser.add_argument('--days', type=int, default=1, help="days of news fetched")
+    arg_parser.add_argument('--backend', default='fake', choices=['fake', 'replay'], help="LLM stand-in")
+    arg_parser.add_argument('--mode', default='chained', choices=['chained', 'structured'], help="notes pipeline")
+    arg_parser.add_argument('--llm-latency', type=float, default=0.2, help="fake model seconds before the first token")
+    arg_parser.add_argument('--llm-tokens-per-second', type=float, default=400, help="fake model output speed")
+    arg_parser.add_argument('--news-latency', type=float, default=0.02, help="fake NewsAPI seconds per response")
+    arg_parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of injected 500 errors (model and NewsAPI)")
+    arg_parser.add_argument('--throttle-rate', type=float, default=0.0, help="fraction of injected 429 errors (model and NewsAPI)")
+    arg_parser.add_argument('--seed', default='0')
+    arg_parser.add_argument('--json', action='store_true', help="print results as JSON")
+    return arg_parser.parse_args()
+
+
+def configure_environment(args, workdir):
+    """
+    Module settings are read at import time, so the environment is prepared before importing the pipeline
+    """
+    os.environ.update({
+        'LLM_BACKEND': args.backend,
+        'FAKE_LLM_LATENCY': str(args.llm_latency),
+        'FAKE_LLM_TOKENS_PER_SECOND': str(args.llm_tokens_per_second),
+        'FAKE_LLM_ERROR_RATE': str(args.error_rate),
+        'FAKE_LLM_THROTTLE_RATE': str(args.throttle_rate),
+        'FAKE_LLM_SEED': str(args.seed),
+        'LLM_CACHE_ENABLED': '0',
+        'HTML_CACHE_ENABLED': '0',
+        'NOTES_DB_PATH': os.path.join(workdir, 'notes.db')
+    })
+    # Rate limits stay at their configured values unless set explicitly, so 429 handling is measured too
+    os.environ.setdefault('GEMINI_RPM', '100000')
+    os.environ.setdefault('GEMINI_BURST', '1000')
+    os.environ.setdefault('NEWSAPI_RPM', '100000')
+    os.environ.setdefault('NEWSAPI_BURST', '1000')
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def timed_run(items, work, concurrency):
+    """
+    Run work(item) over items on a thread pool; returns (seconds, latencies, errors)
+    """
+    def run(item):
+        started = time.perf_counter()
+        try:
+            ok = work(item)
+        except Exception as e:
+            print(f"  error: {str(e)[:120]}")
+            ok = False
+        return time.perf_counter() - started, ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        results = list(pool.map(run, items))
+    return time.perf_counter() - started, [latency for latency, _ in results], sum(1 for _, ok in results if not ok)
+
+
+def summarise(name, count, seconds, latencies, errors, **extra):
+    return {
+        'stage': name,
+        'items': count,
+        'seconds': seconds,
+        'per_second': count / seconds if seconds else 0.0,
+        'p50_seconds': percentile(latencies, 0.5),
+        'p95_seconds': percentile(latencies, 0.95),
+        'errors': errors,
+        **extra
+    }
+
+
+def main():
+    args = parse_args()
+    workdir = tempfile.mkdtemp(prefix='upsc-bench-')
+    configure_environment(args, workdir)
+
+    import fake_newsapi
+    server, base_url = fake_newsapi.start_server(
+        latency=args.news_latency, error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate, seed=args.seed
+    )
+    os.environ['NEWS_API_URL'] = f"{base_url}/v2/everything"
+
+    from article_extractor import fetch_article_text
+    from news_cache import UPSC_SOURCES
+    from news_fetcher import is_valid_article, iter_articles
+    from rate_limiter import limiter_stats
+    from upsc_notes_generator import generate_quiz, generate_upsc_notes
+
+    # Streamlit calls made outside a running app warn on every worker thread
+    logging.getLogger('streamlit').setLevel(logging.ERROR)
+    for name in list(logging.root.manager.loggerDict):
+        if name.startswith('streamlit'):
+            logging.getLogger(name).setLevel(logging.ERROR)
+
+    to_date = datetime.now().strftime('%Y-%m-%d')
+    from_date = (datetime.now() - timedelta(days=args.days - 1)).strftime('%Y-%m-%d')
+    results = []
+
+    # News: every page of every source, merged newest first
+    started = time.perf_counter()
+    first_article = None
+    errors = []
+    articles = []
+    for article in iter_articles([{'sources': source} for source in UPSC_SOURCES], from_date, to_date, 'bench-key', errors=errors):
+        if first_article is None:
+            first_article = time.perf_counter() - started
+        if is_valid_article(article):
+            articles.append(article)
+    seconds = time.perf_counter() - started
+    results.append(summarise('news', len(articles), seconds, [first_article or 0.0], len(errors), first_article_seconds=first_article))
+
+    sample = articles[:args.articles]
+
+    # Notes: fetch and extract the page, then run the notes pipeline
+    def notes_work(article):
+        content = fetch_article_text(article['url'])
+        notes = generate_upsc_notes(article['title'], content, mode=args.mode)
+        return bool(notes) and not notes.startswith("Error generating notes:")
+
+    seconds, latencies, failed = timed_run(sample, notes_work, args.concurrency)
+    results.append(summarise('notes', len(sample), seconds, latencies, failed))
+
+    # Quiz: one request per article
+    def quiz_work(article):
+        return bool(generate_quiz(article['title'], article['description']))
+
+    seconds, latencies, failed = timed_run(sample, quiz_work, args.concurrency)
+    results.append(summarise('quiz', len(sample), seconds, latencies, failed))
+
+    server.shutdown()
+    limits = limiter_stats()
+
+    if args.json:
+        print(json.dumps({'config': vars(args), 'results': results, 'rate_limits': limits}, indent=2))
+        return 0
+
+    print(f"Backend: {args.backend}  Mode: {args.mode}  Concurrency: {args.concurrency}  "
+          f"LLM latency: {args.llm_latency}s  Errors/429s injected: {args.error_rate}/{args.throttle_rate}")
+    print(f"\n  {'stage':<6} {'items':>6} {'seconds':>8} {'items/s':>8} {'p50 s':>7} {'p95 s':>7} {'errors':>7}")
+    for row in results:
+        print(f"  {row['stage']:<6} {row['items']:>6} {row['seconds']:>8.2f} {row['per_second']:>8.2f} "
+              f"{row['p50_seconds']:>7.2f} {row['p95_seconds']:>7.2f} {row['errors']:>7}")
+    if results[0].get('first_article_seconds') is not None:
+        print(f"\n  First merged article after {results[0]['first_article_seconds']:.2f}s")
+    for key, stats in sorted(limits.items()):
+        print(f"  {key}: {stats['calls']} calls, {stats['throttled']} throttled, avg wait {stats['avg_wait']:.2f}s")
+    return 1 if any(row['errors'] for row in results[1:]) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
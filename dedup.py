@@ -0,0 +1,166 @@
+import hashlib
+import os
+import random
+import re
+import threading
+from collections import defaultdict
+
+
+# Near-duplicate detection (override through environment variables)
+DEDUP_ENABLED = os.getenv('DEDUP_ENABLED', '1') != '0'
+# Minimum estimated Jaccard similarity of article text shingles
+DEDUP_TEXT_THRESHOLD = float(os.getenv('DEDUP_TEXT_THRESHOLD', '0.5'))
+# Minimum estimated Jaccard similarity of NewsAPI title + description shingles
+DEDUP_META_THRESHOLD = float(os.getenv('DEDUP_META_THRESHOLD', '0.6'))
+
+# MinHash signature length and LSH banding: 32 bands of 4 rows make pairs
+# above roughly 0.42 similarity likely to share a bucket, and every
+# candidate pair is then checked against the threshold
+NUM_PERM = 128
+LSH_BANDS = 32
+LSH_ROWS = NUM_PERM // LSH_BANDS
+
+# Shingle sizes in words
+TEXT_SHINGLE_SIZE = 4
+META_SHINGLE_SIZE = 2
+
+MERSENNE_PRIME = (1 << 61) - 1
+WORD_RE = re.compile(r'\w+')
+
+# Fixed seed so signatures are comparable across runs and processes
+_rng = random.Random(1)
+PERMUTATIONS = [
+    (_rng.randrange(1, MERSENNE_PRIME), _rng.randrange(0, MERSENNE_PRIME))
+    for _ in range(NUM_PERM)
+]
+
+_lock = threading.Lock()
+_stats = {'articles': 0, 'clusters': 0, 'duplicates': 0}
+
+
+def shingles(text, size):
+    """
+    Set of hashed word n-grams of a text (the whole text when it is shorter than n words)
+    """
+    words = WORD_RE.findall((text or '').lower())
+    if not words:
+        return set()
+    grams = [' '.join(words[i:i + size]) for i in range(max(1, len(words) - size + 1))]
+    return {
+        int.from_bytes(hashlib.blake2b(gram.encode('utf-8'), digest_size=8).digest(), 'big')
+        for gram in grams
+    }
+
+
+def minhash(shingle_set):
+    """
+    MinHash signature of a shingle set, or None for an empty set
+    """
+    if not shingle_set:
+        return None
+    return [
+        min((a * value + b) % MERSENNE_PRIME for value in shingle_set)
+        for a, b in PERMUTATIONS
+    ]
+
+
+def similarity(signature_a, signature_b):
+    """
+    Estimated Jaccard similarity of two MinHash signatures
+    """
+    return sum(1 for a, b in zip(signature_a, signature_b) if a == b) / NUM_PERM
+
+
+def near_duplicate_pairs(signatures, threshold):
+    """
+    Pairs of keys whose signatures are at least threshold similar, found through LSH buckets
+    """
+    buckets = defaultdict(list)
+    for key, signature in signatures.items():
+        if signature is None:
+            continue
+        for band in range(LSH_BANDS):
+            start = band * LSH_ROWS
+            buckets[(band, tuple(signature[start:start + LSH_ROWS]))].append(key)
+
+    checked = set()
+    pairs = []
+    for keys in buckets.values():
+        for i in range(len(keys)):
+            for j in range(i + 1, len(keys)):
+                pair = (keys[i], keys[j])
+                if pair in checked:
+                    continue
+                checked.add(pair)
+                if similarity(signatures[keys[i]], signatures[keys[j]]) >= threshold:
+                    pairs.append(pair)
+    return pairs
+
+
+def _find(parent, i):
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def article_metadata(article):
+    return ' '.join([article.get('title') or '', article.get('description') or ''])
+
+
+def cluster_articles(articles, texts=None, text_threshold=None, meta_threshold=None):
+    """
+    Group near-duplicate articles.
+
+    Articles are compared on their NewsAPI title + description and, where
+    texts (a dict of index -> fetched article text) has an entry, on their
+    full text. Returns clusters as lists of article indices, ordered by
+    their first member.
+    """
+    texts = texts or {}
+    text_threshold = DEDUP_TEXT_THRESHOLD if text_threshold is None else text_threshold
+    meta_threshold = DEDUP_META_THRESHOLD if meta_threshold is None else meta_threshold
+
+    parent = list(range(len(articles)))
+    stages = [
+        ({i: minhash(shingles(article_metadata(article), META_SHINGLE_SIZE)) for i, article in enumerate(articles)}, meta_threshold),
+        ({i: minhash(shingles(text, TEXT_SHINGLE_SIZE)) for i, text in texts.items()}, text_threshold)
+    ]
+    for signatures, threshold in stages:
+        for i, j in near_duplicate_pairs(signatures, threshold):
+            root_i, root_j = _find(parent, i), _find(parent, j)
+            if root_i != root_j:
+                parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    clusters = defaultdict(list)
+    for i in range(len(articles)):
+        clusters[_find(parent, i)].append(i)
+    result = sorted(clusters.values(), key=lambda members: members[0])
+
+    with _lock:
+        _stats['articles'] += len(articles)
+        _stats['clusters'] += len(result)
+        _stats['duplicates'] += len(articles) - len(result)
+    return result
+
+
+def choose_representative(members, preferred=(), texts=None):
+    """
+    Pick the article whose notes stand for a cluster: one that already has
+    notes (in preferred), else the one with the longest text, else the first
+    """
+    for i in members:
+        if i in preferred:
+            return i
+    texts = texts or {}
+    return max(members, key=lambda i: (len(texts.get(i) or ''), -i))
+
+
+def dedup_stats():
+    """
+    Articles seen, clusters formed and duplicates skipped since startup
+    """
+    with _lock:
+        stats = dict(_stats)
+    stats['duplicate_rate'] = stats['duplicates'] / stats['articles'] if stats['articles'] else 0.0
+    return stats
@@ -0,0 +1,134 @@
+"""
+Shared plumbing for the on-disk JSON caches (LLM responses, article HTML).
+
+Entries are written atomically, and an entry's mtime doubles as its LRU
+timestamp: readers touch it on every hit and pruning evicts the oldest
+first. Each cache keeps its own configuration and hit/miss counters.
+"""
+import gzip
+import json
+import os
+import threading
+import time
+
+
+# Run a full eviction pass every N writes to a cache directory
+PRUNE_EVERY = 50
+# Evict down to this share of the size limit to avoid pruning on every write
+PRUNE_TARGET = 0.9
+
+_lock = threading.Lock()
+_writes_since_prune = {}
+
+
+def _open(path, mode, compress):
+    if compress:
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def read_entry(path, compress=False):
+    """
+    Load a JSON entry, or None when it does not exist. A corrupt entry raises OSError, ValueError or EOFError.
+    """
+    try:
+        with _open(path, 'r', compress) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def write_entry(path, entry, compress=False):
+    """
+    Write a JSON entry atomically (readers never see a partial file). Raises OSError.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with _open(tmp_path, 'w', compress) as f:
+        json.dump(entry, f)
+    os.replace(tmp_path, path)
+
+
+def touch(path):
+    """
+    Mark an entry as recently used
+    """
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+
+
+def prune_due(directory):
+    """
+    Count a write to a cache directory; True on the first write and every PRUNE_EVERY writes after it
+    """
+    with _lock:
+        writes = _writes_since_prune.get(directory, PRUNE_EVERY) + 1
+        _writes_since_prune[directory] = 0 if writes >= PRUNE_EVERY else writes
+    return writes >= PRUNE_EVERY
+
+
+def prune(directory, max_bytes, suffix, max_age=None):
+    """
+    Evict entries older than max_age (seconds since last use), then least recently
+    used entries until the directory is under max_bytes; returns the number evicted
+    """
+    if not os.path.isdir(directory):
+        return 0
+
+    now = time.time()
+    entries = []
+    total_bytes = 0
+    evicted = 0
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if not name.endswith(suffix):
+                continue
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            # mtime is refreshed on every hit, so an untouched entry is at least this old
+            if max_age is not None and now - stat.st_mtime > max_age:
+                try:
+                    os.remove(path)
+                    evicted += 1
+                except OSError:
+                    pass
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total_bytes += stat.st_size
+
+    if total_bytes > max_bytes:
+        target = int(max_bytes * PRUNE_TARGET)
+        entries.sort()
+        for _, size, path in entries:
+            if total_bytes <= target:
+                break
+            try:
+                os.remove(path)
+                total_bytes -= size
+                evicted += 1
+            except OSError:
+                pass
+
+    return evicted
+
+
+def clear(directory):
+    """
+    Remove every file under a cache directory; returns the number removed
+    """
+    removed = 0
+    if not os.path.isdir(directory):
+        return removed
+    for root, _, files in os.walk(directory):
+        for name in files:
+            try:
+                os.remove(os.path.join(root, name))
+                removed += 1
+            except OSError:
+                pass
+    return removed
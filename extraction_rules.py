@@ -0,0 +1,152 @@
+import threading
+from urllib.parse import urlsplit
+
+import soupsieve as sv
+
+
+# Article body selectors for the UPSC news sources, most specific first.
+# Every node matched by the first selector that matches anything is treated
+# as article body (The Quint, for example, splits a story over many blocks).
+DOMAIN_SELECTORS = {
+    'thehindu.com': [
+        'div.articlebodycontent',
+        'div[itemprop="articleBody"]',
+        'div[id^="content-body-"]'
+    ],
+    'timesofindia.indiatimes.com': [
+        'div[data-articlebody]',
+        'div._s30J',
+        'div.Normal',
+        'div.ga-headlines'
+    ],
+    'indianexpress.com': [
+        'div#pcl-full-content',
+        'div.full-details',
+        'div.story_details'
+    ],
+    'thewire.in': [
+        'div#post-content',
+        'div.post-content',
+        'div.postCont'
+    ],
+    'scroll.in': [
+        'div#article-contents',
+        'section.article-content',
+        'div.article-body'
+    ],
+    'thequint.com': [
+        'div.story-element-text',
+        'div.story-article__content'
+    ]
+}
+
+# Elements inside a domain's article body that are not part of the story
+# (inline "ALSO READ" links, related-story boxes); removed before extraction
+DOMAIN_EXCLUDES = {
+    'thehindu.com': [
+        'div.also-read',
+        'div[class*="related"]',
+        'aside'
+    ]
+}
+
+# Generic cascade used when no domain rule matches (first match wins)
+GENERIC_SELECTORS = [
+    'article',
+    'div[class*="article"]',
+    'div[class*="content"]',
+    'div[class*="story"]',
+    'main',
+    'div[class*="main"]',
+    'div[role="main"]'
+]
+
+# Precompile every selector once at import time
+EXTRACTION_RULES = {
+    domain: [(selector, sv.compile(selector)) for selector in selectors]
+    for domain, selectors in DOMAIN_SELECTORS.items()
+}
+EXCLUDE_RULES = {
+    domain: sv.compile(', '.join(selectors))
+    for domain, selectors in DOMAIN_EXCLUDES.items()
+}
+GENERIC_RULE = [(selector, sv.compile(selector)) for selector in GENERIC_SELECTORS]
+
+_lock = threading.Lock()
+_stats = {}
+
+
+def _count(rule, selector):
+    """
+    Record one lookup against a rule; selector is None on a miss
+    """
+    with _lock:
+        entry = _stats.setdefault(rule, {'lookups': 0, 'hits': 0, 'selectors': {}})
+        entry['lookups'] += 1
+        if selector:
+            entry['hits'] += 1
+            entry['selectors'][selector] = entry['selectors'].get(selector, 0) + 1
+
+
+def rule_for_url(url):
+    """
+    Return the registered domain for a URL (matching subdomains), or None
+    """
+    if not url:
+        return None
+    host = urlsplit(url).netloc.lower().split(':')[0]
+    for domain in EXTRACTION_RULES:
+        if host == domain or host.endswith('.' + domain):
+            return domain
+    return None
+
+
+def select_body_nodes(soup, url):
+    """
+    Return the article body nodes selected by the URL's domain rule, or [] if none match.
+    Elements the rule excludes are removed from the returned nodes.
+    """
+    domain = rule_for_url(url)
+    if not domain:
+        return []
+
+    for selector, pattern in EXTRACTION_RULES[domain]:
+        nodes = pattern.select(soup)
+        if nodes:
+            _count(domain, selector)
+            if domain in EXCLUDE_RULES:
+                for node in nodes:
+                    for element in EXCLUDE_RULES[domain].select(node):
+                        element.decompose()
+            return nodes
+
+    _count(domain, None)
+    return []
+
+
+def select_generic_node(soup):
+    """
+    Return the first node matched by the generic selector cascade, or None
+    """
+    for selector, pattern in GENERIC_RULE:
+        node = pattern.select_one(soup)
+        if node:
+            _count('generic', selector)
+            return node
+
+    _count('generic', None)
+    return None
+
+
+def rule_stats():
+    """
+    Per-rule lookups, hits, hit rate and per-selector hit counts
+    """
+    with _lock:
+        stats = {
+            rule: {**entry, 'selectors': dict(entry['selectors'])}
+            for rule, entry in _stats.items()
+        }
+    for entry in stats.values():
+        entry['hit_rate'] = entry['hits'] / entry['lookups'] if entry['lookups'] else 0.0
+    return stats
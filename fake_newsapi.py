@@ -0,0 +1,292 @@
+"""
+Local NewsAPI-compatible server for offline runs and benchmarks.
+
+Serves /v2/everything and /v2/top-headlines with deterministic synthetic
+articles (or fixtures), and the article pages they link to, with optional
+latency and error injection. Point the app at it with
+NEWS_API_URL=http://127.0.0.1:8765/v2/everything.
+
+Usage:
+    python fake_newsapi.py [--port 8765] [--latency 0.05] [--error-rate 0.02] [--throttle-rate 0.02]
+    python fake_newsapi.py --record https://newsapi.org   # proxy and save responses as fixtures
+    python fake_newsapi.py --replay                       # serve saved fixtures
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+
+from news_cache import UPSC_SOURCES
+
+NEWS_FIXTURES_DIR = os.getenv(
+    'NEWS_FIXTURES_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks', 'recordings', 'newsapi')
+)
+
+# Synthetic articles published per source and day
+ARTICLES_PER_DAY = 20
+
+TOPICS = [
+    'RBI keeps repo rate unchanged amid inflation concerns',
+    'Supreme Court reserves verdict on electoral reforms',
+    'Cabinet approves National Quantum Mission funding',
+    'India and Japan sign semiconductor partnership',
+    'Monsoon session of Parliament to take up forest law amendments',
+    'ISRO schedules next Gaganyaan test flight',
+    'GST Council revises rates on essential goods',
+    'Heatwave action plans expanded to more districts',
+    'India hosts G20 working group on disaster resilience',
+    'New criminal laws come into force across states',
+    'Tiger census shows rise in reserve populations',
+    'Finance Commission terms of reference notified'
+]
+
+SENTENCES = [
+    "Officials said the decision followed {n} rounds of consultation with {state} and {expert}.",
+    "The {ministry} will oversee implementation, with an outlay of Rs {n},{m} crore over {k} years.",
+    "{expert} linked the move to commitments made in {year} and to the {report}.",
+    "Opposition leaders in {state} questioned the timeline and asked for a review by {k} parliamentary panels.",
+    "The {report} had recommended similar steps for {n} districts, citing {m} pending cases.",
+    "Data released by the {ministry} shows a {n} per cent change since {year}.",
+    "{expert} said the effect on {state} would be visible within {k} quarters.",
+    "The measure also revises rules notified in {year} under the {report}."
+]
+STATES = ['Kerala', 'Assam', 'Gujarat', 'Odisha', 'Punjab', 'Bihar', 'Tamil Nadu', 'Maharashtra']
+EXPERTS = ['NITI Aayog', 'the RBI', 'economists at IIM Ahmedabad', 'former secretaries', 'the Law Commission']
+MINISTRIES = ['Ministry of Finance', 'Ministry of Home Affairs', 'Ministry of Environment', 'Ministry of External Affairs']
+REPORTS = ['Economic Survey', 'CAG audit report', 'Second ARC report', 'Fifteenth Finance Commission report']
+
+
+def source_name(source_id):
+    return source_id.replace('-', ' ').title()
+
+
+def synthetic_articles(base_url, sources, from_date, to_date):
+    """
+    Deterministic articles for each source, newest first, spread over the date range
+    """
+    try:
+        end = datetime.fromisoformat(to_date[:10]) + timedelta(days=1)
+    except (TypeError, ValueError):
+        end = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    try:
+        start = datetime.fromisoformat(from_date[:10])
+    except (TypeError, ValueError):
+        start = end - timedelta(days=1)
+    days = max(1, (end - start).days)
+
+    articles = []
+    for source in sources:
+        count = ARTICLES_PER_DAY * days
+        step = (end - start) / count
+        for index in range(count):
+            topic = TOPICS[(index + len(source)) % len(TOPICS)]
+            published = end - step * (index + 1) + timedelta(seconds=len(source))
+            articles.append({
+                'source': {'id': source, 'name': source_name(source)},
+                'author': f"{source_name(source)} Bureau",
+                'title': f"{topic} ({source_name(source)} #{index + 1})",
+                'description': f"{topic}, reported by {source_name(source)}.",
+                'url': f"{base_url}/article/{source}/{index + 1}",
+                'urlToImage': None,
+                'publishedAt': published.strftime('%Y-%m-%dT%H:%M:%SZ'),
+                'content': f"{topic}. [+1200 chars]"
+            })
+    articles.sort(key=lambda article: article['publishedAt'], reverse=True)
+    return articles
+
+
+def article_page(source, number):
+    topic = TOPICS[(number - 1 + len(source)) % len(TOPICS)]
+    # Seeded per article so pages differ from each other but not between runs
+    rng = random.Random(f"{source}:{number}")
+    paragraphs = []
+    for _ in range(6):
+        sentences = [
+            template.format(
+                n=rng.randint(2, 99), m=rng.randint(100, 999), k=rng.randint(2, 9),
+                year=rng.randint(1991, 2024), state=rng.choice(STATES), expert=rng.choice(EXPERTS),
+                ministry=rng.choice(MINISTRIES), report=rng.choice(REPORTS)
+            )
+            for template in rng.sample(SENTENCES, 4)
+        ]
+        paragraphs.append(f"<p>{topic}. {' '.join(sentences)}</p>")
+    return (
+        f"<html><head><title>{topic}</title></head><body>"
+        f"<header><nav>Home | India | World | Business</nav></header>"
+        f"<article><h1>{topic}</h1>{''.join(paragraphs)}</article>"
+        f"<aside class=\"related\"><p>Related: more stories from {source_name(source)}</p></aside>"
+        f"</body></html>"
+    )
+
+
+def fixture_key(path, params):
+    params = sorted((key, value) for key, value in params.items() if key != 'apiKey')
+    return hashlib.sha256(f"{path}?{urlencode(params)}".encode('utf-8')).hexdigest()
+
+
+def make_handler(options):
+    """
+    Request handler class bound to the server options
+    """
+    counts = {}
+    counts_lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            if options.get('verbose'):
+                super().log_message(*args)
+
+        def send_body(self, status, body, content_type='application/json', headers=None):
+            data = body.encode('utf-8') if isinstance(body, str) else body
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def send_json(self, status, payload):
+            self.send_body(status, json.dumps(payload))
+
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            params = dict(parse_qsl(parts.query))
+            # Seeded by path and repeat count so injected errors are the same on every run
+            with counts_lock:
+                attempt = counts.get(self.path, 0)
+                counts[self.path] = attempt + 1
+            rng = random.Random(f"{options['seed']}:{self.path}:{attempt}")
+
+            time.sleep(options['latency'])
+            roll = rng.random()
+            if roll < options['throttle_rate']:
+                self.send_json(429, {'status': 'error', 'code': 'rateLimited', 'message': 'Injected rate limit'})
+                return
+            if roll < options['throttle_rate'] + options['error_rate']:
+                self.send_json(500, {'status': 'error', 'code': 'unexpectedError', 'message': 'Injected server error'})
+                return
+
+            if parts.path.startswith('/article/'):
+                self.serve_article(parts.path)
+            elif parts.path in ('/v2/everything', '/v2/top-headlines'):
+                self.serve_news(parts.path, params)
+            else:
+                self.send_json(404, {'status': 'error', 'code': 'notFound', 'message': f"Unknown path {parts.path}"})
+
+        def serve_article(self, path):
+            try:
+                _, _, source, number = path.split('/', 3)
+                html = article_page(source, int(number))
+            except ValueError:
+                self.send_body(404, 'Not found', 'text/plain')
+                return
+            etag = '"' + hashlib.sha1(html.encode('utf-8')).hexdigest() + '"'
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_body(200, html, 'text/html; charset=utf-8', {'ETag': etag})
+
+        def serve_news(self, path, params):
+            key = fixture_key(path, params)
+            fixture = os.path.join(options['fixtures_dir'], f"{key}.json")
+
+            if options.get('record'):
+                response = requests.get(options['record'].rstrip('/') + path, params=params, timeout=30)
+                os.makedirs(options['fixtures_dir'], exist_ok=True)
+                with open(fixture, 'w', encoding='utf-8') as f:
+                    json.dump({'path': path, 'params': {k: v for k, v in params.items() if k != 'apiKey'},
+                               'status': response.status_code, 'body': response.json()}, f, indent=2)
+                self.send_json(response.status_code, response.json())
+                return
+
+            if options.get('replay'):
+                try:
+                    with open(fixture, encoding='utf-8') as f:
+                        recorded = json.load(f)
+                    self.send_json(recorded['status'], recorded['body'])
+                except FileNotFoundError:
+                    self.send_json(404, {'status': 'error', 'code': 'fixtureMissing', 'message': f"No fixture {key}"})
+                return
+
+            if not params.get('apiKey'):
+                self.send_json(401, {'status': 'error', 'code': 'apiKeyMissing', 'message': 'Your API key is missing.'})
+                return
+
+            sources = [source for source in params.get('sources', '').split(',') if source] or UPSC_SOURCES
+            host = self.headers.get('Host') or f"127.0.0.1:{self.server.server_address[1]}"
+            articles = synthetic_articles(f"http://{host}", sources, params.get('from'), params.get('to'))
+            page = max(1, int(params.get('page', 1)))
+            page_size = max(1, min(100, int(params.get('pageSize', 100))))
+            self.send_json(200, {
+                'status': 'ok',
+                'totalResults': len(articles),
+                'articles': articles[(page - 1) * page_size:page * page_size]
+            })
+
+    return Handler
+
+
+def start_server(port=0, latency=0.0, error_rate=0.0, throttle_rate=0.0, seed=0,
+                 record=None, replay=False, fixtures_dir=None, verbose=False):
+    """
+    Start the server on a daemon thread; returns (server, base_url)
+    """
+    options = {
+        'latency': latency,
+        'error_rate': error_rate,
+        'throttle_rate': throttle_rate,
+        'seed': seed,
+        'record': record,
+        'replay': replay,
+        'fixtures_dir': fixtures_dir or NEWS_FIXTURES_DIR,
+        'verbose': verbose
+    }
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(options))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fake-newsapi", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Local NewsAPI-compatible server")
+    arg_parser.add_argument('--port', type=int, default=8765)
+    arg_parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every response")
+    arg_parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of requests answered with 500")
+    arg_parser.add_argument('--throttle-rate', type=float, default=0.0, help="fraction of requests answered with 429")
+    arg_parser.add_argument('--seed', default='0')
+    arg_parser.add_argument('--record', metavar='UPSTREAM', help="proxy to this NewsAPI base URL and save responses")
+    arg_parser.add_argument('--replay', action='store_true', help="serve only saved responses")
+    arg_parser.add_argument('--fixtures-dir', default=NEWS_FIXTURES_DIR)
+    arg_parser.add_argument('--verbose', action='store_true')
+    args = arg_parser.parse_args()
+
+    server, base_url = start_server(
+        args.port, args.latency, args.error_rate, args.throttle_rate, args.seed,
+        args.record, args.replay, args.fixtures_dir, args.verbose
+    )
+    print(f"Fake NewsAPI listening on {base_url} (NEWS_API_URL={base_url}/v2/everything)", flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
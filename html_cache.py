@@ -0,0 +1,137 @@
+import hashlib
+import os
+import threading
+import time
+
+import disk_cache
+import http_client
+
+
+# Cache configuration (override through environment variables)
+HTML_CACHE_DIR = os.getenv(
+    'HTML_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'html')
+)
+HTML_CACHE_ENABLED = os.getenv('HTML_CACHE_ENABLED', '1') != '0'
+HTML_CACHE_MAX_BYTES = int(os.getenv('HTML_CACHE_MAX_BYTES', str(100 * 1024 * 1024)))
+# Pages younger than this are served without asking the server at all
+HTML_CACHE_FRESH_SECONDS = int(os.getenv('HTML_CACHE_FRESH_SECONDS', '600'))
+
+_lock = threading.Lock()
+_stats = {
+    'hits': 0, 'revalidated': 0, 'misses': 0, 'writes': 0,
+    'evictions': 0, 'errors': 0, 'bytes_saved': 0, 'bytes_downloaded': 0
+}
+
+
+def _entry_path(url):
+    key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+    return os.path.join(HTML_CACHE_DIR, key[:2], f"{key}.json.gz")
+
+
+def _count(name, amount=1):
+    with _lock:
+        _stats[name] += amount
+
+
+def _load(url):
+    try:
+        entry = disk_cache.read_entry(_entry_path(url), compress=True)
+    except (OSError, ValueError, EOFError):
+        _count('errors')
+        return None
+    # Different URLs never share an entry, but guard against hash collisions anyway
+    return entry if entry and entry.get('url') == url else None
+
+
+def _store(entry):
+    """
+    Write a compressed entry atomically; its mtime doubles as the LRU timestamp
+    """
+    try:
+        disk_cache.write_entry(_entry_path(entry['url']), entry, compress=True)
+    except OSError as e:
+        print(f"Error writing HTML cache entry: {str(e)}")
+        _count('errors')
+        return
+
+    _count('writes')
+    if disk_cache.prune_due(HTML_CACHE_DIR):
+        prune_html_cache()
+
+
+def fetch_html(url):
+    """
+    Return the HTML of a page, from the cache when possible.
+
+    Fresh entries are served locally; older ones are revalidated with
+    If-None-Match / If-Modified-Since and reused on a 304. Raises on
+    network or HTTP errors like a plain GET with raise_for_status.
+    """
+    if not HTML_CACHE_ENABLED:
+        response = http_client.get(url)
+        response.raise_for_status()
+        return response.text
+
+    entry = _load(url)
+    now = time.time()
+    if entry and now - entry['checked_at'] < HTML_CACHE_FRESH_SECONDS:
+        _count('hits')
+        _count('bytes_saved', entry['size'])
+        disk_cache.touch(_entry_path(url))
+        return entry['html']
+
+    headers = {}
+    if entry and entry.get('etag'):
+        headers['If-None-Match'] = entry['etag']
+    if entry and entry.get('last_modified'):
+        headers['If-Modified-Since'] = entry['last_modified']
+
+    response = http_client.get(url, headers=headers or None)
+    if entry and response.status_code == 304:
+        _count('revalidated')
+        _count('bytes_saved', entry['size'])
+        entry['checked_at'] = now
+        _store(entry)
+        return entry['html']
+
+    response.raise_for_status()
+    _count('misses')
+    _count('bytes_downloaded', len(response.content))
+    _store({
+        'url': url,
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'checked_at': now,
+        'size': len(response.content),
+        'html': response.text
+    })
+    return response.text
+
+
+def prune_html_cache():
+    """
+    Evict least recently used pages until the cache is under its size limit
+    """
+    evicted = disk_cache.prune(HTML_CACHE_DIR, HTML_CACHE_MAX_BYTES, '.json.gz')
+    if evicted:
+        _count('evictions', evicted)
+    return evicted
+
+
+def html_cache_stats():
+    """
+    Return a snapshot of the cache counters
+    """
+    with _lock:
+        stats = dict(_stats)
+    requests = stats['hits'] + stats['revalidated'] + stats['misses']
+    stats['hit_rate'] = (stats['hits'] + stats['revalidated']) / requests if requests else 0.0
+    return stats
+
+
+def clear_html_cache():
+    """
+    Remove every cached page
+    """
+    return disk_cache.clear(HTML_CACHE_DIR)
@@ -0,0 +1,51 @@
+import os
+
+from bs4 import BeautifulSoup
+from bs4.builder import builder_registry
+
+
+# BeautifulSoup tree builder: "auto" picks the fastest installed parser,
+# or name one explicitly ("lxml", "html5lib", "html.parser")
+HTML_PARSER = os.getenv('HTML_PARSER', 'auto')
+
+# Preference order for "auto": C-backed lxml first, pure-Python html.parser as fallback
+PARSER_PREFERENCE = ('lxml', 'html.parser')
+
+_resolved = {}
+
+
+def available_parsers():
+    """
+    Return the parser names BeautifulSoup can use in this environment
+    """
+    return [name for name in ('lxml', 'html5lib', 'html.parser') if builder_registry.lookup(name)]
+
+
+def resolve_parser(name=None):
+    """
+    Map a configured parser name to one that is actually installed
+    """
+    name = name or HTML_PARSER
+    if name in _resolved:
+        return _resolved[name]
+
+    if name == 'auto':
+        resolved = next(
+            (candidate for candidate in PARSER_PREFERENCE if builder_registry.lookup(candidate)),
+            'html.parser'
+        )
+    elif builder_registry.lookup(name):
+        resolved = name
+    else:
+        print(f"HTML parser '{name}' is not installed, falling back to html.parser")
+        resolved = 'html.parser'
+
+    _resolved[name] = resolved
+    return resolved
+
+
+def make_soup(markup, parser=None):
+    """
+    Parse HTML with the configured backend
+    """
+    return BeautifulSoup(markup, resolve_parser(parser))
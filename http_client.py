@@ -0,0 +1,116 @@
+import os
+import threading
+from collections import Counter
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+# HTTP configuration (override through environment variables)
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '5'))
+HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', '20'))
+HTTP_MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', '3'))
+HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', '16'))
+
+# Browser-like headers for news sites that reject the default requests agent
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+# Status codes worth retrying with backoff
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Calls made under rate_limiter.call_limited leave 429 (and its Retry-After)
+# to the limiter, which backs off and lowers its concurrency limit instead of
+# retrying inside a slot
+LIMITED_RETRY_STATUSES = (500, 502, 503, 504)
+
+_lock = threading.Lock()
+_sessions = {}
+_adapters = {}
+_request_counts = Counter()
+
+
+def _build_session(retry_statuses, respect_retry_after=True):
+    """
+    Create a session with per-host connection pools and a bounded retry policy
+    """
+    retry = Retry(
+        total=HTTP_MAX_RETRIES,
+        backoff_factor=0.5,
+        status_forcelist=retry_statuses,
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        respect_retry_after_header=respect_retry_after,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(
+        pool_connections=32,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        max_retries=retry
+    )
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update(DEFAULT_HEADERS)
+    return session, adapter
+
+
+def get_session(limited=False):
+    """
+    Return the process-wide shared session, creating it on first use.
+    limited=True returns the session for rate-limited APIs, which does not retry 429.
+    """
+    name = 'limited' if limited else 'default'
+    session = _sessions.get(name)
+    if session is None:
+        with _lock:
+            if name not in _sessions:
+                _sessions[name], _adapters[name] = (
+                    _build_session(LIMITED_RETRY_STATUSES, respect_retry_after=False) if limited
+                    else _build_session(RETRY_STATUSES)
+                )
+            session = _sessions[name]
+    return session
+
+
+def get(url, params=None, headers=None, timeout=None, limited=False, **kwargs):
+    """
+    GET through the shared session with default connect/read timeouts;
+    pass limited=True for calls wrapped in rate_limiter.call_limited
+    """
+    session = get_session(limited)
+    with _lock:
+        _request_counts[urlsplit(url).netloc] += 1
+    return session.get(
+        url,
+        params=params,
+        headers=headers,
+        timeout=timeout or (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT),
+        **kwargs
+    )
+
+
+def connection_stats():
+    """
+    Per-host request and connection counts; reused = requests served on an existing connection
+    """
+    stats = {}
+    with _lock:
+        for host, count in _request_counts.items():
+            stats[host] = {'calls': count, 'requests': 0, 'connections': 0, 'reused': 0}
+        adapters = list(_adapters.values())
+
+    for adapter in adapters:
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            host = pool.host if pool.port in (None, 80, 443) else f"{pool.host}:{pool.port}"
+            entry = stats.setdefault(host, {'calls': 0, 'requests': 0, 'connections': 0, 'reused': 0})
+            entry['requests'] += pool.num_requests
+            entry['connections'] += pool.num_connections
+            entry['reused'] = max(0, entry['requests'] - entry['connections'])
+
+    return stats
@@ -0,0 +1,377 @@
+"""
+SQLite-backed job queue for notes and quiz generation.
+
+The Streamlit app enqueues a job and polls its status, while a pool of
+worker processes (python job_queue.py --workers 4) claims and runs jobs.
+Work survives Streamlit reruns, and script threads no longer sit on the
+LLM chain. Results land in the notes store; a running notes job also
+publishes its partial text so the UI can show progress.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+
+import notes_store
+from notes_store import article_id_for, get_connection, get_notes, save_notes
+
+# Queue configuration (override through environment variables)
+USE_JOB_QUEUE = os.getenv('USE_JOB_QUEUE', '0') == '1'
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '4'))
+JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', '0.5'))
+# Seconds between heartbeats of a running job, sent whatever stage it is in
+JOB_HEARTBEAT_INTERVAL = float(os.getenv('JOB_HEARTBEAT_INTERVAL', '15'))
+# A running job without a heartbeat for this long is assumed lost and requeued
+JOB_STALE_AFTER = int(os.getenv('JOB_STALE_AFTER', '120'))
+# How long the app keeps following a job before it stops waiting (the job carries on)
+JOB_WAIT_TIMEOUT = int(os.getenv('JOB_WAIT_TIMEOUT', '900'))
+# Seconds the app waits on a running job in one rerun before rerunning to poll it again
+JOB_RERUN_INTERVAL = float(os.getenv('JOB_RERUN_INTERVAL', '1'))
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '3'))
+# Finished jobs are purged after this many seconds
+JOB_RETENTION = int(os.getenv('JOB_RETENTION', str(24 * 60 * 60)))
+
+JOB_KINDS = ('notes', 'quiz')
+ACTIVE_STATUSES = ('queued', 'running')
+FINISHED_STATUSES = ('done', 'failed')
+
+# Minimum seconds between partial-text updates from a streaming notes job
+PROGRESS_INTERVAL = 0.5
+
+# Updates from a worker only apply while the job is still its running attempt,
+# so a worker that was declared stale cannot overwrite a requeued attempt
+OWNED_BY_WORKER = "id = ? AND worker = ? AND status = 'running'"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    article_id TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    partial TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    heartbeat_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, id);
+CREATE INDEX IF NOT EXISTS idx_jobs_article ON jobs (kind, article_id, status);
+"""
+
+_initialized = set()
+_init_lock = threading.Lock()
+
+
+def _connection():
+    """
+    The notes store connection, with the jobs table created on first use
+    """
+    connection = get_connection()
+    with _init_lock:
+        if notes_store.NOTES_DB_PATH not in _initialized:
+            connection.executescript(SCHEMA)
+            connection.commit()
+            _initialized.add(notes_store.NOTES_DB_PATH)
+    return connection
+
+
+def enqueue_job(kind, article, mode=None, content=None):
+    """
+    Queue a notes or quiz job for an article and return its id.
+    An article that already has an active job of the same kind reuses it.
+    """
+    if kind not in JOB_KINDS:
+        raise ValueError(f"Unknown job kind: {kind}")
+
+    article_id = article_id_for(article)
+    payload = json.dumps({
+        'article': {
+            key: article.get(key)
+            for key in ('title', 'url', 'description', 'content', 'source', 'publishedAt')
+        },
+        'mode': mode,
+        'content': content
+    })
+
+    connection = _connection()
+    with connection:
+        existing = connection.execute(
+            "SELECT id FROM jobs WHERE kind = ? AND article_id = ? AND status IN ('queued', 'running') ORDER BY id LIMIT 1",
+            (kind, article_id)
+        ).fetchone()
+        if existing:
+            return existing['id']
+        cursor = connection.execute(
+            "INSERT INTO jobs (kind, article_id, payload, created_at) VALUES (?, ?, ?, ?)",
+            (kind, article_id, payload, time.time())
+        )
+    return cursor.lastrowid
+
+
+def get_job(job_id):
+    """
+    Return a job as a dict, or None
+    """
+    row = _connection().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    return dict(row) if row else None
+
+
+def get_jobs(job_ids):
+    """
+    Return the jobs with the given ids, keyed by id
+    """
+    if not job_ids:
+        return {}
+    placeholders = ','.join('?' for _ in job_ids)
+    rows = _connection().execute(
+        f"SELECT id, kind, article_id, status, error FROM jobs WHERE id IN ({placeholders})", list(job_ids)
+    ).fetchall()
+    return {row['id']: dict(row) for row in rows}
+
+
+def wait_for_job(job_id, timeout=None, on_progress=None, poll_interval=JOB_POLL_INTERVAL):
+    """
+    Poll a job until it finishes or the timeout (seconds) passes and return its last state.
+    on_progress is called with the partial text each time it changes.
+    """
+    deadline = time.monotonic() + timeout if timeout else None
+    last_partial = None
+    while True:
+        job = get_job(job_id)
+        if not job or job['status'] in FINISHED_STATUSES:
+            return job
+        if on_progress and job['partial'] and job['partial'] != last_partial:
+            last_partial = job['partial']
+            on_progress(last_partial)
+        if deadline and time.monotonic() >= deadline:
+            return job
+        time.sleep(poll_interval)
+
+
+def claim_next(worker):
+    """
+    Atomically move the oldest queued job to running and return it, or None when the queue is empty
+    """
+    connection = _connection()
+    now = time.time()
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        # Requeue (or give up on) jobs whose worker stopped sending heartbeats
+        connection.execute(
+            """
+            UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END,
+                error = CASE WHEN attempts >= ? THEN 'Worker timed out' ELSE error END,
+                finished_at = CASE WHEN attempts >= ? THEN ? ELSE finished_at END
+            WHERE status = 'running' AND heartbeat_at < ?
+            """,
+            (JOB_MAX_ATTEMPTS, JOB_MAX_ATTEMPTS, JOB_MAX_ATTEMPTS, now, now - JOB_STALE_AFTER)
+        )
+        row = connection.execute(
+            "SELECT * FROM jobs WHERE status = 'queued' ORDER BY id LIMIT 1"
+        ).fetchone()
+        if row:
+            connection.execute(
+                """
+                UPDATE jobs SET status = 'running', worker = ?, attempts = attempts + 1,
+                    started_at = ?, heartbeat_at = ?
+                WHERE id = ?
+                """,
+                (worker, now, now, row['id'])
+            )
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    return get_job(row['id']) if row else None
+
+
+def update_progress(job, partial):
+    connection = _connection()
+    with connection:
+        connection.execute(
+            f"UPDATE jobs SET partial = ?, heartbeat_at = ? WHERE {OWNED_BY_WORKER}",
+            (partial, time.time(), job['id'], job['worker'])
+        )
+
+
+def send_heartbeat(job):
+    """
+    Mark a running job as alive; returns False once the job is no longer this worker's
+    """
+    connection = _connection()
+    with connection:
+        cursor = connection.execute(
+            f"UPDATE jobs SET heartbeat_at = ? WHERE {OWNED_BY_WORKER}",
+            (time.time(), job['id'], job['worker'])
+        )
+    return cursor.rowcount > 0
+
+
+def heartbeat_loop(job, stop, interval=JOB_HEARTBEAT_INTERVAL):
+    """
+    Send heartbeats for a job until stop is set, covering every stage of the job
+    (article fetch, analysis, quiz generation), not only streamed output
+    """
+    while not stop.wait(interval):
+        try:
+            if not send_heartbeat(job):
+                return
+        except sqlite3.OperationalError as e:
+            print(f"Error sending heartbeat for job {job['id']}: {str(e)}", flush=True)
+
+
+def finish_job(job, error=None):
+    connection = _connection()
+    with connection:
+        connection.execute(
+            f"UPDATE jobs SET status = ?, error = ?, partial = NULL, finished_at = ? WHERE {OWNED_BY_WORKER}",
+            ('failed' if error else 'done', error, time.time(), job['id'], job['worker'])
+        )
+
+
+def purge_finished_jobs(max_age=JOB_RETENTION):
+    connection = _connection()
+    with connection:
+        cursor = connection.execute(
+            "DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?",
+            (time.time() - max_age,)
+        )
+    return cursor.rowcount
+
+
+def queue_stats():
+    """
+    Number of jobs in each status
+    """
+    rows = _connection().execute("SELECT status, COUNT(*) AS count FROM jobs GROUP BY status").fetchall()
+    stats = {status: 0 for status in ACTIVE_STATUSES + FINISHED_STATUSES}
+    stats.update({row['status']: row['count'] for row in rows})
+    return stats
+
+
+def run_notes_job(job, payload):
+    """
+    Generate notes with the streaming pipeline, publishing partial text as it arrives
+    """
+    # Imported here so the Streamlit app can enqueue jobs without loading the worker pipeline
+    from batch_notes import article_text
+    from upsc_notes_generator import generate_upsc_notes_stream
+
+    article = payload['article']
+    if get_notes(job['article_id']):
+        return
+
+    content = payload.get('content') or article_text(article)
+    notes = ""
+    last_update = 0
+    timing = {}
+    for chunk in generate_upsc_notes_stream(article['title'], content, mode=payload.get('mode'), timing=timing):
+        notes += chunk
+        if time.monotonic() - last_update >= PROGRESS_INTERVAL:
+            update_progress(job, notes)
+            last_update = time.monotonic()
+
+    # A stream that failed part-way is never stored, even though some notes arrived
+    if timing['error'] or not notes:
+        raise RuntimeError(timing['error'] or "Empty notes returned")
+    save_notes(article, notes, mode=payload.get('mode'), article_id=job['article_id'])
+
+
+def run_quiz_job(job, payload):
+    from batch_notes import generate_article_quiz
+
+    generate_article_quiz(payload['article'])
+
+
+JOB_RUNNERS = {
+    'notes': run_notes_job,
+    'quiz': run_quiz_job
+}
+
+
+def run_job(job):
+    stop = threading.Event()
+    heartbeat = threading.Thread(target=heartbeat_loop, args=(job, stop), daemon=True)
+    heartbeat.start()
+    try:
+        JOB_RUNNERS[job['kind']](job, json.loads(job['payload']))
+        finish_job(job)
+        return True
+    except Exception as e:
+        print(f"[{datetime.now().isoformat(timespec='seconds')}] Job {job['id']} ({job['kind']}) failed: {str(e)}", flush=True)
+        finish_job(job, error=str(e))
+        return False
+    finally:
+        stop.set()
+        heartbeat.join()
+
+
+def worker_loop(name, poll_interval=JOB_POLL_INTERVAL, max_jobs=None):
+    """
+    Claim and run jobs until max_jobs have run (forever when None)
+    """
+    processed = 0
+    last_purge = 0
+    while max_jobs is None or processed < max_jobs:
+        try:
+            job = claim_next(name)
+        except sqlite3.OperationalError as e:
+            print(f"Error claiming job: {str(e)}", flush=True)
+            time.sleep(poll_interval)
+            continue
+
+        if job is None:
+            if time.monotonic() - last_purge > 60 * 60:
+                purge_finished_jobs()
+                last_purge = time.monotonic()
+            time.sleep(poll_interval)
+            continue
+
+        run_job(job)
+        processed += 1
+
+
+def _worker_main(name, poll_interval):
+    try:
+        worker_loop(name, poll_interval)
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Run the notes/quiz job worker pool")
+    arg_parser.add_argument('--workers', type=int, default=JOB_WORKERS, help="worker processes")
+    arg_parser.add_argument('--poll', type=float, default=JOB_POLL_INTERVAL, help="seconds between polls of an empty queue")
+    args = arg_parser.parse_args()
+
+    # Spawned workers open their own database connections
+    context = multiprocessing.get_context('spawn')
+    processes = [
+        context.Process(target=_worker_main, args=(f"worker-{os.getpid()}-{index}", args.poll), daemon=True)
+        for index in range(max(1, args.workers))
+    ]
+    for process in processes:
+        process.start()
+    print(f"Started {len(processes)} job workers on {notes_store.NOTES_DB_PATH}", flush=True)
+
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        print("Stopping job workers", flush=True)
+        for process in processes:
+            process.terminate()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
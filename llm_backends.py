@@ -0,0 +1,271 @@
+"""
+Model factory with offline stand-ins for Gemini.
+
+LLM_BACKEND selects what create_model() returns:
+    gemini  - the real google.generativeai model (default)
+    fake    - a local model that answers every pipeline prompt with
+              plausible text, with configurable latency and injected errors
+    record  - the real model, saving every response to LLM_FIXTURES_DIR
+    replay  - answers from responses saved by record, with fake latency
+"""
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+from llm_cache import cache_key
+
+
+DEFAULT_MODEL = 'gemini-2.5-flash'
+LLM_BACKENDS = ('gemini', 'fake', 'record', 'replay')
+LLM_BACKEND = os.getenv('LLM_BACKEND', 'gemini')
+LLM_FIXTURES_DIR = os.getenv(
+    'LLM_FIXTURES_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks', 'recordings', 'llm')
+)
+
+# Fake model behaviour (override through environment variables)
+FAKE_LLM_LATENCY = float(os.getenv('FAKE_LLM_LATENCY', '0.2'))
+FAKE_LLM_TOKENS_PER_SECOND = float(os.getenv('FAKE_LLM_TOKENS_PER_SECOND', '400'))
+FAKE_LLM_ERROR_RATE = float(os.getenv('FAKE_LLM_ERROR_RATE', '0'))
+FAKE_LLM_THROTTLE_RATE = float(os.getenv('FAKE_LLM_THROTTLE_RATE', '0'))
+FAKE_LLM_SEED = os.getenv('FAKE_LLM_SEED', '0')
+
+# Words per streamed chunk
+STREAM_CHUNK_WORDS = 12
+
+NOTES_HEADINGS = [
+    'Article Summary', 'Key Facts & Dates', 'Important Names & Roles',
+    'Key Terms & Concepts', 'Government Schemes & Policies', 'Historical Context',
+    'Current Affairs Context', 'UPSC Syllabus Connections', 'Policy Implications',
+    'Practice Questions'
+]
+
+
+class ResourceExhausted(Exception):
+    """
+    Injected quota error, named like the google.api_core exception so it is handled as a 429
+    """
+
+
+class FakeServerError(Exception):
+    pass
+
+
+def prompt_subject(prompt):
+    """
+    The article title (or first content line) a prompt is about
+    """
+    for marker in ('TITLE:', 'Title:'):
+        if marker in prompt:
+            return prompt.split(marker, 1)[1].strip().split('\n', 1)[0].strip() or 'the article'
+    for marker in ('CONTENT:', 'Content:'):
+        if marker in prompt:
+            return ' '.join(prompt.split(marker, 1)[1].split()[:12]) or 'the article'
+    return 'the article'
+
+
+def fake_json(schema, subject):
+    """
+    A value matching a (Gemini-style) JSON schema
+    """
+    kind = str(schema.get('type', 'string')).lower()
+    if schema.get('enum'):
+        return schema['enum'][0]
+    if kind == 'object':
+        return {name: fake_json(field, f"{subject} ({name.replace('_', ' ')})") for name, field in schema.get('properties', {}).items()}
+    if kind == 'array':
+        return [fake_json(schema.get('items', {}), f"{subject}, point {i}") for i in range(1, 4)]
+    if kind == 'boolean':
+        return True
+    if kind in ('integer', 'number'):
+        return 1
+    return f"Key point on {subject}"
+
+
+def fake_quiz_questions(subject):
+    return [{
+        'question': f"Which of the following statements about {subject} is correct? (statement {number})",
+        'options': [f"Statement {option} about {subject}" for option in 'ABCD'],
+        'answer': letter,
+        'explanation': f"Option {letter} reflects the facts reported in the article."
+    } for number, letter in zip(range(1, 6), 'ABCDA')]
+
+
+def fake_quiz(subject):
+    lines = []
+    for number, question in enumerate(fake_quiz_questions(subject), 1):
+        lines.extend([f"## Question {number}", question['question'], ""])
+        lines.extend(f"{letter}) {option}" for letter, option in zip('ABCD', question['options']))
+        lines.extend([
+            "",
+            f"**Answer:** {question['answer']}",
+            f"**Explanation:** {question['explanation']}",
+            ""
+        ])
+    return '\n'.join(lines)
+
+
+def fake_notes(subject, words):
+    lines = [f"# UPSC Notes: {subject}", ""]
+    per_section = max(1, words // (len(NOTES_HEADINGS) * 12))
+    for number, heading in enumerate(NOTES_HEADINGS, 1):
+        lines.append(f"### {number}. {heading}")
+        for point in range(1, per_section + 1):
+            lines.append(f"- {heading} point {point} on {subject}, relevant for GS2 and GS3 with dates and context.")
+        lines.append("")
+    return '\n'.join(lines)
+
+
+def fake_text(prompt, generation_config=None, words=400):
+    """
+    Deterministic response in the shape each pipeline prompt expects
+    """
+    subject = prompt_subject(prompt)
+    if generation_config and generation_config.get('response_schema'):
+        schema = generation_config['response_schema']
+        if 'questions' in schema.get('properties', {}):
+            return json.dumps({'questions': fake_quiz_questions(subject)})
+        return json.dumps(fake_json(schema, subject))
+    if '"INDIA" or "FOREIGN"' in prompt:
+        return "FOREIGN" if 'foreign' in subject.lower() else "INDIA"
+    if 'multiple-choice' in prompt.lower() or 'quiz' in prompt.lower():
+        return fake_quiz(subject)
+    return fake_notes(subject, words)
+
+
+class FakeGenerativeModel:
+    """
+    Drop-in for genai.GenerativeModel.generate_content with injected latency and errors
+    """
+
+    def __init__(self, model_name=DEFAULT_MODEL, latency=None, tokens_per_second=None,
+                 error_rate=None, throttle_rate=None, seed=None):
+        self.model_name = f"models/{model_name}"
+        self.latency = FAKE_LLM_LATENCY if latency is None else latency
+        self.tokens_per_second = tokens_per_second or FAKE_LLM_TOKENS_PER_SECOND
+        self.error_rate = FAKE_LLM_ERROR_RATE if error_rate is None else error_rate
+        self.throttle_rate = FAKE_LLM_THROTTLE_RATE if throttle_rate is None else throttle_rate
+        self.seed = FAKE_LLM_SEED if seed is None else seed
+        self.calls = 0
+        self._lock = threading.Lock()
+        self._attempts = {}
+
+    def _rng(self, prompt):
+        # Seeded by prompt and attempt so runs are repeatable whatever the thread order
+        digest = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+        with self._lock:
+            self.calls += 1
+            attempt = self._attempts.get(digest, 0)
+            self._attempts[digest] = attempt + 1
+        return random.Random(f"{self.seed}:{digest}:{attempt}")
+
+    def response_text(self, prompt, generation_config=None):
+        return fake_text(prompt, generation_config)
+
+    def generate_content(self, prompt, stream=False, generation_config=None, **kwargs):
+        rng = self._rng(prompt)
+        time.sleep(self.latency)
+        roll = rng.random()
+        if roll < self.throttle_rate:
+            raise ResourceExhausted("429 Resource has been exhausted (injected)")
+        if roll < self.throttle_rate + self.error_rate:
+            raise FakeServerError("500 Internal error (injected)")
+
+        text = self.response_text(prompt, generation_config)
+        if not stream:
+            time.sleep(len(text.split()) / self.tokens_per_second)
+            return SimpleNamespace(text=text)
+        return self._stream(text)
+
+    def _stream(self, text):
+        words = text.split(' ')
+        for start in range(0, len(words), STREAM_CHUNK_WORDS):
+            chunk = words[start:start + STREAM_CHUNK_WORDS]
+            time.sleep(len(chunk) / self.tokens_per_second)
+            yield SimpleNamespace(text=' '.join(chunk) + (' ' if start + STREAM_CHUNK_WORDS < len(words) else ''))
+
+
+def fixture_path(fixtures_dir, model_name, prompt, generation_config=None):
+    return os.path.join(fixtures_dir, f"{cache_key(model_name, prompt, generation_config)}.json")
+
+
+class ReplayModel(FakeGenerativeModel):
+    """
+    Answers with responses saved by RecordingModel, timed like the fake model
+    """
+
+    def __init__(self, model_name=DEFAULT_MODEL, fixtures_dir=None, **kwargs):
+        super().__init__(model_name, **kwargs)
+        self.fixtures_dir = fixtures_dir or LLM_FIXTURES_DIR
+
+    def response_text(self, prompt, generation_config=None):
+        path = fixture_path(self.fixtures_dir, self.model_name, prompt, generation_config)
+        try:
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)['text']
+        except FileNotFoundError:
+            raise LookupError(f"No recorded response for this prompt in {self.fixtures_dir} (record it with LLM_BACKEND=record)")
+
+
+class RecordingModel:
+    """
+    Wraps a real model and saves every completed response as a replay fixture
+    """
+
+    def __init__(self, model, fixtures_dir=None):
+        self.model = model
+        self.model_name = model.model_name
+        self.fixtures_dir = fixtures_dir or LLM_FIXTURES_DIR
+
+    def _save(self, prompt, generation_config, text):
+        os.makedirs(self.fixtures_dir, exist_ok=True)
+        path = fixture_path(self.fixtures_dir, self.model_name, prompt, generation_config)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'model': self.model_name,
+                'prompt': prompt,
+                'generation_config': generation_config,
+                'text': text
+            }, f, indent=2, default=str)
+        os.replace(tmp_path, path)
+
+    def generate_content(self, prompt, stream=False, generation_config=None, **kwargs):
+        if generation_config:
+            kwargs['generation_config'] = generation_config
+        if not stream:
+            response = self.model.generate_content(prompt, **kwargs)
+            self._save(prompt, generation_config, response.text)
+            return response
+        return self._record_stream(prompt, generation_config, self.model.generate_content(prompt, stream=True, **kwargs))
+
+    def _record_stream(self, prompt, generation_config, chunks):
+        texts = []
+        for chunk in chunks:
+            texts.append(chunk.text)
+            yield chunk
+        self._save(prompt, generation_config, ''.join(texts))
+
+
+def create_model(model_name=DEFAULT_MODEL, backend=None):
+    """
+    Return the model for the configured LLM_BACKEND
+    """
+    backend = backend or LLM_BACKEND
+    if backend not in LLM_BACKENDS:
+        raise ValueError(f"Unknown LLM_BACKEND {backend!r}; expected one of {', '.join(LLM_BACKENDS)}")
+    if backend == 'fake':
+        return FakeGenerativeModel(model_name)
+    if backend == 'replay':
+        return ReplayModel(model_name)
+
+    import google.generativeai as genai
+
+    model = genai.GenerativeModel(model_name)
+    if backend == 'record':
+        return RecordingModel(model)
+    return model
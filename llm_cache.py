@@ -0,0 +1,257 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+import disk_cache
+from metrics import record_call
+from rate_limiter import RATE_LIMIT_MAX_RETRIES, call_limited, is_throttled, limited
+
+# Cache configuration (override through environment variables)
+CACHE_DIR = os.getenv(
+    'LLM_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'llm')
+)
+CACHE_ENABLED = os.getenv('LLM_CACHE_ENABLED', '1') != '0'
+CACHE_MAX_BYTES = int(os.getenv('LLM_CACHE_MAX_BYTES', str(200 * 1024 * 1024)))
+CACHE_MAX_AGE = int(os.getenv('LLM_CACHE_MAX_AGE', str(7 * 24 * 60 * 60)))
+
+_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0, 'errors': 0}
+
+
+def model_name_of(model):
+    """
+    Return a stable name for a Gemini model object
+    """
+    return getattr(model, 'model_name', None) or type(model).__name__
+
+
+def normalize_prompt(prompt):
+    """
+    Collapse whitespace so that prompts differing only in indentation share a key
+    """
+    return re.sub(r'\s+', ' ', prompt).strip()
+
+
+def cache_key(model_name, prompt, generation_config=None):
+    """
+    Content-addressed key: model name + normalized prompt (+ generation config)
+    """
+    digest = hashlib.sha256()
+    digest.update(model_name.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(normalize_prompt(prompt).encode('utf-8'))
+    if generation_config:
+        digest.update(b'\0')
+        digest.update(json.dumps(generation_config, sort_keys=True, default=str).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _entry_path(key):
+    return os.path.join(CACHE_DIR, key[:2], f"{key}.json")
+
+
+def _count(name, amount=1):
+    with _lock:
+        _stats[name] += amount
+
+
+def get_cached(key):
+    """
+    Return the cached response text for a key, or None on a miss
+    """
+    path = _entry_path(key)
+    try:
+        entry = disk_cache.read_entry(path)
+    except (OSError, ValueError):
+        _count('errors')
+        return None
+    if entry is None:
+        return None
+
+    if time.time() - entry.get('created_at', 0) > CACHE_MAX_AGE:
+        try:
+            os.remove(path)
+            _count('evictions')
+        except OSError:
+            pass
+        return None
+
+    # Touch the entry so size-based eviction drops the least recently used first
+    disk_cache.touch(path)
+
+    return entry.get('text')
+
+
+def put_cached(key, model_name, text):
+    """
+    Store a response text atomically under the given key
+    """
+    entry = {
+        'model': model_name,
+        'created_at': time.time(),
+        'text': text
+    }
+    try:
+        disk_cache.write_entry(_entry_path(key), entry)
+    except OSError as e:
+        print(f"Error writing LLM cache entry: {str(e)}")
+        _count('errors')
+        return
+
+    _count('writes')
+    if disk_cache.prune_due(CACHE_DIR):
+        prune_cache()
+
+
+def prune_cache():
+    """
+    Evict expired entries, then least recently used entries until under the size limit
+    """
+    evicted = disk_cache.prune(CACHE_DIR, CACHE_MAX_BYTES, '.json', max_age=CACHE_MAX_AGE)
+    if evicted:
+        _count('evictions', evicted)
+    return evicted
+
+
+def cached_generate(model, prompt, generation_config=None, stage=None):
+    """
+    Call model.generate_content through the disk cache and return the response text.
+    stage labels the call (e.g. 'classify', 'analysis') in the pipeline metrics.
+    """
+    started = time.perf_counter()
+    outcome = {'cache': 'off', 'usage': None}
+    try:
+        text = _cached_generate(model, prompt, generation_config, outcome)
+    except Exception as e:
+        record_call(stage, model_name_of(model), time.perf_counter() - started, outcome['cache'], prompt, error=e)
+        raise
+    record_call(stage, model_name_of(model), time.perf_counter() - started, outcome['cache'], prompt, text,
+                usage=outcome['usage'])
+    return text
+
+
+def _cached_generate(model, prompt, generation_config, outcome):
+    if not CACHE_ENABLED:
+        return _generate(model, prompt, generation_config, outcome)
+
+    model_name = model_name_of(model)
+    key = cache_key(model_name, prompt, generation_config)
+
+    cached = get_cached(key)
+    if cached is not None:
+        _count('hits')
+        outcome['cache'] = 'hit'
+        return cached
+
+    _count('misses')
+    outcome['cache'] = 'miss'
+    text = _generate(model, prompt, generation_config, outcome)
+    if text:
+        put_cached(key, model_name, text)
+    return text
+
+
+def cached_generate_stream(model, prompt, generation_config=None, stage=None):
+    """
+    Streaming variant of cached_generate: yields response text chunks as they arrive.
+    A cache hit yields the whole stored text at once; a completed stream is stored.
+    """
+    model_name = model_name_of(model)
+    key = cache_key(model_name, prompt, generation_config)
+    started = time.perf_counter()
+    first_chunk = None
+    cache = 'off'
+    chunks = []
+    error = None
+
+    try:
+        if CACHE_ENABLED:
+            cached = get_cached(key)
+            if cached is not None:
+                _count('hits')
+                cache = 'hit'
+                chunks.append(cached)
+                first_chunk = time.perf_counter() - started
+                yield cached
+                return
+            _count('misses')
+            cache = 'miss'
+
+        kwargs = {'stream': True}
+        if generation_config:
+            kwargs['generation_config'] = generation_config
+
+        for attempt in range(RATE_LIMIT_MAX_RETRIES + 1):
+            try:
+                # The slot is held until the stream ends
+                with limited(limiter_key(model), attempt):
+                    for chunk in model.generate_content(prompt, **kwargs):
+                        text = chunk.text
+                        if text:
+                            if first_chunk is None:
+                                first_chunk = time.perf_counter() - started
+                            chunks.append(text)
+                            yield text
+                break
+            except Exception as e:
+                # A 429 before the first chunk is retried; anything later cannot be replayed
+                if chunks or not is_throttled(e) or attempt == RATE_LIMIT_MAX_RETRIES:
+                    raise
+
+        # Only a stream that ran to completion is cached
+        if CACHE_ENABLED and chunks:
+            put_cached(key, model_name, ''.join(chunks))
+
+    except Exception as e:
+        error = e
+        raise
+
+    finally:
+        # Also recorded when the consumer abandons the stream part-way
+        record_call(stage, model_name, time.perf_counter() - started, cache, prompt, ''.join(chunks),
+                    error=error, first_chunk_seconds=first_chunk)
+
+
+def limiter_key(model):
+    """
+    Rate limiter key for a model: Gemini quotas apply per model
+    """
+    return f"gemini:{model_name_of(model)}"
+
+
+def _generate(model, prompt, generation_config=None, outcome=None):
+    # Every generate_content call queues for the shared Gemini rate limits and retries 429s
+    return call_limited(limiter_key(model), _generate_once, model, prompt, generation_config, outcome)
+
+
+def _generate_once(model, prompt, generation_config=None, outcome=None):
+    if generation_config:
+        response = model.generate_content(prompt, generation_config=generation_config)
+    else:
+        response = model.generate_content(prompt)
+    if outcome is not None:
+        # Token counts reported by Gemini (absent on stand-in models)
+        outcome['usage'] = getattr(response, 'usage_metadata', None)
+    return response.text
+
+
+def cache_stats():
+    """
+    Return a snapshot of the hit/miss counters
+    """
+    with _lock:
+        stats = dict(_stats)
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+    return stats
+
+
+def clear_cache():
+    """
+    Remove every cached entry
+    """
+    return disk_cache.clear(CACHE_DIR)
@@ -0,0 +1,360 @@
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+
+
+# Metrics configuration (override through environment variables)
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', '1') != '0'
+# Every LLM call and pipeline run is appended here as one JSON line; empty disables the file
+METRICS_JSONL_PATH = os.getenv(
+    'METRICS_JSONL_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'metrics.jsonl')
+)
+# Once the file grows past this many bytes it is moved to METRICS_JSONL_PATH + '.1'
+# (replacing the previous one), so the sink stays under about twice the limit; 0 never rotates
+METRICS_JSONL_MAX_BYTES = int(os.getenv('METRICS_JSONL_MAX_BYTES', str(20 * 1024 * 1024)))
+# Prometheus text exposition rewritten after every pipeline run (for the node_exporter
+# textfile collector); empty disables it
+METRICS_PROM_PATH = os.getenv('METRICS_PROM_PATH', '')
+
+# Histogram buckets in seconds
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+CHARS_PER_TOKEN = 4
+RECENT_EVENTS = 500
+# load_events reads the sink backwards in blocks of this size
+READ_BLOCK_BYTES = 64 * 1024
+
+_lock = threading.Lock()
+_file_lock = threading.Lock()
+_stages = {}
+_runs = {}
+_recent = deque(maxlen=RECENT_EVENTS)
+_current_run = contextvars.ContextVar('metrics_run', default=None)
+
+
+def estimate_tokens(text):
+    """
+    Rough token count used when the model reports no usage
+    """
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN if text else 0
+
+
+def usage_tokens(usage):
+    """
+    (prompt, response) token counts from a Gemini usage_metadata, or (None, None)
+    """
+    if usage is None:
+        return None, None
+    return getattr(usage, 'prompt_token_count', None), getattr(usage, 'candidates_token_count', None)
+
+
+def _new_series():
+    return {
+        'calls': 0, 'errors': 0, 'seconds': 0.0,
+        'buckets': [0] * len(LATENCY_BUCKETS)
+    }
+
+
+def _observe(series, seconds, error):
+    series['calls'] += 1
+    series['seconds'] += seconds
+    if error:
+        series['errors'] += 1
+    for i, bound in enumerate(LATENCY_BUCKETS):
+        if seconds <= bound:
+            series['buckets'][i] += 1
+
+
+def _write_event(event):
+    if not METRICS_JSONL_PATH:
+        return
+    line = json.dumps(event, default=str) + '\n'
+    try:
+        os.makedirs(os.path.dirname(METRICS_JSONL_PATH) or '.', exist_ok=True)
+        # One short append per event, so lines from several processes do not interleave
+        with _file_lock:
+            with open(METRICS_JSONL_PATH, 'a', encoding='utf-8') as f:
+                f.write(line)
+                size = f.tell()
+            # Re-checked because another process sharing the file may have just rotated it
+            if METRICS_JSONL_MAX_BYTES and size >= METRICS_JSONL_MAX_BYTES \
+                    and os.path.getsize(METRICS_JSONL_PATH) >= METRICS_JSONL_MAX_BYTES:
+                os.replace(METRICS_JSONL_PATH, f"{METRICS_JSONL_PATH}.1")
+    except OSError as e:
+        print(f"Error writing metrics: {str(e)}")
+
+
+def record_call(stage, model, seconds, cache, prompt, response=None, error=None,
+                usage=None, first_chunk_seconds=None):
+    """
+    Record one LLM call: its stage label, latency, cache status ('hit',
+    'miss' or 'off'), prompt/response size and any error
+    """
+    if not METRICS_ENABLED:
+        return
+
+    prompt_tokens, response_tokens = usage_tokens(usage)
+    run = _current_run.get()
+    event = {
+        'type': 'call',
+        'ts': time.time(),
+        'run_id': run['run_id'] if run else None,
+        'pipeline': run['pipeline'] if run else None,
+        'stage': stage or 'generate',
+        'model': model,
+        'cache': cache,
+        'seconds': round(seconds, 4),
+        'first_chunk_seconds': round(first_chunk_seconds, 4) if first_chunk_seconds is not None else None,
+        'prompt_chars': len(prompt),
+        'response_chars': len(response or ''),
+        'prompt_tokens': prompt_tokens if prompt_tokens is not None else estimate_tokens(prompt),
+        'response_tokens': response_tokens if response_tokens is not None else estimate_tokens(response or ''),
+        'tokens_estimated': prompt_tokens is None,
+        'error': f"{type(error).__name__}: {str(error)[:200]}" if error else None
+    }
+
+    with _lock:
+        series = _stages.setdefault(event['stage'], {
+            **_new_series(), 'hits': 0, 'misses': 0,
+            'prompt_chars': 0, 'response_chars': 0, 'prompt_tokens': 0, 'response_tokens': 0,
+            'error_types': {}
+        })
+        _observe(series, seconds, error)
+        if cache == 'hit':
+            series['hits'] += 1
+        elif cache == 'miss':
+            series['misses'] += 1
+        for field in ('prompt_chars', 'response_chars', 'prompt_tokens', 'response_tokens'):
+            series[field] += event[field]
+        if error:
+            name = type(error).__name__
+            series['error_types'][name] = series['error_types'].get(name, 0) + 1
+        _recent.append(event)
+    _write_event(event)
+
+
+@contextmanager
+def pipeline_run(pipeline, **labels):
+    """
+    Time one pipeline run (such as 'notes' or 'quiz'); LLM calls made inside
+    are tagged with its run id. Set run['error'] for failures the pipeline
+    handles itself instead of raising.
+    """
+    run = {'run_id': uuid.uuid4().hex[:12], 'pipeline': pipeline, 'error': None, **labels}
+    token = _current_run.set(run)
+    started = time.perf_counter()
+    try:
+        yield run
+    except Exception as e:
+        run['error'] = f"{type(e).__name__}: {str(e)[:200]}"
+        raise
+    finally:
+        try:
+            _current_run.reset(token)
+        except ValueError:
+            # A streamed run resumed in another context
+            pass
+        if METRICS_ENABLED:
+            _finish_run(run, time.perf_counter() - started)
+
+
+def _finish_run(run, seconds):
+    event = {'type': 'run', 'ts': time.time(), **run, 'seconds': round(seconds, 4)}
+    with _lock:
+        _observe(_runs.setdefault(run['pipeline'], _new_series()), seconds, run['error'])
+        _recent.append(event)
+    _write_event(event)
+    if METRICS_PROM_PATH:
+        write_prometheus(METRICS_PROM_PATH)
+
+
+def run_in_context(fn):
+    """
+    Wrap fn so that worker threads tag their calls with the caller's pipeline run
+    """
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.copy().run(fn, *args, **kwargs)
+
+
+def metrics_stats():
+    """
+    Per-stage and per-pipeline totals for this process
+    """
+    with _lock:
+        stages = {name: {**series, 'error_types': dict(series['error_types'])} for name, series in _stages.items()}
+        runs = {name: dict(series) for name, series in _runs.items()}
+    for series in list(stages.values()) + list(runs.values()):
+        series['avg_seconds'] = series['seconds'] / series['calls'] if series['calls'] else 0.0
+        series.pop('buckets')
+    return {'stages': stages, 'runs': runs}
+
+
+def recent_events():
+    with _lock:
+        return list(_recent)
+
+
+def _tail_lines(path, limit):
+    """
+    The last `limit` lines of a file, read backwards so only its end is loaded
+    """
+    if limit <= 0 or not os.path.exists(path):
+        return []
+    with open(path, 'rb') as f:
+        position = f.seek(0, os.SEEK_END)
+        data = b''
+        newlines = 0
+        while position > 0 and newlines <= limit:
+            step = min(READ_BLOCK_BYTES, position)
+            position -= step
+            f.seek(position)
+            block = f.read(step)
+            newlines += block.count(b'\n')
+            data = block + data
+    lines = data.splitlines()
+    if position > 0:
+        # The first line read may have started before the window
+        lines = lines[1:]
+    return lines[-limit:]
+
+
+def load_events(path=None, limit=5000):
+    """
+    The last `limit` events from the JSONL sink (all processes that share it),
+    topped up from the rotated file when the current one holds fewer
+    """
+    path = path or METRICS_JSONL_PATH
+    if not path:
+        return []
+    lines = _tail_lines(path, limit)
+    lines = _tail_lines(f"{path}.1", limit - len(lines)) + lines
+    events = []
+    for line in lines:
+        try:
+            events.append(json.loads(line))
+        except ValueError:
+            continue
+    return events
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def summarise_events(events):
+    """
+    Per-stage and per-pipeline rows (calls, errors, hit rate, p50/p95 latency, tokens) for a list of events
+    """
+    groups = {}
+    for event in events:
+        key = (event['type'], event.get('stage') if event['type'] == 'call' else event.get('pipeline'))
+        groups.setdefault(key, []).append(event)
+
+    rows = []
+    for (kind, name), group in sorted(groups.items(), key=lambda item: (item[0][0], str(item[0][1]))):
+        latencies = [event['seconds'] for event in group]
+        row = {
+            'kind': 'stage' if kind == 'call' else 'pipeline',
+            'name': name,
+            'count': len(group),
+            'errors': sum(1 for event in group if event.get('error')),
+            'p50_seconds': percentile(latencies, 0.5),
+            'p95_seconds': percentile(latencies, 0.95),
+            'total_seconds': sum(latencies)
+        }
+        if kind == 'call':
+            lookups = [event for event in group if event.get('cache') in ('hit', 'miss')]
+            row.update({
+                'hit_rate': sum(1 for event in lookups if event['cache'] == 'hit') / len(lookups) if lookups else None,
+                'prompt_tokens': sum(event.get('prompt_tokens') or 0 for event in group),
+                'response_tokens': sum(event.get('response_tokens') or 0 for event in group)
+            })
+        rows.append(row)
+    return rows
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', ' ')
+
+
+def prometheus_text():
+    """
+    This process's metrics in the Prometheus text exposition format
+    """
+    with _lock:
+        stages = {name: {**series, 'buckets': list(series['buckets'])} for name, series in _stages.items()}
+        runs = {name: {**series, 'buckets': list(series['buckets'])} for name, series in _runs.items()}
+
+    lines = []
+
+    def histogram(metric, help_text, label, series_by_name):
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} histogram")
+        for name, series in sorted(series_by_name.items()):
+            labels = f'{label}="{_label(name)}"'
+            for bound, count in zip(LATENCY_BUCKETS, series['buckets']):
+                lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {series["calls"]}')
+            lines.append(f'{metric}_sum{{{labels}}} {series["seconds"]:.6f}')
+            lines.append(f'{metric}_count{{{labels}}} {series["calls"]}')
+
+    def counter(metric, help_text, values):
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} counter")
+        for labels, value in values:
+            lines.append(f"{metric}{{{labels}}} {value}")
+
+    histogram('upsc_llm_call_seconds', 'LLM call latency by pipeline stage', 'stage', stages)
+    counter('upsc_llm_call_errors_total', 'Failed LLM calls by stage and error type', [
+        (f'stage="{_label(stage)}",error="{_label(error)}"', count)
+        for stage, series in sorted(stages.items()) for error, count in sorted(series['error_types'].items())
+    ])
+    counter('upsc_llm_cache_lookups_total', 'Response cache lookups by stage and result', [
+        (f'stage="{_label(stage)}",result="{result}"', series['hits' if result == 'hit' else 'misses'])
+        for stage, series in sorted(stages.items()) for result in ('hit', 'miss')
+    ])
+    counter('upsc_llm_tokens_total', 'Prompt and response tokens by stage (estimated when the model reports none)', [
+        (f'stage="{_label(stage)}",direction="{direction}"', series[f"{direction}_tokens"])
+        for stage, series in sorted(stages.items()) for direction in ('prompt', 'response')
+    ])
+    counter('upsc_llm_chars_total', 'Prompt and response characters by stage', [
+        (f'stage="{_label(stage)}",direction="{direction}"', series[f"{direction}_chars"])
+        for stage, series in sorted(stages.items()) for direction in ('prompt', 'response')
+    ])
+    histogram('upsc_pipeline_run_seconds', 'End-to-end pipeline run latency', 'pipeline', runs)
+    counter('upsc_pipeline_run_errors_total', 'Failed pipeline runs', [
+        (f'pipeline="{_label(name)}"', series['errors']) for name, series in sorted(runs.items())
+    ])
+    return '\n'.join(lines) + '\n'
+
+
+def write_prometheus(path):
+    """
+    Atomically rewrite a Prometheus textfile with this process's metrics
+    """
+    try:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(prometheus_text())
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Error writing Prometheus metrics: {str(e)}")
+
+
+def reset_metrics():
+    """
+    Clear this process's counters (the JSONL file is kept)
+    """
+    with _lock:
+        _stages.clear()
+        _runs.clear()
+        _recent.clear()
@@ -0,0 +1,120 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+
+
+# UPSC-relevant NewsAPI source ids
+UPSC_SOURCES = [
+    'the-hindu',
+    'the-times-of-india',
+    'the-indian-express',
+    'the-wire',
+    'scroll-in',
+    'the-quint'
+]
+
+# Cache configuration (override through environment variables)
+NEWS_CACHE_TTL = int(os.getenv('NEWS_CACHE_TTL', '900'))
+NEWS_CACHE_MAX_ENTRIES = int(os.getenv('NEWS_CACHE_MAX_ENTRIES', '256'))
+
+# Process-wide cache shared by every Streamlit session
+_lock = threading.Lock()
+_entries = OrderedDict()
+_refreshing = set()
+_stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'refreshes': 0, 'errors': 0}
+
+
+def _is_past_range(to_date):
+    """
+    A date range that ended before today will not change any more
+    """
+    try:
+        return date.fromisoformat(str(to_date)[:10]) < date.today()
+    except ValueError:
+        return False
+
+
+def _count(name):
+    with _lock:
+        _stats[name] += 1
+
+
+def _store(key, value, immutable):
+    with _lock:
+        _entries[key] = {
+            'value': value,
+            'fetched_at': time.time(),
+            'immutable': immutable
+        }
+        _entries.move_to_end(key)
+        while len(_entries) > NEWS_CACHE_MAX_ENTRIES:
+            _entries.popitem(last=False)
+
+
+def _refresh_in_background(key, fetch, immutable):
+    """
+    Re-fetch a stale entry on a daemon thread while readers keep the old value
+    """
+    with _lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+
+    def run():
+        try:
+            value = fetch()
+            if value and value.get('status') == 'ok':
+                _store(key, value, immutable)
+                _count('refreshes')
+        except Exception as e:
+            print(f"Error refreshing news cache: {str(e)}")
+            _count('errors')
+        finally:
+            with _lock:
+                _refreshing.discard(key)
+
+    threading.Thread(target=run, name="news-cache-refresh", daemon=True).start()
+
+
+def cached_fetch(key, fetch, to_date):
+    """
+    Serve a NewsAPI response from memory, fetching on a miss and refreshing stale entries in the background
+    """
+    immutable = _is_past_range(to_date)
+
+    with _lock:
+        entry = _entries.get(key)
+        if entry:
+            _entries.move_to_end(key)
+
+    if entry:
+        if entry['immutable'] or time.time() - entry['fetched_at'] < NEWS_CACHE_TTL:
+            _count('hits')
+        else:
+            _count('stale_hits')
+            _refresh_in_background(key, fetch, immutable)
+        return entry['value']
+
+    _count('misses')
+    value = fetch()
+    # Only successful responses are cached so errors are retried on the next rerun
+    if value and value.get('status') == 'ok':
+        _store(key, value, immutable)
+    return value
+
+
+def news_cache_stats():
+    """
+    Return a snapshot of the cache counters
+    """
+    with _lock:
+        stats = dict(_stats)
+        stats['entries'] = len(_entries)
+    return stats
+
+
+def clear_news_cache():
+    with _lock:
+        _entries.clear()
@@ -0,0 +1,133 @@
+import heapq
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import http_client
+from news_cache import cached_fetch
+from rate_limiter import call_limited
+from notes_store import canonical_url
+
+
+# NewsAPI fetching (override through environment variables)
+NEWS_API_URL = os.getenv('NEWS_API_URL', 'https://newsapi.org/v2/everything')
+NEWS_PAGE_SIZE = int(os.getenv('NEWS_PAGE_SIZE', '100'))
+NEWS_MAX_PAGES = int(os.getenv('NEWS_MAX_PAGES', '5'))
+NEWS_FETCH_CONCURRENCY = int(os.getenv('NEWS_FETCH_CONCURRENCY', '6'))
+
+# NewsAPI error codes that just mean there are no more pages to read
+END_OF_RESULTS_CODES = ('maximumResultsReached',)
+
+
+def fetch_page(params, page, page_size, api_key):
+    """
+    Fetch one page of /v2/everything results through the shared news cache
+    """
+    params = {key: value for key, value in params.items() if value is not None}
+    key = ('http-everything', NEWS_API_URL, tuple(sorted(params.items())), page, page_size)
+
+    def fetch():
+        response = call_limited('newsapi', http_client.get, NEWS_API_URL, params={
+            **params,
+            'page': page,
+            'pageSize': page_size,
+            'apiKey': api_key
+        }, limited=True)
+        return response.json()
+
+    return cached_fetch(key, fetch, params.get('to'))
+
+
+def is_valid_article(article):
+    """
+    True when an article has every field the UI shows and was not removed at the source
+    """
+    source = article.get('source')
+    return bool(
+        article.get('title') and article.get('title') != '[Removed]' and
+        article.get('url') and
+        article.get('description') and
+        isinstance(source, dict) and source.get('name') and
+        article.get('publishedAt')
+    )
+
+
+def _query_stream(pool, params, first_page, api_key, page_size, max_pages, errors):
+    """
+    Yield one query's articles page by page, newest first.
+
+    Once the first page reports how many results exist, every remaining
+    page is submitted to the pool at once so they download concurrently.
+    """
+    label = params.get('sources') or params.get('domains') or params.get('q')
+    pages = [first_page]
+    started = False
+    page_number = 0
+    while page_number < len(pages):
+        try:
+            data = pages[page_number].result()
+        except Exception as e:
+            errors.append(f"{label} page {page_number + 1}: {str(e)}")
+            return
+        page_number += 1
+
+        if not data or data.get('status') != 'ok':
+            data = data or {}
+            if data.get('code') not in END_OF_RESULTS_CODES:
+                errors.append(f"{label} page {page_number}: {data.get('message', 'no response')}")
+            return
+
+        if not started:
+            started = True
+            total_pages = -(-(data.get('totalResults') or 0) // page_size)
+            pages.extend(
+                pool.submit(fetch_page, params, page, page_size, api_key)
+                for page in range(2, min(total_pages, max_pages) + 1)
+            )
+
+        for article in data.get('articles') or []:
+            yield article
+
+
+def iter_articles(queries, from_date, to_date, api_key, page_size=None, max_pages=None,
+                  max_workers=None, errors=None):
+    """
+    Lazily yield the articles of several NewsAPI queries merged newest first.
+
+    queries is a list of /v2/everything parameter dicts (for example
+    {'sources': 'the-hindu'} or {'q': 'UPSC'}); each is fetched over up to
+    max_pages pages, all concurrently. Results are heap-merged by publishedAt
+    and de-duplicated by canonical URL, so the first articles can be shown
+    as soon as the first page of every query has arrived. Fetch errors are
+    appended to the optional errors list and end that query's results.
+    """
+    page_size = page_size or NEWS_PAGE_SIZE
+    max_pages = max_pages or NEWS_MAX_PAGES
+    max_workers = max_workers or NEWS_FETCH_CONCURRENCY
+    errors = errors if errors is not None else []
+
+    pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="news-fetch")
+    try:
+        # Submit every query's first page up front; generators only start when merged
+        streams = []
+        for query in queries:
+            params = {**query, 'from': from_date, 'to': to_date, 'language': 'en', 'sortBy': 'publishedAt'}
+            first_page = pool.submit(fetch_page, params, 1, page_size, api_key)
+            streams.append(_query_stream(pool, params, first_page, api_key, page_size, max_pages, errors))
+        seen = set()
+        for article in heapq.merge(*streams, key=lambda article: article.get('publishedAt') or '', reverse=True):
+            url = article.get('url') or ''
+            key = canonical_url(url) if url.startswith(('http://', 'https://')) else article.get('title')
+            if key in seen:
+                continue
+            seen.add(key)
+            yield article
+    finally:
+        # Stop downloading pages nobody will read when the caller stops early
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def fetch_articles(queries, from_date, to_date, api_key, **kwargs):
+    """
+    Every article of iter_articles as a list
+    """
+    return list(iter_articles(queries, from_date, to_date, api_key, **kwargs))
@@ -0,0 +1,562 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from quiz_parser import parse_quiz
+
+
+# Location of the notes database (override through environment variables)
+NOTES_DB_PATH = os.getenv(
+    'NOTES_DB_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'upsc_notes.db')
+)
+
+# Query parameters that only track the visitor and never change the article
+TRACKING_PARAMS = re.compile(r'^(utm_.*|fbclid|gclid|ref|ref_src|from|source|cmp|s_cid)$', re.IGNORECASE)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS notes (
+    article_id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    url TEXT,
+    source TEXT,
+    published_at TEXT,
+    content TEXT NOT NULL,
+    mode TEXT,
+    headings TEXT,
+    papers TEXT,
+    saved INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_notes_created_at ON notes (created_at);
+CREATE TABLE IF NOT EXISTS note_aliases (
+    alias_id TEXT PRIMARY KEY,
+    article_id TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_note_aliases_article_id ON note_aliases (article_id);
+CREATE TABLE IF NOT EXISTS quizzes (
+    article_id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS quiz_questions (
+    article_id TEXT NOT NULL,
+    question_hash TEXT NOT NULL,
+    question TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    PRIMARY KEY (article_id, question_hash)
+);
+"""
+
+# Article id of the note that stands for an alias (a near-duplicate article)
+RESOLVE_ALIAS = "COALESCE((SELECT article_id FROM note_aliases WHERE alias_id = ?), ?)"
+
+# Columns added after the first release; older databases are migrated in place
+MIGRATED_COLUMNS = {
+    'headings': 'TEXT',
+    'papers': 'TEXT'
+}
+
+# External-content FTS5 index over the notes table, kept in sync by triggers.
+# Saving/unsaving a note does not touch the indexed columns, so it skips the index.
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE notes_fts USING fts5(
+    title, headings, content,
+    content='notes', content_rowid='rowid',
+    tokenize='porter unicode61'
+);
+CREATE TRIGGER notes_fts_insert AFTER INSERT ON notes BEGIN
+    INSERT INTO notes_fts (rowid, title, headings, content)
+    VALUES (new.rowid, new.title, new.headings, new.content);
+END;
+CREATE TRIGGER notes_fts_delete AFTER DELETE ON notes BEGIN
+    INSERT INTO notes_fts (notes_fts, rowid, title, headings, content)
+    VALUES ('delete', old.rowid, old.title, old.headings, old.content);
+END;
+CREATE TRIGGER notes_fts_update AFTER UPDATE OF title, headings, content ON notes BEGIN
+    INSERT INTO notes_fts (notes_fts, rowid, title, headings, content)
+    VALUES ('delete', old.rowid, old.title, old.headings, old.content);
+    INSERT INTO notes_fts (rowid, title, headings, content)
+    VALUES (new.rowid, new.title, new.headings, new.content);
+END;
+"""
+
+# Relative weight of title, headings and body text in bm25 ranking
+FTS_WEIGHTS = (5.0, 3.0, 1.0)
+
+# Syllabus papers, detected from the paper references the notes prompts ask for
+SYLLABUS_PAPERS = ['GS1', 'GS2', 'GS3', 'GS4', 'Essay', 'Prelims']
+PAPER_PATTERNS = {
+    paper: re.compile(pattern, re.IGNORECASE)
+    for paper, pattern in {
+        'GS1': r'\b(?:GS|General Studies)[\s-]*(?:Paper[\s-]*)?(?:I|1)\b',
+        'GS2': r'\b(?:GS|General Studies)[\s-]*(?:Paper[\s-]*)?(?:II|2)\b',
+        'GS3': r'\b(?:GS|General Studies)[\s-]*(?:Paper[\s-]*)?(?:III|3)\b',
+        'GS4': r'\b(?:GS|General Studies)[\s-]*(?:Paper[\s-]*)?(?:IV|4)\b|\bEthics\b',
+        'Essay': r'\bEssay\b',
+        'Prelims': r'\bPrelim(?:s|inary)?\b'
+    }.items()
+}
+
+# Markdown headings, bold-only lines and short numbered section titles
+HEADING_RE = re.compile(
+    r'^\s*(?:#{1,6}\s+(?P<markdown>.+?)\s*#*|\*\*(?P<bold>[^*]{2,80})\*\*:?|\d{1,2}\.\s+(?P<numbered>[^.:\n]{2,60}):?)\s*$',
+    re.MULTILINE
+)
+
+FTS_AVAILABLE = None
+
+_local = threading.local()
+_initialized = set()
+_init_lock = threading.Lock()
+
+
+def get_connection():
+    """
+    Return this thread's connection to the notes database, creating the schema on first use
+    """
+    connection = getattr(_local, 'connection', None)
+    if connection is not None and getattr(_local, 'path', None) == NOTES_DB_PATH:
+        return connection
+
+    directory = os.path.dirname(NOTES_DB_PATH)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    connection = sqlite3.connect(NOTES_DB_PATH, timeout=30)
+    connection.row_factory = sqlite3.Row
+    # WAL lets Streamlit sessions read while another session writes
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+
+    with _init_lock:
+        if NOTES_DB_PATH not in _initialized:
+            init_schema(connection)
+            _initialized.add(NOTES_DB_PATH)
+
+    _local.connection = connection
+    _local.path = NOTES_DB_PATH
+    return connection
+
+
+def init_schema(connection):
+    """
+    Create the notes table, add columns missing from older databases and set up the FTS index
+    """
+    global FTS_AVAILABLE
+
+    bank_exists = connection.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'quiz_questions'"
+    ).fetchone()
+    connection.executescript(SCHEMA)
+    if not bank_exists:
+        backfill_question_bank(connection)
+    columns = {row['name'] for row in connection.execute("PRAGMA table_info(notes)")}
+    added = [name for name in MIGRATED_COLUMNS if name not in columns]
+    for name in added:
+        connection.execute(f"ALTER TABLE notes ADD COLUMN {name} {MIGRATED_COLUMNS[name]}")
+    if added:
+        backfill_search_fields(connection)
+
+    exists = connection.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'notes_fts'"
+    ).fetchone()
+    if exists:
+        FTS_AVAILABLE = True
+    else:
+        try:
+            connection.executescript(FTS_SCHEMA)
+            connection.execute("INSERT INTO notes_fts (notes_fts) VALUES ('rebuild')")
+            FTS_AVAILABLE = True
+        except sqlite3.OperationalError as e:
+            # SQLite built without FTS5: search falls back to LIKE matching
+            print(f"Full-text search unavailable, using LIKE search: {str(e)}")
+            FTS_AVAILABLE = False
+    connection.commit()
+
+
+def backfill_search_fields(connection):
+    rows = connection.execute(
+        "SELECT article_id, content FROM notes WHERE headings IS NULL OR papers IS NULL"
+    ).fetchall()
+    for row in rows:
+        connection.execute(
+            "UPDATE notes SET headings = ?, papers = ? WHERE article_id = ?",
+            (extract_headings(row['content']), detect_papers(row['content']), row['article_id'])
+        )
+
+
+def backfill_question_bank(connection):
+    """
+    Fill the question bank from quizzes stored before it existed
+    """
+    for row in connection.execute("SELECT article_id, content FROM quizzes").fetchall():
+        add_questions(connection, row['article_id'], parse_quiz(row['content']))
+
+
+def extract_headings(content):
+    """
+    Return the section headings of a note, one per line
+    """
+    headings = []
+    for match in HEADING_RE.finditer(content or ''):
+        heading = match.group('markdown') or match.group('bold') or match.group('numbered')
+        heading = heading.strip(' *#:')
+        if heading:
+            headings.append(heading)
+    return '\n'.join(headings)
+
+
+def detect_papers(content):
+    """
+    Comma-separated syllabus papers (GS1-GS4, Essay, Prelims) referenced in a note
+    """
+    return ','.join(paper for paper in SYLLABUS_PAPERS if PAPER_PATTERNS[paper].search(content or ''))
+
+
+def canonical_url(url):
+    """
+    Normalise an article URL so that tracking parameters, fragments and
+    host/scheme variations map to the same article
+    """
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not TRACKING_PARAMS.match(key)
+    ))
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit(('https', host, path, query, ''))
+
+
+def article_id_for(article):
+    """
+    Canonical id for an article dict: its canonical URL, or its title and text when it has no URL
+    """
+    url = article.get('url') or ''
+    if url.startswith(('http://', 'https://')):
+        return 'url:' + hashlib.sha1(canonical_url(url).encode('utf-8')).hexdigest()
+
+    text = ' '.join([
+        article.get('title') or '',
+        article.get('description') or article.get('content') or ''
+    ])
+    text = re.sub(r'\s+', ' ', text).strip().lower()
+    return 'text:' + hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def resolve_alias(article_id):
+    """
+    Return the article id whose notes an article shares, or the id itself
+    """
+    row = get_connection().execute(
+        "SELECT article_id FROM note_aliases WHERE alias_id = ?", (article_id,)
+    ).fetchone()
+    return row['article_id'] if row else article_id
+
+
+def link_alias(alias_id, article_id):
+    """
+    Make a near-duplicate article share the notes and quiz of another article
+    """
+    article_id = resolve_alias(article_id)
+    if alias_id == article_id:
+        return
+    connection = get_connection()
+    with connection:
+        connection.execute(
+            "INSERT OR REPLACE INTO note_aliases (alias_id, article_id, created_at) VALUES (?, ?, ?)",
+            (alias_id, article_id, datetime.now().isoformat(timespec='seconds'))
+        )
+        # Keep aliases one level deep when the alias itself had aliases
+        connection.execute(
+            "UPDATE note_aliases SET article_id = ? WHERE article_id = ?",
+            (article_id, alias_id)
+        )
+
+
+def get_notes(article_id):
+    """
+    Return the notes text for an article (or the article it is an alias of), or None
+    """
+    row = get_connection().execute(
+        f"SELECT content FROM notes WHERE article_id = {RESOLVE_ALIAS}", (article_id, article_id)
+    ).fetchone()
+    return row['content'] if row else None
+
+
+def notes_available(article_ids):
+    """
+    Return the subset of article ids that have stored notes (directly or through an alias),
+    without reading the notes themselves
+    """
+    article_ids = list(article_ids)
+    if not article_ids:
+        return set()
+    placeholders = ','.join('?' * len(article_ids))
+    connection = get_connection()
+    direct = connection.execute(
+        f"SELECT article_id FROM notes WHERE article_id IN ({placeholders})", article_ids
+    ).fetchall()
+    aliased = connection.execute(
+        f"SELECT a.alias_id FROM note_aliases a JOIN notes n ON n.article_id = a.article_id "
+        f"WHERE a.alias_id IN ({placeholders})", article_ids
+    ).fetchall()
+    return {row[0] for row in direct} | {row[0] for row in aliased}
+
+
+def save_notes(article, content, mode=None, article_id=None):
+    """
+    Insert or replace the notes for an article; keeps the saved flag of an existing row
+    """
+    article_id = article_id or article_id_for(article)
+    source = article.get('source')
+    if isinstance(source, dict):
+        source = source.get('name')
+    now = datetime.now().isoformat(timespec='seconds')
+
+    connection = get_connection()
+    with connection:
+        connection.execute(
+            """
+            INSERT INTO notes (article_id, title, url, source, published_at, content, mode, headings, papers, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(article_id) DO UPDATE SET
+                title = excluded.title,
+                url = excluded.url,
+                source = excluded.source,
+                published_at = excluded.published_at,
+                content = excluded.content,
+                mode = excluded.mode,
+                headings = excluded.headings,
+                papers = excluded.papers,
+                updated_at = excluded.updated_at
+            """,
+            (
+                article_id,
+                article.get('title') or 'Untitled article',
+                article.get('url'),
+                source,
+                article.get('publishedAt'),
+                content,
+                mode,
+                extract_headings(content),
+                detect_papers(content),
+                now,
+                now
+            )
+        )
+    return article_id
+
+
+def set_saved(article_id, saved=True):
+    """
+    Mark (or unmark) a note as saved by the user
+    """
+    connection = get_connection()
+    with connection:
+        connection.execute(
+            "UPDATE notes SET saved = ? WHERE article_id = ?",
+            (1 if saved else 0, article_id)
+        )
+
+
+def delete_notes(article_id):
+    """
+    Delete an article's notes and the aliases that shared them
+    """
+    connection = get_connection()
+    with connection:
+        connection.execute("DELETE FROM notes WHERE article_id = ?", (article_id,))
+        connection.execute("DELETE FROM note_aliases WHERE article_id = ?", (article_id,))
+
+
+def list_notes(saved=None, limit=100, offset=0):
+    """
+    Return stored notes, newest first; saved=True/False filters by the saved flag
+    """
+    query = "SELECT * FROM notes"
+    params = []
+    if saved is not None:
+        query += " WHERE saved = ?"
+        params.append(1 if saved else 0)
+    query += " ORDER BY created_at DESC LIMIT ? OFFSET ?"
+    params.extend([limit, offset])
+    return [dict(row) for row in get_connection().execute(query, params).fetchall()]
+
+
+def count_notes(saved=None):
+    query = "SELECT COUNT(*) FROM notes"
+    params = []
+    if saved is not None:
+        query += " WHERE saved = ?"
+        params.append(1 if saved else 0)
+    return get_connection().execute(query, params).fetchone()[0]
+
+
+def get_quiz(article_id):
+    """
+    Return the stored quiz text for an article (or the article it is an alias of), or None
+    """
+    row = get_connection().execute(
+        f"SELECT content FROM quizzes WHERE article_id = {RESOLVE_ALIAS}", (article_id, article_id)
+    ).fetchone()
+    return row['content'] if row else None
+
+
+def save_quiz(article, content, article_id=None):
+    """
+    Insert or replace the quiz generated for an article
+    """
+    article_id = article_id or article_id_for(article)
+    connection = get_connection()
+    with connection:
+        connection.execute(
+            """
+            INSERT INTO quizzes (article_id, title, content, created_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(article_id) DO UPDATE SET
+                title = excluded.title,
+                content = excluded.content,
+                created_at = excluded.created_at
+            """,
+            (
+                article_id,
+                article.get('title') or 'Untitled article',
+                content,
+                datetime.now().isoformat(timespec='seconds')
+            )
+        )
+        add_questions(connection, article_id, parse_quiz(content))
+    return article_id
+
+
+def question_hash(question):
+    text = re.sub(r'\s+', ' ', question['text']).strip().lower()
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def add_questions(connection, article_id, questions):
+    """
+    Add questions to an article's bank; a question already in the bank is kept as it is
+    """
+    created_at = datetime.now().isoformat(timespec='seconds')
+    connection.executemany(
+        "INSERT OR IGNORE INTO quiz_questions (article_id, question_hash, question, created_at) VALUES (?, ?, ?, ?)",
+        [(article_id, question_hash(question), json.dumps(question), created_at) for question in questions]
+    )
+
+
+def sample_questions(article_id, count=5):
+    """
+    Up to count random questions from the bank of an article (or the article it is an alias of),
+    numbered from 1 in the order drawn
+    """
+    rows = get_connection().execute(
+        f"SELECT question FROM quiz_questions WHERE article_id = {RESOLVE_ALIAS} ORDER BY RANDOM() LIMIT ?",
+        (article_id, article_id, count)
+    ).fetchall()
+    return [dict(json.loads(row['question']), number=number) for number, row in enumerate(rows, 1)]
+
+
+def get_quiz_title(article_id):
+    """
+    Title of the article a stored quiz was generated for, or None
+    """
+    row = get_connection().execute(
+        f"SELECT title FROM quizzes WHERE article_id = {RESOLVE_ALIAS}", (article_id, article_id)
+    ).fetchone()
+    return row['title'] if row else None
+
+
+def list_sources():
+    """
+    Distinct news sources in the store, for the search filters
+    """
+    rows = get_connection().execute(
+        "SELECT DISTINCT source FROM notes WHERE source IS NOT NULL AND source != '' ORDER BY source"
+    ).fetchall()
+    return [row['source'] for row in rows]
+
+
+def fts_query(text):
+    """
+    Turn free text into an FTS5 query: every word must match, the last one as a prefix
+    """
+    words = re.findall(r'\w+', text or '')
+    if not words:
+        return None
+    terms = ['"' + word + '"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def search_notes(query=None, source=None, paper=None, date_from=None, date_to=None,
+                 saved=None, limit=10, offset=0):
+    """
+    Ranked search over note titles, headings and content.
+
+    Returns (rows, total) where rows holds one page of results (best match
+    first, or newest first without a query) and total counts every match.
+    date_from/date_to are ISO dates compared with the article's publish date.
+    """
+    connection = get_connection()
+    match = fts_query(query)
+    filters = []
+    params = []
+
+    if source:
+        filters.append("n.source = ?")
+        params.append(source)
+    if paper:
+        filters.append("(',' || COALESCE(n.papers, '') || ',') LIKE ?")
+        params.append(f"%,{paper},%")
+    if date_from:
+        filters.append("substr(COALESCE(n.published_at, n.created_at), 1, 10) >= ?")
+        params.append(str(date_from))
+    if date_to:
+        filters.append("substr(COALESCE(n.published_at, n.created_at), 1, 10) <= ?")
+        params.append(str(date_to))
+    if saved is not None:
+        filters.append("n.saved = ?")
+        params.append(1 if saved else 0)
+
+    if match and FTS_AVAILABLE:
+        weights = ', '.join(str(weight) for weight in FTS_WEIGHTS)
+        base = "FROM notes_fts JOIN notes n ON n.rowid = notes_fts.rowid WHERE notes_fts MATCH ?"
+        params = [match] + params
+        select = (
+            f"SELECT n.*, snippet(notes_fts, 2, '**', '**', ' … ', 16) AS snippet, "
+            f"bm25(notes_fts, {weights}) AS rank "
+        )
+        order = "ORDER BY rank"
+    else:
+        base = "FROM notes n WHERE 1 = 1"
+        word_params = []
+        if match:
+            for word in re.findall(r'\w+', query):
+                base += " AND (n.title LIKE ? OR n.headings LIKE ? OR n.content LIKE ?)"
+                word_params.extend([f"%{word}%"] * 3)
+        params = word_params + params
+        select = "SELECT n.*, NULL AS snippet "
+        order = "ORDER BY n.created_at DESC"
+
+    where = ''.join(f" AND {condition}" for condition in filters)
+    try:
+        total = connection.execute(f"SELECT COUNT(*) {base}{where}", params).fetchone()[0]
+        rows = connection.execute(
+            f"{select}{base}{where} {order} LIMIT ? OFFSET ?", params + [limit, offset]
+        ).fetchall()
+    except sqlite3.OperationalError as e:
+        print(f"Error searching notes: {str(e)}")
+        return [], 0
+    return [dict(row) for row in rows], total
@@ -1,4 +1,9 @@
 import streamlit as st
+from notes_store import SYLLABUS_PAPERS, count_notes, delete_notes, list_sources, search_notes, set_saved
+from pagination import current_page, page_controls, reset_page
+
+# Number of notes rendered per results page
+PAGE_SIZES = [10, 20, 50]
 
 # Set page config
 st.set_page_config(
@@ -10,33 +15,74 @@ st.set_page_config(
 # Title
 st.title("📝 UPSC Notes")
 
-# Check if there are any notes in session state
-if 'notes' not in st.session_state:
-    st.session_state.notes = {}
-if 'saved_notes' not in st.session_state:
-    st.session_state.saved_notes = {}
-
-# Display all notes
-if st.session_state.notes or st.session_state.saved_notes:
-    # Create tabs for different note categories
-    tab1, tab2 = st.tabs(["Generated Notes", "Saved Notes"])
-    
-    with tab1:
-        st.header("Generated Notes")
-        for title, notes in st.session_state.notes.items():
-            with st.expander(f"📌 {title}"):
-                st.text_area("", notes, height=300, key=f"gen_{title}")
-                if st.button("Save Note", key=f"save_gen_{title}"):
-                    st.session_state.saved_notes[title] = notes
+# Notes are read from the persistent notes store shared by all sessions
+if count_notes():
+    # Search and filters
+    query = st.text_input(
+        "Search notes",
+        placeholder="e.g. monetary policy, Article 370, GS2 federalism",
+        on_change=reset_page, args=('notes',)
+    )
+
+    filter_cols = st.columns(5)
+    with filter_cols[0]:
+        source = st.selectbox("Source", ["All"] + list_sources(), on_change=reset_page, args=('notes',))
+    with filter_cols[1]:
+        paper = st.selectbox("Syllabus paper", ["All"] + SYLLABUS_PAPERS, on_change=reset_page, args=('notes',))
+    with filter_cols[2]:
+        dates = st.date_input("Published between", value=(), on_change=reset_page, args=('notes',))
+    with filter_cols[3]:
+        saved_only = st.checkbox("Saved notes only", on_change=reset_page, args=('notes',))
+    with filter_cols[4]:
+        page_size = st.selectbox("Per page", PAGE_SIZES, on_change=reset_page, args=('notes',))
+
+    date_from = dates[0] if len(dates) > 0 else None
+    date_to = dates[1] if len(dates) > 1 else date_from
+
+    # Only the current page of results is fetched and rendered
+    page = current_page('notes')
+    notes, total = search_notes(
+        query=query,
+        source=None if source == "All" else source,
+        paper=None if paper == "All" else paper,
+        date_from=date_from.isoformat() if date_from else None,
+        date_to=date_to.isoformat() if date_to else None,
+        saved=True if saved_only else None,
+        limit=page_size,
+        offset=(page - 1) * page_size
+    )
+
+    if not total:
+        st.info("No notes match your search.")
+    else:
+        st.caption(f"{total} note(s) found")
+
+        for note in notes:
+            papers = note.get('papers') or ''
+            label = f"📌 {note['title']}"
+            if papers:
+                label += f"  ·  {papers.replace(',', ', ')}"
+            with st.expander(label):
+                details = [value for value in (note.get('source'), (note.get('published_at') or '')[:10]) if value]
+                if details:
+                    st.caption(" · ".join(details))
+                if note.get('snippet'):
+                    # Flatten the matched excerpt so headings inside it do not render as headings
+                    snippet = ' '.join(note['snippet'].replace('#', ' ').split())
+                    st.markdown(f"…{snippet}…")
+                st.markdown(note['content'])
+                if note['saved']:
+                    if st.button("Remove from Saved", key=f"unsave_{note['article_id']}"):
+                        set_saved(note['article_id'], False)
+                        st.rerun()
+                elif st.button("Save Note", key=f"save_{note['article_id']}"):
+                    set_saved(note['article_id'])
                     st.success("Note saved successfully!")
-    
-    with tab2:
-        st.header("Saved Notes")
-        for title, notes in st.session_state.saved_notes.items():
-            with st.expander(f"📌 {title}"):
-                st.text_area("", notes, height=300, key=f"saved_{title}")
-                if st.button("Delete Note", key=f"delete_{title}"):
-                    del st.session_state.saved_notes[title]
-                    st.success("Note deleted successfully!")
+                if st.button("Delete Note", key=f"delete_{note['article_id']}"):
+                    delete_notes(note['article_id'])
+                    st.rerun()
+
+        # Pagination controls
+        page_controls('notes', total=total, page_size=page_size)
 else:
-    st.info("No notes available. Generate notes from the main page to view them here!") 
\ No newline at end of file
+    st.info("No notes available. Generate notes from the main page to view them here!")
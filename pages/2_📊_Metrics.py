@@ -0,0 +1,91 @@
+from datetime import datetime
+
+import streamlit as st
+from metrics import (
+    METRICS_JSONL_PATH, load_events, metrics_stats, prometheus_text,
+    recent_events, reset_metrics, summarise_events
+)
+
+# Events read back from the JSONL sink
+EVENT_LIMITS = [1000, 5000, 20000]
+
+# Set page config
+st.set_page_config(
+    page_title="Pipeline Metrics",
+    page_icon="📊",
+    layout="wide"
+)
+
+# Title
+st.title("📊 Pipeline Metrics")
+
+# The JSONL sink is shared by the app, job workers and the scheduler; without it
+# only this process's recent calls are available
+source_cols = st.columns([3, 1])
+with source_cols[0]:
+    if METRICS_JSONL_PATH:
+        st.caption(f"Reading {METRICS_JSONL_PATH} (all processes)")
+    else:
+        st.caption("METRICS_JSONL_PATH is empty; showing this app process only")
+with source_cols[1]:
+    limit = st.selectbox("Recent events", EVENT_LIMITS, index=1)
+
+events = load_events(limit=limit) if METRICS_JSONL_PATH else recent_events()
+
+if not events:
+    st.info("No LLM calls recorded yet. Generate some notes or a quiz and come back.")
+else:
+    rows = summarise_events(events)
+    first = datetime.fromtimestamp(min(event['ts'] for event in events))
+    st.write(f"{len(events)} events since {first:%Y-%m-%d %H:%M}")
+
+    # End-to-end runs
+    st.subheader("Pipeline runs")
+    run_rows = [row for row in rows if row['kind'] == 'pipeline']
+    if run_rows:
+        st.dataframe([{
+            'Pipeline': row['name'],
+            'Runs': row['count'],
+            'Errors': row['errors'],
+            'p50 (s)': round(row['p50_seconds'], 2),
+            'p95 (s)': round(row['p95_seconds'], 2)
+        } for row in run_rows], hide_index=True)
+
+    # Where the time and tokens go
+    st.subheader("Stages")
+    stage_rows = [row for row in rows if row['kind'] == 'stage']
+    total_seconds = sum(row['total_seconds'] for row in stage_rows) or 1
+    st.dataframe([{
+        'Stage': row['name'],
+        'Calls': row['count'],
+        'Errors': row['errors'],
+        'Cache hit rate': f"{row['hit_rate']:.0%}" if row['hit_rate'] is not None else "off",
+        'p50 (s)': round(row['p50_seconds'], 2),
+        'p95 (s)': round(row['p95_seconds'], 2),
+        'Share of time': f"{row['total_seconds'] / total_seconds:.0%}",
+        'Prompt tokens': row['prompt_tokens'],
+        'Response tokens': row['response_tokens']
+    } for row in stage_rows], hide_index=True)
+    if any(event.get('tokens_estimated') for event in events if event['type'] == 'call'):
+        st.caption("Token counts are estimated from characters where the model reports no usage.")
+
+    # Latest failures
+    failures = [event for event in events if event.get('error')][-20:]
+    if failures:
+        st.subheader("Recent errors")
+        st.dataframe([{
+            'Time': datetime.fromtimestamp(event['ts']).strftime('%Y-%m-%d %H:%M:%S'),
+            'Stage': event.get('stage') or event.get('pipeline'),
+            'Error': event['error']
+        } for event in reversed(failures)], hide_index=True)
+
+# Exports and this process's counters
+with st.expander("This app process"):
+    stats = metrics_stats()
+    for stage, stage_stats in sorted(stats['stages'].items()):
+        st.write(f"**{stage}**: {stage_stats['calls']} calls, {stage_stats['errors']} errors, "
+                 f"avg {stage_stats['avg_seconds']:.2f}s, {stage_stats['hits']} cache hits")
+    st.download_button("Download Prometheus metrics", prometheus_text(), file_name="upsc_metrics.prom", mime="text/plain")
+    if st.button("Reset counters"):
+        reset_metrics()
+        st.rerun()
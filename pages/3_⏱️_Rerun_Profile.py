@@ -0,0 +1,90 @@
+import os
+from datetime import datetime
+
+import streamlit as st
+from profiling import PROFILE_DIR, load_profiles, summarise_profiles
+
+# Set page config
+st.set_page_config(
+    page_title="Rerun Profile",
+    page_icon="⏱️",
+    layout="wide"
+)
+
+# Title
+st.title("⏱️ Rerun Profile")
+st.caption(
+    "Where app.py spends its time on each rerun. Profile a browser tab by opening the app "
+    "with ?profile=1 (or ?profile=cprofile for function-level stats), or every session with PROFILE_RERUNS=1."
+)
+
+records = load_profiles()
+
+if not records:
+    st.info(f"No profiled reruns in {PROFILE_DIR} yet.")
+else:
+    sessions = sorted({record['session'] for record in records}, key=lambda session: max(
+        record['ts'] for record in records if record['session'] == session
+    ), reverse=True)
+    filter_cols = st.columns(2)
+    with filter_cols[0]:
+        session = st.selectbox("Session", ["All"] + sessions)
+    with filter_cols[1]:
+        include_interrupted = st.checkbox("Include reruns cut short by st.rerun()", value=False)
+
+    if session != "All":
+        records = [record for record in records if record['session'] == session]
+    if not include_interrupted:
+        records = [record for record in records if record['status'] == 'complete'] or records
+
+    totals = [record['total_seconds'] for record in records]
+    metric_cols = st.columns(3)
+    metric_cols[0].metric("Reruns", len(records))
+    metric_cols[1].metric("Mean rerun", f"{sum(totals) / len(totals):.2f}s")
+    metric_cols[2].metric("Slowest rerun", f"{max(totals):.2f}s")
+
+    # Time per section, in script order
+    st.subheader("Sections")
+    st.dataframe([{
+        'Section': row['section'],
+        'Reruns': row['reruns'],
+        'Mean (s)': round(row['mean_seconds'], 3),
+        'p50 (s)': round(row['p50_seconds'], 3),
+        'p95 (s)': round(row['p95_seconds'], 3),
+        'Max (s)': round(row['max_seconds'], 3),
+        'Share of rerun time': f"{row['share']:.0%}"
+    } for row in summarise_profiles(records)], hide_index=True)
+    st.caption("\"(waiting)\" rows are time spent waiting on a streamed fetch; it is already included in its section's time.")
+
+    # Individual reruns, newest first
+    st.subheader("Recent reruns")
+    recent = list(reversed(records))[:50]
+    st.dataframe([{
+        'Time': datetime.fromtimestamp(record['ts']).strftime('%Y-%m-%d %H:%M:%S'),
+        'Session': record['session'],
+        'Rerun': record['rerun'],
+        'Status': record['status'],
+        'Total (s)': record['total_seconds'],
+        'Slowest section': max(record['sections'], key=lambda section: section[1])[0] if record['sections'] else '',
+        'cProfile': 'yes' if record['profile_file'] else ''
+    } for record in recent], hide_index=True)
+
+    # Function-level detail of one cProfile'd rerun
+    profiled = [record for record in recent if record['top_functions']]
+    if profiled:
+        st.subheader("Top functions")
+        labels = {f"{record['session']} #{record['rerun']} ({record['total_seconds']:.2f}s)": record for record in profiled}
+        record = labels[st.selectbox("Rerun", list(labels))]
+        st.dataframe([{
+            'Function': row['function'],
+            'Calls': row['calls'],
+            'Own (s)': row['own_seconds'],
+            'Cumulative (s)': row['cumulative_seconds']
+        } for row in record['top_functions']], hide_index=True)
+        path = os.path.join(PROFILE_DIR, record['profile_file'])
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                st.download_button(
+                    "Download .prof (open with snakeviz or pstats)", f.read(),
+                    file_name=record['profile_file'], mime="application/octet-stream"
+                )
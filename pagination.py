@@ -0,0 +1,76 @@
+import math
+import os
+
+import streamlit as st
+
+
+# Articles rendered per page of an article list
+ARTICLES_PAGE_SIZE = int(os.getenv('ARTICLES_PAGE_SIZE', '10'))
+
+
+def _state_key(key):
+    return f"{key}_page"
+
+
+def current_page(key):
+    """
+    The 1-based page a list is on (kept in session state under '<key>_page')
+    """
+    return st.session_state.get(_state_key(key), 1)
+
+
+def reset_page(key):
+    """
+    Go back to the first page, e.g. when the list or its filters change
+    """
+    st.session_state[_state_key(key)] = 1
+
+
+def page_range(key, page_size=None, total=None):
+    """
+    (start, end) indices of the current page; the page is clamped when the list has shrunk
+    """
+    page_size = page_size or ARTICLES_PAGE_SIZE
+    page = current_page(key)
+    if total is not None:
+        page = min(page, max(1, math.ceil(total / page_size)))
+        st.session_state[_state_key(key)] = page
+    return (page - 1) * page_size, page * page_size
+
+
+def page_controls(key, total=None, page_size=None, has_next=None):
+    """
+    Previous / Next buttons for a list; pass total when the list length is
+    known, or has_next when it is streamed and only the next item was peeked
+    """
+    page_size = page_size or ARTICLES_PAGE_SIZE
+    page = current_page(key)
+    if total is not None:
+        page_count = max(1, math.ceil(total / page_size))
+        has_next = page < page_count
+        label = f"Page {page} of {page_count}"
+    else:
+        label = f"Page {page}"
+
+    if page <= 1 and not has_next:
+        return
+
+    prev_col, label_col, next_col = st.columns([1, 4, 1])
+    with prev_col:
+        if st.button("← Previous", key=f"{key}_previous", disabled=page <= 1):
+            st.session_state[_state_key(key)] = page - 1
+            st.rerun()
+    with label_col:
+        st.caption(label)
+    with next_col:
+        if st.button("Next →", key=f"{key}_next", disabled=not has_next):
+            st.session_state[_state_key(key)] = page + 1
+            st.rerun()
+
+
+def paginate(items, key, page_size=None):
+    """
+    Return (start, page_items) for the current page of a list; only these items should be rendered
+    """
+    start, end = page_range(key, page_size, total=len(items))
+    return start, items[start:end]
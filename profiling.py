@@ -0,0 +1,241 @@
+"""
+Opt-in profiler for Streamlit script reruns.
+
+app.py calls start_rerun() at the top, checkpoint(name) at the end of each
+section and finish_rerun() at the bottom; each rerun's wall time per
+section (plus, optionally, a cProfile of the whole rerun) is appended to a
+per-session file under PROFILE_DIR. Enable it for every session with
+PROFILE_RERUNS=1, or for one browser tab with ?profile=1 (?profile=cprofile
+also records cProfile stats).
+"""
+import cProfile
+import json
+import os
+import pstats
+import threading
+import time
+import uuid
+
+import streamlit as st
+from metrics import percentile
+
+
+# Profiling configuration (override through environment variables)
+PROFILE_RERUNS = os.getenv('PROFILE_RERUNS', '0') != '0'
+PROFILE_CPROFILE = os.getenv('PROFILE_CPROFILE', '0') != '0'
+PROFILE_DIR = os.getenv(
+    'PROFILE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'profiles')
+)
+# cProfile dumps kept per session (oldest are removed)
+PROFILE_KEEP = int(os.getenv('PROFILE_KEEP', '20'))
+# Functions listed in each rerun record, by cumulative time
+TOP_FUNCTIONS = 20
+
+_STATE_KEY = '_rerun_profile'
+_SESSION_KEY = '_rerun_profile_session'
+_file_lock = threading.Lock()
+
+
+def profiling_mode():
+    """
+    None when profiling is off for this session, 'sections' or 'cprofile' otherwise
+    """
+    requested = ''
+    try:
+        requested = st.query_params.get('profile', '')
+    except Exception:
+        pass
+    if requested == 'cprofile':
+        return 'cprofile'
+    if PROFILE_RERUNS or requested in ('1', 'true', 'sections'):
+        return 'cprofile' if PROFILE_CPROFILE else 'sections'
+    return None
+
+
+def start_rerun(script):
+    """
+    Begin profiling this rerun of `script` if profiling is on for the session.
+    A previous rerun cut short by st.rerun() / st.stop() is saved first.
+    """
+    previous = st.session_state.get(_STATE_KEY)
+    if previous and not previous['finished']:
+        finish_rerun(status='interrupted')
+
+    mode = profiling_mode()
+    if not mode:
+        return None
+
+    if _SESSION_KEY not in st.session_state:
+        st.session_state[_SESSION_KEY] = uuid.uuid4().hex[:12]
+    now = time.perf_counter()
+    state = {
+        'session': st.session_state[_SESSION_KEY],
+        'script': script,
+        'rerun': (previous or {}).get('rerun', 0) + 1,
+        'ts': time.time(),
+        'started': now,
+        'last': now,
+        'sections': [],
+        'inner': {},
+        'profiler': None,
+        'finished': False
+    }
+    if mode == 'cprofile':
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+            state['profiler'] = profiler
+        except ValueError:
+            # Another profiler is active in this process; keep the section timings only
+            pass
+    st.session_state[_STATE_KEY] = state
+    return state
+
+
+def _current():
+    state = st.session_state.get(_STATE_KEY)
+    return state if state and not state['finished'] else None
+
+
+def checkpoint(name):
+    """
+    Attribute the time since the previous checkpoint to section `name`
+    """
+    state = _current()
+    if state is None:
+        return
+    now = time.perf_counter()
+    state['sections'].append([name, now - state['last']])
+    state['last'] = now
+
+
+def timed_iter(iterable, name):
+    """
+    Yield from iterable, adding the time spent waiting on it to `name`
+    (for work interleaved with rendering, such as a streamed news fetch)
+    """
+    iterator = iter(iterable)
+    while True:
+        started = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            _add_inner(name, time.perf_counter() - started)
+            return
+        _add_inner(name, time.perf_counter() - started)
+        yield item
+
+
+def _add_inner(name, seconds):
+    state = _current()
+    if state is not None:
+        state['inner'][name] = state['inner'].get(name, 0.0) + seconds
+
+
+def _top_functions(profiler):
+    stats = pstats.Stats(profiler)
+    rows = []
+    for (filename, line, function), (calls, _, own, cumulative, _) in stats.stats.items():
+        rows.append({
+            'function': f"{os.path.basename(filename)}:{line}({function})",
+            'calls': calls,
+            'own_seconds': round(own, 4),
+            'cumulative_seconds': round(cumulative, 4)
+        })
+    rows.sort(key=lambda row: row['cumulative_seconds'], reverse=True)
+    return rows[:TOP_FUNCTIONS]
+
+
+def finish_rerun(status='complete'):
+    """
+    Stop profiling this rerun and append its record to the session's file
+    """
+    state = _current()
+    if state is None:
+        return None
+    state['finished'] = True
+    profiler = state.pop('profiler')
+    # An interrupted rerun only counts up to its last checkpoint
+    ended = time.perf_counter() if status == 'complete' else state['last']
+
+    record = {
+        'session': state['session'],
+        'script': state['script'],
+        'rerun': state['rerun'],
+        'ts': state['ts'],
+        'status': status,
+        'total_seconds': round(ended - state['started'], 4),
+        'sections': [[name, round(seconds, 4)] for name, seconds in state['sections']],
+        'inner': {name: round(seconds, 4) for name, seconds in state['inner'].items()},
+        'profile_file': None,
+        'top_functions': []
+    }
+
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        if profiler is not None:
+            profiler.disable()
+            record['top_functions'] = _top_functions(profiler)
+            record['profile_file'] = f"{state['session']}-{state['rerun']:05d}.prof"
+            profiler.dump_stats(os.path.join(PROFILE_DIR, record['profile_file']))
+            _prune_dumps(state['session'])
+        with _file_lock, open(os.path.join(PROFILE_DIR, f"{state['session']}.jsonl"), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + '\n')
+    except OSError as e:
+        print(f"Error writing rerun profile: {str(e)}")
+    return record
+
+
+def _prune_dumps(session):
+    dumps = sorted(name for name in os.listdir(PROFILE_DIR) if name.startswith(f"{session}-") and name.endswith('.prof'))
+    for name in dumps[:-PROFILE_KEEP] if PROFILE_KEEP > 0 else dumps:
+        try:
+            os.remove(os.path.join(PROFILE_DIR, name))
+        except OSError:
+            pass
+
+
+def load_profiles(session=None):
+    """
+    Rerun records from PROFILE_DIR, oldest first (one session or all)
+    """
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    records = []
+    for name in os.listdir(PROFILE_DIR):
+        if not name.endswith('.jsonl') or (session and name != f"{session}.jsonl"):
+            continue
+        with open(os.path.join(PROFILE_DIR, name), encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+    records.sort(key=lambda record: record['ts'])
+    return records
+
+
+def summarise_profiles(records):
+    """
+    Per-section rows (reruns, mean/p50/p95/max seconds, share of total time) in script order
+    """
+    timings = {}
+    order = []
+    for record in records:
+        for name, seconds in record['sections'] + [[f"{name} (waiting)", seconds] for name, seconds in record.get('inner', {}).items()]:
+            if name not in timings:
+                timings[name] = []
+                order.append(name)
+            timings[name].append(seconds)
+
+    total = sum(record['total_seconds'] for record in records) or 1
+    return [{
+        'section': name,
+        'reruns': len(timings[name]),
+        'mean_seconds': sum(timings[name]) / len(timings[name]),
+        'p50_seconds': percentile(timings[name], 0.5),
+        'p95_seconds': percentile(timings[name], 0.95),
+        'max_seconds': max(timings[name]),
+        'share': sum(timings[name]) / total
+    } for name in order]
@@ -0,0 +1,171 @@
+import json
+import re
+from functools import lru_cache
+
+
+OPTION_LETTERS = 'ABCD'
+
+# Schema for JSON-constrained quiz generation (Gemini response_schema)
+QUIZ_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'questions': {
+            'type': 'array',
+            'items': {
+                'type': 'object',
+                'properties': {
+                    'question': {'type': 'string'},
+                    'options': {'type': 'array', 'items': {'type': 'string'}},
+                    'answer': {'type': 'string', 'enum': list(OPTION_LETTERS)},
+                    'explanation': {'type': 'string'}
+                },
+                'required': ['question', 'options', 'answer', 'explanation']
+            }
+        }
+    },
+    'required': ['questions']
+}
+
+# One pattern for every line shape seen in free-text quizzes: question headers
+# ("## Question 1", "Q1.", "**Question 2:** ..."), options ("A)", "a)", "(b)",
+# "C."), answers ("**Answer:** B", "Answer: (c)", "Correct answer - D") and
+# explanations. Lines matching none of them continue the previous field.
+QUIZ_LINE_RE = re.compile(r"""
+    ^\s*(?:
+        (?:\#{1,6}\s*)?(?:\*\*)?(?:Question|Q)\s*\.?\s*(?P<number>\d+)\s*(?:\*\*)?\s*[:.)\-]?\s*(?:\*\*)?\s*(?P<question>.*)
+      | (?:\*\*)?\(?(?P<letter>[A-D])[).:](?:\*\*)?\s+(?P<option>.+)
+      | (?:\*\*)?(?:Correct\s+)?Answer(?:\*\*)?\s*[:\-]\s*(?:\*\*)?\s*\(?(?P<answer>[A-D])?(?![A-Za-z])\)?[).:]?\s*(?P<answer_text>.*)
+      | (?:\*\*)?Explanation(?:\*\*)?\s*[:\-]\s*(?:\*\*)?\s*(?P<explanation>.*)
+    )$
+""", re.IGNORECASE | re.VERBOSE)
+
+OPTION_LABEL_RE = re.compile(r'^\s*\(?[A-Da-d][).:]\s+')
+ANSWER_LETTER_RE = re.compile(r'^\s*(?:Option\s+)?\(?([A-Da-d])(?![A-Za-z])')
+CODE_FENCE_RE = re.compile(r'^\s*```(?:json)?\s*|\s*```\s*$')
+
+
+def option_letter(option):
+    """
+    The letter an option is labelled with ('A' for "A) ..."), or None
+    """
+    match = OPTION_LABEL_RE.match(option or '')
+    return match.group(0).strip(' ().:').upper() if match else None
+
+
+def answer_letter(answer, options):
+    """
+    Normalise an answer given as a letter ("b", "(B)", "Option C") or as the option text
+    """
+    answer = (answer or '').strip().strip('*').strip()
+    # Option text first, so an answer like "A federal system" is not read as option A
+    for letter, option in zip(OPTION_LETTERS, options):
+        if answer and OPTION_LABEL_RE.sub('', option).strip().lower() == answer.lower():
+            return letter
+    match = ANSWER_LETTER_RE.match(answer)
+    if match and (len(answer) == len(match.group(0)) or not answer[len(match.group(0))].isalnum()):
+        return match.group(1).upper()
+    return None
+
+
+def make_question(number, text, options, answer, explanation=''):
+    """
+    A question in the shape every page renders: options labelled "A) ...", answer a letter
+    """
+    options = [OPTION_LABEL_RE.sub('', option).strip() for option in options if option and option.strip()]
+    labelled = [f"{letter}) {option}" for letter, option in zip(OPTION_LETTERS, options)]
+    return {
+        'number': number,
+        'text': (text or f"Question {number}").strip(),
+        'options': labelled,
+        'answer': answer_letter(answer, labelled),
+        'explanation': (explanation or '').strip()
+    }
+
+
+def parse_quiz_json(quiz_text):
+    """
+    Questions from a QUIZ_SCHEMA response, or None when the text is not quiz JSON
+    """
+    try:
+        data = json.loads(CODE_FENCE_RE.sub('', quiz_text))
+    except ValueError:
+        return None
+    items = data.get('questions') if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        return None
+    return [
+        make_question(number, item.get('question'), item.get('options') or [], item.get('answer'), item.get('explanation'))
+        for number, item in enumerate((item for item in items if isinstance(item, dict)), 1)
+    ]
+
+
+def parse_quiz_text(quiz_text):
+    """
+    Single pass over a free-text (markdown) quiz with QUIZ_LINE_RE
+    """
+    questions = []
+    current = None
+    field = None
+
+    def finish():
+        if current and current['options']:
+            questions.append(make_question(len(questions) + 1, ' '.join(current['text']), current['options'],
+                                           current['answer'], ' '.join(current['explanation'])))
+
+    for line in quiz_text.splitlines():
+        if not line.strip():
+            continue
+        match = QUIZ_LINE_RE.match(line)
+        if match is None:
+            # Continuation of the question text, the last option or the explanation
+            if current is not None and field == 'text':
+                current['text'].append(line.strip())
+            elif current is not None and field == 'option':
+                current['options'][-1] += ' ' + line.strip()
+            elif current is not None and field == 'explanation':
+                current['explanation'].append(line.strip())
+            continue
+
+        if match.group('number') is not None:
+            finish()
+            current = {'text': [match.group('question')] if match.group('question') else [],
+                       'options': [], 'answer': None, 'explanation': []}
+            field = 'text'
+        elif current is None:
+            continue
+        elif match.group('option') is not None and current['answer'] is None:
+            current['options'].append(f"{match.group('letter').upper()}) {match.group('option').strip()}")
+            field = 'option'
+        elif match.group('explanation') is not None:
+            current['explanation'].append(match.group('explanation'))
+            field = 'explanation'
+        elif match.group('option') is None:
+            current['answer'] = match.group('answer') or match.group('answer_text')
+            field = None
+    finish()
+    return questions
+
+
+@lru_cache(maxsize=256)
+def _parse_quiz(quiz_text):
+    questions = parse_quiz_json(quiz_text)
+    if questions is None:
+        questions = parse_quiz_text(quiz_text)
+    return tuple(question for question in questions if question['options'])
+
+
+def parse_quiz(quiz_text):
+    """
+    Questions of a stored quiz, JSON or legacy free text; results are cached
+    per quiz text, so reruns do not parse again. Treat the result as read-only.
+    """
+    if not quiz_text:
+        return ()
+    return _parse_quiz(quiz_text)
+
+
+def is_correct(selected, question):
+    """
+    True when the selected option ("B) ...") is the question's answer
+    """
+    return bool(selected) and question['answer'] is not None and option_letter(selected) == question['answer']
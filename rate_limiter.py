@@ -0,0 +1,257 @@
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+
+# Provider limits (override through environment variables). Limits are per
+# process: give each job worker or scheduler process its share of the quota.
+PROVIDER_LIMITS = {
+    'gemini': {
+        'rate': float(os.getenv('GEMINI_RPM', '60')) / 60,
+        'burst': float(os.getenv('GEMINI_BURST', '10')),
+        'max_concurrency': int(os.getenv('GEMINI_MAX_CONCURRENCY', '8')),
+        # Calls slower than this (seconds) count as an overload signal
+        'latency_target': float(os.getenv('GEMINI_LATENCY_TARGET', '45'))
+    },
+    'newsapi': {
+        'rate': float(os.getenv('NEWSAPI_RPM', '60')) / 60,
+        'burst': float(os.getenv('NEWSAPI_BURST', '10')),
+        'max_concurrency': int(os.getenv('NEWSAPI_MAX_CONCURRENCY', '6')),
+        'latency_target': float(os.getenv('NEWSAPI_LATENCY_TARGET', '10'))
+    }
+}
+
+# Longest a caller queues for a slot before giving up
+RATE_LIMIT_MAX_WAIT = float(os.getenv('RATE_LIMIT_MAX_WAIT', '300'))
+# Retries of a call rejected with 429, each after a growing pause
+RATE_LIMIT_MAX_RETRIES = int(os.getenv('RATE_LIMIT_MAX_RETRIES', '4'))
+RATE_LIMIT_BACKOFF = 2.0
+
+# AIMD: halve the concurrency limit on a 429, shrink it on slow calls,
+# grow it by about one slot per window of successful calls
+DECREASE_FACTOR = 0.5
+SLOW_DECREASE_FACTOR = 0.9
+MIN_CONCURRENCY = 1
+
+_registry_lock = threading.Lock()
+_limiters = {}
+
+
+def get_limiter(key):
+    """
+    Return the limiter state for a key such as 'gemini:gemini-2.5-flash' or 'newsapi'.
+    Keys share the limits of their provider (the part before ':') but not their buckets.
+    """
+    limiter = _limiters.get(key)
+    if limiter is not None:
+        return limiter
+
+    with _registry_lock:
+        if key not in _limiters:
+            config = PROVIDER_LIMITS[key.split(':', 1)[0]]
+            _limiters[key] = {
+                **config,
+                'condition': threading.Condition(),
+                'tokens': config['burst'],
+                'refilled_at': time.monotonic(),
+                'limit': float(config['max_concurrency']),
+                'in_flight': 0,
+                'waiting': 0,
+                'calls': 0,
+                'throttled': 0,
+                'timeouts': 0,
+                'total_wait': 0.0,
+                'max_wait': 0.0,
+                'busy_seconds': 0.0,
+                'created_at': time.monotonic()
+            }
+        return _limiters[key]
+
+
+def _refill(limiter, now):
+    elapsed = now - limiter['refilled_at']
+    limiter['tokens'] = min(limiter['burst'], limiter['tokens'] + elapsed * limiter['rate'])
+    limiter['refilled_at'] = now
+
+
+def acquire(key, timeout=None):
+    """
+    Block until the key has both a rate token and a free concurrency slot.
+    Raises TimeoutError after timeout seconds (RATE_LIMIT_MAX_WAIT by default).
+    """
+    limiter = get_limiter(key)
+    timeout = RATE_LIMIT_MAX_WAIT if timeout is None else timeout
+    started = time.monotonic()
+    deadline = started + timeout
+
+    with limiter['condition']:
+        limiter['waiting'] += 1
+        try:
+            while True:
+                now = time.monotonic()
+                _refill(limiter, now)
+                has_slot = limiter['in_flight'] < max(MIN_CONCURRENCY, int(limiter['limit']))
+                if has_slot and limiter['tokens'] >= 1:
+                    limiter['tokens'] -= 1
+                    limiter['in_flight'] += 1
+                    break
+
+                remaining = deadline - now
+                if remaining <= 0:
+                    limiter['timeouts'] += 1
+                    raise TimeoutError(f"Rate limit wait for {key} exceeded {timeout:.0f}s")
+                # Sleep until the next token is due; a released slot wakes us earlier
+                token_wait = (1 - limiter['tokens']) / limiter['rate'] if limiter['tokens'] < 1 else remaining
+                limiter['condition'].wait(min(token_wait if has_slot else remaining, remaining))
+        finally:
+            limiter['waiting'] -= 1
+
+        waited = time.monotonic() - started
+        limiter['calls'] += 1
+        limiter['total_wait'] += waited
+        limiter['max_wait'] = max(limiter['max_wait'], waited)
+    return waited
+
+
+def release(key, latency, throttled=False, pause=None):
+    """
+    Free a slot and adjust the concurrency limit from the call's outcome.
+    A throttled call also pauses the bucket for `pause` seconds.
+    """
+    limiter = get_limiter(key)
+    with limiter['condition']:
+        limiter['in_flight'] -= 1
+        limiter['busy_seconds'] += latency
+        if throttled:
+            limiter['throttled'] += 1
+            limiter['limit'] = max(MIN_CONCURRENCY, limiter['limit'] * DECREASE_FACTOR)
+            if pause:
+                # A negative balance holds every caller back until it refills
+                _refill(limiter, time.monotonic())
+                limiter['tokens'] = min(limiter['tokens'], 1 - pause * limiter['rate'])
+        elif latency > limiter['latency_target']:
+            limiter['limit'] = max(MIN_CONCURRENCY, limiter['limit'] * SLOW_DECREASE_FACTOR)
+        else:
+            limiter['limit'] = min(limiter['max_concurrency'], limiter['limit'] + 1 / limiter['limit'])
+        limiter['condition'].notify_all()
+
+
+def is_throttled(error=None, response=None):
+    """
+    True for a 429 / quota-exhausted error from the Gemini SDK or an HTTP response
+    """
+    if response is not None:
+        return getattr(response, 'status_code', None) == 429
+    if error is None:
+        return False
+    if getattr(error, 'code', None) == 429:
+        return True
+    if getattr(getattr(error, 'response', None), 'status_code', None) == 429:
+        return True
+    # google.api_core raises ResourceExhausted; the newsapi client reports code rateLimited
+    message = str(error)
+    return (
+        type(error).__name__ in ('ResourceExhausted', 'TooManyRequests') or
+        message.startswith('429') or 'rateLimited' in message
+    )
+
+
+def backoff_delay(attempt, retry_after=None):
+    """
+    Seconds to pause before retry number `attempt` (Retry-After wins when the server sends one)
+    """
+    try:
+        if retry_after:
+            return float(retry_after)
+    except ValueError:
+        pass
+    return RATE_LIMIT_BACKOFF * (2 ** attempt) * (0.5 + random.random())
+
+
+@contextmanager
+def limited(key, attempt=0):
+    """
+    Hold a rate-limited slot for the body of a with block (such as a
+    streamed response); a 429 raised inside halves the key's concurrency
+    and pauses its bucket
+    """
+    acquire(key)
+    started = time.monotonic()
+    throttled = False
+    try:
+        yield
+    except Exception as e:
+        throttled = is_throttled(e)
+        raise
+    finally:
+        # Also runs when a consumer abandons a stream part-way (GeneratorExit)
+        release(key, time.monotonic() - started, throttled=throttled,
+                pause=backoff_delay(attempt) if throttled else None)
+
+
+def call_limited(key, fn, *args, **kwargs):
+    """
+    Call fn under the key's limits, queueing for a slot and retrying on 429.
+
+    Both a raised 429 error and a returned HTTP response with status 429
+    count as throttling; the last one is re-raised / returned once the
+    retries are used up.
+    """
+    for attempt in range(RATE_LIMIT_MAX_RETRIES + 1):
+        acquire(key)
+        started = time.monotonic()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            throttled = is_throttled(e)
+            pause = backoff_delay(attempt) if throttled else None
+            release(key, time.monotonic() - started, throttled=throttled, pause=pause)
+            if throttled and attempt < RATE_LIMIT_MAX_RETRIES:
+                print(f"{key} rate limited, retrying in about {pause:.1f}s")
+                continue
+            raise
+
+        if is_throttled(response=result):
+            pause = backoff_delay(attempt, result.headers.get('Retry-After'))
+            release(key, time.monotonic() - started, throttled=True, pause=pause)
+            if attempt < RATE_LIMIT_MAX_RETRIES:
+                print(f"{key} rate limited, retrying in about {pause:.1f}s")
+                continue
+            return result
+
+        release(key, time.monotonic() - started)
+        return result
+
+
+def limiter_stats():
+    """
+    Per-key utilisation: current concurrency limit and slots in use, queued
+    callers, available tokens, time spent waiting and 429s seen
+    """
+    stats = {}
+    with _registry_lock:
+        limiters = dict(_limiters)
+    for key, limiter in limiters.items():
+        with limiter['condition']:
+            _refill(limiter, time.monotonic())
+            uptime = max(1e-9, time.monotonic() - limiter['created_at'])
+            limit = max(MIN_CONCURRENCY, int(limiter['limit']))
+            stats[key] = {
+                'limit': limit,
+                'max_concurrency': limiter['max_concurrency'],
+                'in_flight': limiter['in_flight'],
+                'utilisation': limiter['in_flight'] / limit,
+                # Average fraction of the concurrency limit busy since startup
+                'average_utilisation': limiter['busy_seconds'] / (uptime * limiter['max_concurrency']),
+                'waiting': limiter['waiting'],
+                'tokens': limiter['tokens'],
+                'rate_per_minute': limiter['rate'] * 60,
+                'calls': limiter['calls'],
+                'throttled': limiter['throttled'],
+                'timeouts': limiter['timeouts'],
+                'avg_wait': limiter['total_wait'] / limiter['calls'] if limiter['calls'] else 0.0,
+                'max_wait': limiter['max_wait']
+            }
+    return stats
@@ -0,0 +1,138 @@
+"""
+Headless ingest scheduler.
+
+Periodically pulls the UPSC news sources, extracts each new article and
+precomputes its notes and quiz into the notes store, so the Streamlit app
+only has to read them. Near-duplicate stories are generated once and
+linked to each other.
+
+Usage:
+    python scheduler.py            # run forever, every SCHEDULER_INTERVAL seconds
+    python scheduler.py --once     # single ingest pass (e.g. from cron)
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+
+from batch_notes import BATCH_CONCURRENCY, generate_article_quiz, generate_notes_batch
+from news_cache import UPSC_SOURCES, clear_news_cache
+from news_fetcher import is_valid_article, iter_articles
+from notes_store import article_id_for, get_notes, get_quiz, resolve_alias
+
+load_dotenv()
+
+# Scheduler configuration (override through environment variables)
+SCHEDULER_INTERVAL = int(os.getenv('SCHEDULER_INTERVAL', str(60 * 60)))
+SCHEDULER_LOOKBACK_DAYS = int(os.getenv('SCHEDULER_LOOKBACK_DAYS', '1'))
+SCHEDULER_MAX_ARTICLES = int(os.getenv('SCHEDULER_MAX_ARTICLES', '50'))
+
+
+def log(message):
+    print(f"[{datetime.now().isoformat(timespec='seconds')}] {message}", flush=True)
+
+
+def fetch_source_articles(api_key, days=SCHEDULER_LOOKBACK_DAYS, max_articles=SCHEDULER_MAX_ARTICLES):
+    """
+    Return up to max_articles recent articles from the UPSC sources, newest first
+    """
+    to_date = datetime.now().strftime('%Y-%m-%d')
+    from_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+
+    errors = []
+    articles = []
+    for article in iter_articles([{'sources': source} for source in UPSC_SOURCES], from_date, to_date, api_key, errors=errors):
+        # Skip removed stories and articles without a page to extract
+        if is_valid_article(article):
+            articles.append(article)
+            if len(articles) >= max_articles:
+                break
+    for error in errors:
+        log(f"NewsAPI error: {error}")
+    return articles
+
+
+def run_once(api_key, days=SCHEDULER_LOOKBACK_DAYS, max_articles=SCHEDULER_MAX_ARTICLES,
+             max_workers=BATCH_CONCURRENCY, mode=None):
+    """
+    One ingest pass over the UPSC sources; returns a summary dict
+    """
+    start = time.perf_counter()
+    # A pass runs less often than the cache TTL, so start from fresh NewsAPI results
+    # instead of serving last pass's entries while they refresh in the background
+    clear_news_cache()
+    articles = fetch_source_articles(api_key, days=days, max_articles=max_articles)
+    pending = [
+        article for article in articles
+        if not (get_notes(article_id_for(article)) and get_quiz(article_id_for(article)))
+    ]
+    summary = {'fetched': len(articles), 'skipped': len(articles) - len(pending), 'notes': 0, 'duplicates': 0, 'quizzes': 0, 'errors': 0}
+    log(f"{len(articles)} articles fetched, {len(pending)} need notes or a quiz")
+
+    if pending:
+        # Notes first: the batch clusters near-duplicate stories and generates each one once
+        for index, article, notes, error in generate_notes_batch(pending, max_workers=max_workers, mode=mode):
+            if error:
+                summary['errors'] += 1
+                log(f"Error generating notes for {article['title']}: {error}")
+            else:
+                summary['notes'] += 1
+
+        # Quizzes are stored per cluster representative, so duplicates share one quiz
+        quiz_articles = {}
+        for article in pending:
+            article_id = resolve_alias(article_id_for(article))
+            if article_id != article_id_for(article):
+                summary['duplicates'] += 1
+            if article_id not in quiz_articles and get_notes(article_id) and not get_quiz(article_id):
+                quiz_articles[article_id] = article
+
+        if quiz_articles:
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(quiz_articles))), thread_name_prefix="ingest") as pool:
+                futures = {pool.submit(generate_article_quiz, article): article for article in quiz_articles.values()}
+                for future in as_completed(futures):
+                    article = futures[future]
+                    try:
+                        future.result()
+                        summary['quizzes'] += 1
+                    except Exception as e:
+                        summary['errors'] += 1
+                        log(f"Error generating quiz for {article['title']}: {str(e)}")
+
+    summary['seconds'] = round(time.perf_counter() - start, 1)
+    log(f"Pass finished: {summary}")
+    return summary
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Precompute UPSC notes and quizzes in the background")
+    arg_parser.add_argument('--once', action='store_true', help="run a single ingest pass and exit")
+    arg_parser.add_argument('--interval', type=int, default=SCHEDULER_INTERVAL, help="seconds between passes")
+    arg_parser.add_argument('--days', type=int, default=SCHEDULER_LOOKBACK_DAYS, help="how many days of news to pull")
+    arg_parser.add_argument('--max-articles', type=int, default=SCHEDULER_MAX_ARTICLES, help="articles per pass")
+    arg_parser.add_argument('--workers', type=int, default=BATCH_CONCURRENCY, help="articles processed in parallel")
+    arg_parser.add_argument('--mode', default=None, help="notes pipeline: chained or structured")
+    args = arg_parser.parse_args()
+
+    news_api_key = os.getenv('NEWS_API_KEY')
+    if not news_api_key:
+        log("NEWS_API_KEY is missing or empty")
+        return 1
+
+    while True:
+        try:
+            summary = run_once(news_api_key, args.days, args.max_articles, args.workers, args.mode)
+        except Exception as e:
+            log(f"Ingest pass failed: {str(e)}")
+            summary = {'errors': 1}
+        if args.once:
+            return 1 if summary.get('errors') else 0
+        time.sleep(max(1, args.interval))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,11 +1,19 @@
 import streamlit as st
 import google.generativeai as genai
-import requests
-from bs4 import BeautifulSoup
 import re
+import json
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import os
 from dotenv import load_dotenv
+from llm_cache import cached_generate, cached_generate_stream
+from llm_backends import create_model
+from metrics import pipeline_run, run_in_context
+from quiz_parser import QUIZ_SCHEMA, parse_quiz
+from html_cache import fetch_html
+from article_extractor import extract_relevant_text
 
 
 # Load environment variables
@@ -13,58 +21,33 @@ load_dotenv()
 
 # Configure Gemini
 genai.configure(api_key=os.getenv('GOOGLE_API_KEY'))
-model = genai.GenerativeModel('gemini-2.5-flash')
+# LLM_BACKEND=fake/replay swaps in an offline stand-in
+model = create_model()
+
+# Notes generation modes: "chained" (classify, analyse, add context, compile)
+# or "structured" (one JSON-schema-constrained request)
+NOTES_MODES = ("chained", "structured")
+NOTES_MODE = os.getenv('NOTES_MODE', 'chained')
+
+# Long articles are split into chunks of at most this many (estimated) tokens,
+# analysed in parallel and merged; 0 disables chunking
+CHUNK_TOKEN_BUDGET = int(os.getenv('CHUNK_TOKEN_BUDGET', '3000'))
+CHUNK_CONCURRENCY = int(os.getenv('CHUNK_CONCURRENCY', '4'))
+CHARS_PER_TOKEN = 4
+
+# Recent streaming timings (seconds), newest last
+STREAM_TIMINGS = deque(maxlen=100)
 
 def extract_relevant_content(article_url):
     """
     Step 1: Extract relevant content from HTML
     """
     try:
-        # Fetch webpage
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(article_url, headers=headers)
-        response.raise_for_status()
-        
-        # Parse HTML
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Remove unwanted elements
-        for element in soup(['script', 'style', 'nav', 'header', 'footer', 'aside', 'iframe', 'noscript']):
-            element.decompose()
-            
-        # Extract main content
-        main_content = ""
-        
-        # Try different content selectors
-        content_selectors = [
-            'article', 
-            'div[class*="article"]',
-            'div[class*="content"]',
-            'div[class*="story"]',
-            'main',
-            'div[class*="main"]',
-            'div[role="main"]'
-        ]
+        # Fetch webpage through the HTML cache (revalidated with conditional requests)
+        html = fetch_html(article_url)
         
-        for selector in content_selectors:
-            content = soup.select_one(selector)
-            if content:
-                main_content = content.get_text(separator='\n', strip=True)
-                break
-                
-        # If no content found with selectors, try getting all paragraphs
-        if not main_content:
-            paragraphs = soup.find_all('p')
-            main_content = '\n'.join([p.get_text().strip() for p in paragraphs if len(p.get_text().strip()) > 20])
-        
-        # Clean content
-        main_content = re.sub(r'\n\s*\n', '\n\n', main_content)
-        main_content = re.sub(r'\s+', ' ', main_content)
-        main_content = main_content.strip()
-        
-        return main_content
+        # Parse HTML and pick the main content block
+        return extract_relevant_text(html, url=article_url)
         
     except Exception as e:
         st.error(f"Error extracting content: {str(e)}")
@@ -87,8 +70,7 @@ def is_india_related(content):
         Respond with ONLY one word: either "INDIA" or "FOREIGN"
         """
         
-        classification_response = model.generate_content(classification_prompt)
-        classification = classification_response.text.strip().upper()
+        classification = cached_generate(model, classification_prompt, stage='classify').strip().upper()
         
         return classification == "INDIA"
         
@@ -97,9 +79,83 @@ def is_india_related(content):
         # Default to foreign news if there's an error
         return False
 
-def analyze_content(content, is_india_news):
+def split_into_chunks(content, max_tokens=None):
     """
-    Step 2: Analyze the extracted content
+    Split content into chunks of at most max_tokens (estimated at 4 characters per token).
+
+    Splits on paragraph boundaries, falling back to sentence boundaries for
+    oversized paragraphs (extracted article text is a single paragraph).
+    """
+    max_tokens = CHUNK_TOKEN_BUDGET if max_tokens is None else max_tokens
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if max_tokens <= 0 or len(content) <= max_chars:
+        return [content]
+
+    pieces = []
+    for paragraph in re.split(r'\n\s*\n', content):
+        paragraph = paragraph.strip()
+        if len(paragraph) <= max_chars:
+            pieces.append(paragraph)
+            continue
+        for sentence in re.split(r'(?<=[.!?])\s+', paragraph):
+            # Hard-split a single sentence that is still too long
+            while len(sentence) > max_chars:
+                pieces.append(sentence[:max_chars])
+                sentence = sentence[max_chars:]
+            pieces.append(sentence)
+
+    # Greedily pack pieces into chunks
+    chunks = []
+    current = []
+    current_length = 0
+    for piece in pieces:
+        if not piece:
+            continue
+        if current and current_length + len(piece) + 2 > max_chars:
+            chunks.append('\n\n'.join(current))
+            current = []
+            current_length = 0
+        current.append(piece)
+        current_length += len(piece) + 2
+    if current:
+        chunks.append('\n\n'.join(current))
+
+    return chunks
+
+def merge_analyses_prompt(partial_analyses):
+    """
+    Prompt that reduces per-chunk analyses into one analysis
+    """
+    parts = "\n\n".join(
+        f"PART {number} OF {len(partial_analyses)}:\n{analysis}"
+        for number, analysis in enumerate(partial_analyses, 1)
+    )
+    return f"""
+    The following are analyses of consecutive parts of ONE news article, prepared for UPSC:
+
+    {parts}
+
+    Merge them into a single analysis of the whole article:
+    - Keep every fact, date, name, figure, scheme and syllabus connection
+    - Remove duplicates and resolve overlaps between parts
+    - Keep the same headings and format as the individual analyses
+    """
+
+def map_reduce_analysis(chunks, build_prompt):
+    """
+    Analyse chunks in parallel with build_prompt(chunk), then merge the partial analyses
+    """
+    with ThreadPoolExecutor(max_workers=max(1, min(CHUNK_CONCURRENCY, len(chunks)))) as pool:
+        # Chunk calls are tagged with the caller's pipeline run
+        partial_analyses = list(pool.map(
+            run_in_context(lambda chunk: cached_generate(model, build_prompt(chunk), stage='analysis_chunk')),
+            chunks
+        ))
+    return cached_generate(model, merge_analyses_prompt(partial_analyses), stage='analysis_merge')
+
+def analysis_prompt_for(content, is_india_news):
+    """
+    Build the Step 2 analysis prompt
     """
     if is_india_news:
         analysis_prompt = f"""
@@ -158,10 +214,22 @@ def analyze_content(content, is_india_news):
         SUMMARY:
         [Concise summary]
         """
-    
-    with st.spinner("Analyzing content..."):
-        analysis_response = model.generate_content(analysis_prompt)
-        return analysis_response.text
+    return analysis_prompt
+
+def analyze_content(content, is_india_news, chunk_tokens=None):
+    """
+    Step 2: Analyze the extracted content
+
+    Content longer than chunk_tokens (default CHUNK_TOKEN_BUDGET) is split on
+    paragraph boundaries, analysed chunk by chunk in parallel and merged.
+    """
+    chunks = split_into_chunks(content, chunk_tokens)
+    if len(chunks) == 1:
+        with st.spinner("Analyzing content..."):
+            return cached_generate(model, analysis_prompt_for(content, is_india_news), stage='analysis')
+
+    with st.spinner(f"Analyzing content in {len(chunks)} parts..."):
+        return map_reduce_analysis(chunks, lambda chunk: analysis_prompt_for(chunk, is_india_news))
 
 def add_context(analysis_result, is_india_news):
     """
@@ -239,12 +307,11 @@ def add_context(analysis_result, is_india_news):
         """
     
     with st.spinner("Adding context..."):
-        context_response = model.generate_content(context_prompt)
-        return context_response.text
+        return cached_generate(model, context_prompt, stage='context')
 
-def compile_notes(analysis_result, context_result, is_india_news):
+def compile_notes_prompt(analysis_result, context_result, is_india_news):
     """
-    Step 4: Compile final UPSC notes
+    Build the Step 4 prompt for compiling final UPSC notes
     """
     if is_india_news:
         notes_prompt = f"""
@@ -416,127 +483,364 @@ def compile_notes(analysis_result, context_result, is_india_news):
         - Do not omit any important details mentioned in the article
         """
     
+    return notes_prompt
+
+def compile_notes(analysis_result, context_result, is_india_news):
+    """
+    Step 4: Compile final UPSC notes
+    """
+    notes_prompt = compile_notes_prompt(analysis_result, context_result, is_india_news)
     with st.spinner("Compiling final notes..."):
-        notes_response = model.generate_content(notes_prompt)
-        return notes_response.text
+        return cached_generate(model, notes_prompt, stage='compile')
+
+# Sections of the final notes, in display order: (JSON field, heading)
+NOTES_SECTIONS = [
+    ('article_summary', 'Article Summary'),
+    ('key_facts_dates', 'Key Facts & Dates'),
+    ('important_names_roles', 'Important Names & Roles'),
+    ('key_terms_concepts', 'Key Terms & Concepts'),
+    ('government_schemes_policies', 'Government Schemes & Policies'),
+    ('historical_context', 'Historical Context'),
+    ('current_affairs_context', 'Current Affairs Context'),
+    ('syllabus_connections', 'UPSC Syllabus Connections'),
+    ('policy_implications', 'Policy Implications'),
+    ('practice_questions', 'Practice Questions'),
+]
+
+NOTES_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'is_india_related': {'type': 'boolean'},
+        **{field: {'type': 'array', 'items': {'type': 'string'}} for field, _ in NOTES_SECTIONS}
+    },
+    'required': ['is_india_related'] + [field for field, _ in NOTES_SECTIONS]
+}
+
+def render_structured_notes(notes_data):
+    """
+    Render structured notes JSON as markdown with the same sections as the chained mode
+    """
+    lines = []
+    for number, (field, heading) in enumerate(NOTES_SECTIONS, 1):
+        points = notes_data.get(field) or []
+        if isinstance(points, str):
+            points = [points]
+        lines.append(f"### {number}. {heading}")
+        for point in points:
+            point = point.strip()
+            if point:
+                lines.append(f"- {point}")
+        lines.append("")
+    return "\n".join(lines).strip()
+
+def generate_structured_notes(article_title, article_content):
+    """
+    Generate UPSC notes with a single JSON-schema-constrained Gemini request.
+    """
+    notes_prompt = f"""
+    Create concise UPSC notes for this article:
+    Title: {article_title}
+    Content: {article_content}
+
+    First decide whether the article is primarily about India (is_india_related = true)
+    or about another country/international affairs with minimal India connection (false).
+
+    Then fill every section with brief bullet points:
+    - article_summary: 2-3 lines
+    - key_facts_dates: key facts with dates
+    - important_names_roles: important names and their roles (brief)
+    - key_terms_concepts: definition, current context, UPSC relevance and recent developments
+    - government_schemes_policies: launch date, key objectives, recent updates and UPSC relevance
+    - historical_context: historical background with dates
+    - current_affairs_context: current affairs context
+    - syllabus_connections: relevant UPSC papers and topics
+    - policy_implications: policy, economic and international implications
+    - practice_questions: 2-3 practice questions
+
+    Keep each section brief but include all essential dates and updates.
+    Use an empty list for a section that does not apply.
+    """
 
-def generate_upsc_notes(article_title, article_content):
+    response_text = cached_generate(model, notes_prompt, generation_config={
+        'response_mime_type': 'application/json',
+        'response_schema': NOTES_SCHEMA
+    }, stage='structured')
+    return render_structured_notes(json.loads(response_text))
+
+def chained_analysis_prompt(article_title, article_content):
     """
-    Generate concise UPSC notes from article title and content.
+    Chained mode, step 1: analysis & extraction prompt
+    """
+    return f"""
+    Create a brief analysis of this article for UPSC:
+    Title: {article_title}
+    Content: {article_content}
+
+    Focus on:
+    1. Key Facts (with dates)
+    2. Important Names & Roles
+    3. Key Terms & Concepts (include UPSC relevance and current context)
+    4. Government Schemes & Policies (include launch dates, objectives, and recent updates)
+    5. Current Affairs Context
+    6. UPSC Syllabus Connections
+    Keep each point brief but include all relevant dates and updates.
     """
-    try:
-        # Determine if the article is India-related or foreign news
-        is_india_news = is_india_related(article_content)
-        
-        # Step 1: Analysis & Extraction
-        analysis_prompt = f"""
-        Create a brief analysis of this article for UPSC:
-        Title: {article_title}
-        Content: {article_content}
-
-        Focus on:
-        1. Key Facts (with dates)
-        2. Important Names & Roles
-        3. Key Terms & Concepts (include UPSC relevance and current context)
-        4. Government Schemes & Policies (include launch dates, objectives, and recent updates)
-        5. Current Affairs Context
-        6. UPSC Syllabus Connections
-        Keep each point brief but include all relevant dates and updates.
-        """
-        
-        analysis_result = model.generate_content(analysis_prompt).text
 
-        # Step 2: Context & Implications
-        context_prompt = f"""
-        Based on this analysis:
-        {analysis_result}
+def chained_context_prompt(analysis_result):
+    """
+    Chained mode, step 2: context & implications prompt
+    """
+    return f"""
+    Based on this analysis:
+    {analysis_result}
+
+    Provide brief context on:
+    1. Historical Context (with dates)
+    2. Policy Implications
+    3. Government Initiatives (include timeline and progress)
+    4. International Relations
+    5. Economic Impact
+    Keep each point concise and include key dates.
+    """
 
-        Provide brief context on:
-        1. Historical Context (with dates)
-        2. Policy Implications
-        3. Government Initiatives (include timeline and progress)
-        4. International Relations
-        5. Economic Impact
-        Keep each point concise and include key dates.
-        """
-        
-        context_result = model.generate_content(context_prompt).text
+def chained_notes_prompt(analysis_result, context_result):
+    """
+    Chained mode, step 3: note compilation prompt
+    """
+    return f"""
+    Compile concise UPSC notes using:
+    Analysis: {analysis_result}
+    Context: {context_result}
+
+    Structure as brief bullet points:
+    1. Article Summary (2-3 lines)
+    2. Key Facts & Dates
+    3. Important Names & Roles (brief)
+    4. Key Terms & Concepts (include UPSC relevance)
+    5. Government Schemes & Policies (with launch dates and recent updates)
+    6. Historical Context (with dates)
+    7. Current Affairs Context
+    8. UPSC Syllabus Connections
+    9. Policy Implications
+    10. Practice Questions (2-3)
+    Keep each section brief but include all essential dates and updates.
+    For government schemes, include:
+    - Launch date
+    - Key objectives
+    - Recent updates/developments
+    - UPSC relevance
+    
+    For key terms, include:
+    - Definition
+    - Current context
+    - UPSC relevance
+    - Recent developments
+    """
 
-        # Step 3: Note Compilation
-        notes_prompt = f"""
-        Compile concise UPSC notes using:
-        Analysis: {analysis_result}
-        Context: {context_result}
-
-        Structure as brief bullet points:
-        1. Article Summary (2-3 lines)
-        2. Key Facts & Dates
-        3. Important Names & Roles (brief)
-        4. Key Terms & Concepts (include UPSC relevance)
-        5. Government Schemes & Policies (with launch dates and recent updates)
-        6. Historical Context (with dates)
-        7. Current Affairs Context
-        8. UPSC Syllabus Connections
-        9. Policy Implications
-        10. Practice Questions (2-3)
-        Keep each section brief but include all essential dates and updates.
-        For government schemes, include:
-        - Launch date
-        - Key objectives
-        - Recent updates/developments
-        - UPSC relevance
-        
-        For key terms, include:
-        - Definition
-        - Current context
-        - UPSC relevance
-        - Recent developments
-        """
-        
-        final_notes = model.generate_content(notes_prompt).text
+def chained_analysis(article_title, article_content, chunk_tokens=None):
+    """
+    Chained mode: classification and step 1 analysis, map-reduced over chunks for long articles
+    """
+    chunks = split_into_chunks(article_content, chunk_tokens)
 
-        return final_notes
+    # Determine if the article is India-related or foreign news
+    # (the opening chunk is enough to tell, and keeps the prompt bounded)
+    is_india_news = is_india_related(chunks[0])
 
-    except Exception as e:
-        print(f"Error in generate_upsc_notes: {str(e)}")
-        return f"Error generating notes: {str(e)}"
+    if len(chunks) == 1:
+        analysis_result = cached_generate(model, chained_analysis_prompt(article_title, article_content), stage='analysis')
+    else:
+        analysis_result = map_reduce_analysis(
+            chunks,
+            lambda chunk: chained_analysis_prompt(article_title, chunk)
+        )
+    return is_india_news, analysis_result
 
-def generate_quiz(article_title, article_description):
+def generate_upsc_notes(article_title, article_content, mode=None, chunk_tokens=None):
     """
-    Generate a UPSC-style quiz from a news article.
+    Generate concise UPSC notes from article title and content.
+
+    mode selects "chained" (four sequential requests) or "structured"
+    (one JSON request); defaults to NOTES_MODE. In chained mode, articles
+    longer than chunk_tokens are analysed in parallel chunks and merged.
+    """
+    mode = mode or NOTES_MODE
+    with pipeline_run('notes', mode=mode) as run:
+        if mode == "structured":
+            try:
+                return generate_structured_notes(article_title, article_content)
+            except Exception as e:
+                # Fall back to the chained pipeline if the structured response is unusable
+                print(f"Error in structured notes, falling back to chained mode: {str(e)}")
+                run['fallback'] = True
+
+        try:
+            # Step 1: Classification, Analysis & Extraction
+            is_india_news, analysis_result = chained_analysis(article_title, article_content, chunk_tokens)
+
+            # Step 2: Context & Implications
+            context_result = cached_generate(model, chained_context_prompt(analysis_result), stage='context')
+
+            # Step 3: Note Compilation
+            notes_prompt = chained_notes_prompt(analysis_result, context_result)
+            final_notes = cached_generate(model, notes_prompt, stage='compile')
+
+            return final_notes
+
+        except Exception as e:
+            print(f"Error in generate_upsc_notes: {str(e)}")
+            run['error'] = f"{type(e).__name__}: {str(e)[:200]}"
+            return f"Error generating notes: {str(e)}"
+
+def generate_upsc_notes_stream(article_title, article_content, mode=None, timing=None, chunk_tokens=None):
+    """
+    Generate UPSC notes, yielding the final stage in chunks as Gemini produces them.
+
+    The classification, analysis and context stages run as in
+    generate_upsc_notes; only the compilation stage is streamed. Structured
+    mode has no markdown to stream and yields its notes in one piece.
+    Time to first token is recorded in the optional timing dict and
+    appended to STREAM_TIMINGS.
+
+    A failure is recorded as timing['error']. The "Error generating notes:"
+    text is only yielded when nothing was streamed yet, so it never lands at
+    the end of a half-written note; callers must check timing['error'] and
+    not store the notes of a failed stream.
     """
+    mode = mode or NOTES_MODE
+    started = time.perf_counter()
+    timing = timing if timing is not None else {}
+    timing.update({
+        'title': article_title,
+        'mode': mode,
+        'first_token_seconds': None,
+        'final_stage_first_token_seconds': None,
+        'total_seconds': None,
+        'error': None
+    })
+    streamed = False
+
     try:
-        quiz_prompt = f"""
-        Create a UPSC-style quiz with 5 multiple-choice questions based on this article:
-        
-        TITLE: {article_title}
-        CONTENT: {article_description}
-        
+        if mode == "structured":
+            notes = generate_upsc_notes(article_title, article_content, mode=mode)
+            timing['first_token_seconds'] = time.perf_counter() - started
+            if notes and notes.startswith("Error generating notes:"):
+                timing['error'] = notes
+            yield notes
+            return
+
+        with pipeline_run('notes_stream', mode=mode) as run:
+            # Step 1 and 2: Analysis and context (cached, not streamed)
+            is_india_news, analysis_result = chained_analysis(article_title, article_content, chunk_tokens)
+            context_result = cached_generate(model, chained_context_prompt(analysis_result), stage='context')
+
+            # Step 3: Stream the note compilation
+            stage_started = time.perf_counter()
+            notes_prompt = chained_notes_prompt(analysis_result, context_result)
+            for chunk in cached_generate_stream(model, notes_prompt, stage='compile'):
+                if timing['first_token_seconds'] is None:
+                    now = time.perf_counter()
+                    timing['first_token_seconds'] = now - started
+                    timing['final_stage_first_token_seconds'] = now - stage_started
+                    run['first_token_seconds'] = round(timing['first_token_seconds'], 4)
+                streamed = True
+                yield chunk
+
+    except Exception as e:
+        print(f"Error in generate_upsc_notes_stream: {str(e)}")
+        timing['error'] = f"Error generating notes: {str(e)}"
+        if not streamed:
+            yield timing['error']
+
+    finally:
+        timing['total_seconds'] = time.perf_counter() - started
+        STREAM_TIMINGS.append(timing)
+
+def stream_stats():
+    """
+    Summarise recent streaming timings
+    """
+    timings = [t for t in list(STREAM_TIMINGS) if t['first_token_seconds'] is not None]
+    if not timings:
+        return {'runs': 0, 'avg_first_token_seconds': None, 'avg_total_seconds': None}
+    return {
+        'runs': len(timings),
+        'avg_first_token_seconds': sum(t['first_token_seconds'] for t in timings) / len(timings),
+        'avg_total_seconds': sum(t['total_seconds'] for t in timings) / len(timings)
+    }
+
+def quiz_prompt(article_title, article_description, as_json=True):
+    """
+    Quiz prompt: JSON matching QUIZ_SCHEMA, or the markdown format read by the fallback parser
+    """
+    if as_json:
+        output_format = """
+        Return JSON with a "questions" list. For each question give:
+        - question: the question text
+        - options: exactly four option texts, without "A)" style labels
+        - answer: the letter (A, B, C or D) of the only correct option
+        - explanation: a brief explanation of the correct answer
+        """
+    else:
+        output_format = """
         Format each question as follows:
-        
+
         ## Question 1
         [Question text]
-        
+
         A) [Option A]
         B) [Option B]
         C) [Option C]
         D) [Option D]
-        
+
         **Answer:** [Correct option letter]
         **Explanation:** [Brief explanation of the correct answer]
+        """
+
+    return f"""
+        Create a UPSC-style quiz with 5 multiple-choice questions based on this article:
         
+        TITLE: {article_title}
+        CONTENT: {article_description}
+        {output_format}
         Make the questions:
         1. Clear and concise
         2. Based on key facts from the article
-        3. Relevant for UPSC preparation
-        4. Have only one correct answer
+        3. Relevant for UPSC preparation, similar to UPSC Prelims
+        4. Have only one correct answer among four options
         5. Include explanations for the correct answer
-        6. Focus on analytical understanding rather than memorization
+        6. Focus on analytical understanding rather than memorization: current affairs
+           implications, historical context, government policies, constitutional and
+           administrative dimensions, international relations, geography and economy
         """
-        
-        with st.spinner("Generating UPSC-style quiz..."):
-            quiz_response = model.generate_content(quiz_prompt)
-            return quiz_response.text
+
+def generate_quiz(article_title, article_description):
+    """
+    Generate a UPSC-style quiz from a news article.
+
+    The quiz is requested as JSON constrained by QUIZ_SCHEMA; if that
+    response has no usable questions, the markdown format is requested
+    instead. Returns the quiz text (read it with quiz_parser.parse_quiz),
+    or None when neither yields any questions.
+    """
+    try:
+        with st.spinner("Generating UPSC-style quiz..."), pipeline_run('quiz') as run:
+            quiz = cached_generate(model, quiz_prompt(article_title, article_description), generation_config={
+                'response_mime_type': 'application/json',
+                'response_schema': QUIZ_SCHEMA
+            }, stage='quiz')
+            if parse_quiz(quiz):
+                return quiz
+
+            print("Quiz JSON had no usable questions, retrying in markdown format")
+            run['fallback'] = True
+            quiz = cached_generate(model, quiz_prompt(article_title, article_description, as_json=False), stage='quiz_text')
+            if parse_quiz(quiz):
+                return quiz
+
+            run['error'] = "No questions in quiz response"
+            st.error("The generated quiz had no usable questions.")
+            return None
             
     except Exception as e:
         st.error(f"Error generating quiz: {str(e)}")